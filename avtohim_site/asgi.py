@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Под ASGI формы заявок лучше слать на /lead/async/ (core.views.lead_create_async):
+запись и уведомление там не занимают поток sync-пула.
 """
 
 import os
@@ -14,3 +17,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'avtohim_site.settings')
 
 application = get_asgi_application()
+
+# WARMUP=1 — переводы, резолверы, БД, кэши и шаблоны до первого запроса (core/warmup.py)
+from core.warmup import run_from_env  # noqa: E402
+
+run_from_env()
@@ -58,22 +58,42 @@ INSTALLED_APPS = [
 ]
 
 INSTALLED_APPS += ["sorl.thumbnail"]
-CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+CACHES = {"default": {"BACKEND": "core.perf.InstrumentedLocMemCache"}}  # LocMem + счётчик hit/miss
+# версии кэшей — отпечатки таблиц из БД (core/versioning.py); столько секунд процесс их помнит
+VERSION_STAMP_TTL = float(os.getenv("VERSION_STAMP_TTL", "1"))
+THUMBNAIL_BACKEND = "core.perf.TimedThumbnailBackend"
+
+# Замеры запросов (core/perf.py): Server-Timing для "staff" (и DEBUG), "all" или "off"
+PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", "staff")
+PERF_FLUSH_INTERVAL = int(os.getenv("PERF_FLUSH_INTERVAL", "10"))  # сек. между сбросами гистограмм в кэш
 THUMBNAIL_DEBUG = True  # в dev
 THUMBNAIL_FORMAT = "WEBP"
 THUMBNAIL_QUALITY = 80
 THUMBNAIL_ALTERNATIVE_RESOLUTIONS = [2]  # для @2x ретины
 
+# Лимиты на POST форм (core/ratelimit.py): "cache" — общий для воркеров при Redis/Memcached,
+# "memory" — в памяти процесса. Правила по умолчанию — ratelimit.DEFAULT_RULES.
+RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "1") == "1"  # 0 — для нагрузочных тестов
+RATELIMIT_BACKEND = os.getenv("RATELIMIT_BACKEND", "cache")
+RATELIMIT_TRUST_X_FORWARDED_FOR = os.getenv("RATELIMIT_TRUST_X_FORWARDED_FOR", "") == "1"  # за nginx
+# сколько своих прокси дописывают адрес в X-Forwarded-For ($proxy_add_x_forwarded_for);
+# клиент — N-й адрес с конца, всё левее мог подставить сам клиент
+RATELIMIT_TRUSTED_PROXIES = int(os.getenv("RATELIMIT_TRUSTED_PROXIES", "1"))
+
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",   # быстрые статики
+    "core.middleware.AsyncWhiteNoiseMiddleware",    # быстрые статики (WhiteNoise, не блокирует ASGI-цепочку)
+    "core.middleware.PerfMiddleware",               # Server-Timing + гистограммы по view (core/perf.py)
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",    # мультиязычность
+    "core.middleware.RateLimitMiddleware",          # лимиты на POST заявок/отзывов (после Locale)
+    "core.middleware.ReplicaRoutingMiddleware",     # публичные GET-страницы читают с реплики, если она есть
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "django_htmx.middleware.HtmxMiddleware",         # request.htmx (подгрузка галереи кейсов)
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -81,7 +101,7 @@ ROOT_URLCONF = 'avtohim_site.urls'
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.perf.TimedDjangoTemplates",  # DjangoTemplates + замер render/контекст-процессоров
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -110,13 +130,80 @@ WSGI_APPLICATION = 'avtohim_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# Профиль SQLite (core/sqlite_profile.py): "tuned" — постоянные соединения + mmap/cache_size/temp_store,
+# "basic" — только WAL/synchronous/foreign_keys и соединение на каждый запрос
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))  # сек. ожидания блокировки вместо мгновенного "locked"
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # байт, 0 — выключить
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "32768"))  # кэш страниц на соединение
+SQLITE_MAINTENANCE_INTERVAL = int(os.getenv("SQLITE_MAINTENANCE_INTERVAL", "3600"))  # optimize/checkpoint, сек.
+
+def _sqlite_db(path):
+    return {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-        "OPTIONS": {"timeout": 30},  # подождать до 30с, вместо мгновенного "locked"
+        "NAME": path,
+        "OPTIONS": {"timeout": SQLITE_BUSY_TIMEOUT},
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "600" if SQLITE_PROFILE == "tuned" else "0")),
+        "CONN_HEALTH_CHECKS": True,
     }
-}
+
+
+def _postgres_db(host, port):
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv("POSTGRES_DB", "avtohim"),
+        "USER": os.getenv("POSTGRES_USER", "avtohim"),
+        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+        "HOST": host,
+        "PORT": port,
+        # пул psycopg (Django 5.1+); с пулом CONN_MAX_AGE должен быть 0
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.getenv("POSTGRES_POOL_MIN", "2")),
+                "max_size": int(os.getenv("POSTGRES_POOL_MAX", "10")),
+                "timeout": int(os.getenv("POSTGRES_POOL_TIMEOUT", "10")),
+            },
+        },
+    }
+
+
+# DB_ENGINE=postgres — primary из POSTGRES_*, реплика — если задан POSTGRES_REPLICA_HOST.
+# Локально реплику можно изобразить вторым SQLite-файлом: SQLITE_REPLICA_PATH=replica.sqlite3
+# и manage.py copy_database --source default --target replica.
+# Какие страницы читают с реплики — core/db_routers.py.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+if DB_ENGINE == "postgres":
+    DATABASES = {"default": _postgres_db(os.getenv("POSTGRES_HOST", "localhost"), os.getenv("POSTGRES_PORT", "5432"))}
+    if os.getenv("POSTGRES_REPLICA_HOST"):
+        DATABASES["replica"] = _postgres_db(
+            os.getenv("POSTGRES_REPLICA_HOST"), os.getenv("POSTGRES_REPLICA_PORT", os.getenv("POSTGRES_PORT", "5432"))
+        )
+    if os.getenv("SQLITE_LEGACY_PATH"):
+        # источник для переноса: manage.py copy_database --source legacy --target default
+        DATABASES["legacy"] = _sqlite_db(os.getenv("SQLITE_LEGACY_PATH"))
+else:
+    DATABASES = {"default": _sqlite_db(BASE_DIR / "db.sqlite3")}
+    if os.getenv("SQLITE_REPLICA_PATH"):
+        DATABASES["replica"] = _sqlite_db(BASE_DIR / os.getenv("SQLITE_REPLICA_PATH"))
+
+if "replica" in DATABASES:
+    # в тестах отдельной реплики нет — читает из тестовой default
+    # (отдельную пустую даёт профиль settings_test)
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+DB_REPLICA_READS = "replica" in DATABASES
+
+DATABASE_ROUTERS = ["core.db_routers.PrimaryReplicaRouter"]
+
+# вставки заявок/отзывов через одну нить-писателя группами (см. core/writequeue.py)
+SQLITE_WRITE_QUEUE = os.getenv("SQLITE_WRITE_QUEUE", "0") == "1"
+SQLITE_WRITE_QUEUE_BATCH = int(os.getenv("SQLITE_WRITE_QUEUE_BATCH", "50"))
+SQLITE_WRITE_QUEUE_MAX_WAIT = float(os.getenv("SQLITE_WRITE_QUEUE_MAX_WAIT", "0.002"))
+
+# заявки старше N месяцев уезжают в gzip-архив по месяцам (manage.py archive_leads, core/lead_archive.py)
+LEAD_ARCHIVE_DIR = Path(os.getenv("LEAD_ARCHIVE_DIR", BASE_DIR / "archive" / "leads"))
+LEAD_RETENTION_MONTHS = int(os.getenv("LEAD_RETENTION_MONTHS", "12"))
 
 
 # Password validation
@@ -160,8 +247,16 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"   # для collectstatic
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
-
-# Грузим сжатые статики через WhiteNoise
+# /media/ отдаёт core/media.py (Range, ETag, immutable для миниатюр sorl)
+MEDIA_SERVE = os.getenv("MEDIA_SERVE", "1") == "1"
+MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", str(60 * 60 * 24)))  # сек., для всего кроме миниатюр
+# "x-accel-redirect" (nginx, internal location MEDIA_SENDFILE_PREFIX) или "x-sendfile" (Apache/lighttpd);
+# пусто — файл отдаёт сам Django (под gunicorn — os.sendfile через wsgi.file_wrapper)
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", "")
+MEDIA_SENDFILE_PREFIX = os.getenv("MEDIA_SENDFILE_PREFIX", "/protected-media/")
+
+# Грузим сжатые статики через WhiteNoise: collectstatic кладёт рядом .gz и, если
+# установлен Brotli, .br; хэшированные имена отдаются с "max-age=10 лет, immutable"
 STORAGES = {
     "default": {  # <— обязательный ключ для sorl-thumbnail
         "BACKEND": "django.core.files.storage.FileSystemStorage",
@@ -0,0 +1,48 @@
+"""
+Продакшен-профиль: DJANGO_SETTINGS_MODULE=avtohim_site.settings_prod.
+
+Всё из settings.py, плюс:
+- DEBUG / ALLOWED_HOSTS / SECRET_KEY только из окружения (без ключа не стартуем);
+- шаблоны через кэширующий загрузчик — каждый разбирается один раз на процесс;
+  с WARM_TEMPLATES=1 wsgi.py/asgi.py компилируют их ещё до первого запроса
+  (WARMUP=1 — весь прогрев, core/warmup.py; вручную — manage.py warm_templates).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+DEBUG = os.getenv("DJANGO_DEBUG", "0") == "1"
+
+SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "")
+if not SECRET_KEY:
+    raise ImproperlyConfigured("DJANGO_SECRET_KEY не задан")
+
+# "avtohim.kg,www.avtohim.kg"
+ALLOWED_HOSTS = [h.strip() for h in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",") if h.strip()]
+CSRF_TRUSTED_ORIGINS = [f"https://{h.lstrip('.')}" for h in ALLOWED_HOSTS if h != "*"]
+
+THUMBNAIL_DEBUG = False
+
+# APP_DIRS несовместим с явными loaders — те же источники, но через cached.Loader
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "context_processors": [
+                p for p in TEMPLATES[0]["OPTIONS"]["context_processors"]
+                if p != "django.template.context_processors.debug"
+            ],
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
+        },
+    },
+]
@@ -0,0 +1,13 @@
+"""
+Профиль тестов: python manage.py test --settings=avtohim_site.settings_test.
+
+Всё из settings.py, плюс алиас "replica" — отдельная пустая SQLite в памяти
+(не зеркало default), чтобы ReplicaRoutingTests видели, из какой базы пришли
+строки. Чтения на неё выключены (DB_REPLICA_READS=False) — остальные тесты
+работают с default, роутинг включает сам ReplicaRoutingTests.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, _sqlite_db
+
+DATABASES = {**DATABASES, "replica": _sqlite_db(BASE_DIR / "replica.sqlite3")}
+DB_REPLICA_READS = False
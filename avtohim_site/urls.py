@@ -1,7 +1,6 @@
 # avtohim_site/urls.py (фрагмент)
 from django.conf.urls.i18n import i18n_patterns
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from core import views as core_views
@@ -14,6 +13,12 @@ handler500 = "core.views.error_500"
 
 urlpatterns = [
     path("i18n/", include("django.conf.urls.i18n")),
+    path("robots.txt", core_views.robots_txt, name="robots_txt"),
+    path("sitemap.xml", core_views.sitemap_index, name="sitemap_index"),
+    path("sitemap-<slug:section>.xml", core_views.sitemap_section, name="sitemap_section"),
+    path("internal/db-writes/", core_views.db_write_stats, name="db_write_stats"),
+    path("internal/perf/", core_views.perf_stats, name="perf_stats"),
+    path("internal/leads/", core_views.lead_stats, name="lead_stats"),
 ]
 
 urlpatterns += i18n_patterns(
@@ -21,16 +26,20 @@ urlpatterns += i18n_patterns(
     path("", core_views.home, name="home"),
     path("services/", core_views.service_list, name="service_list"),
     path("services/<slug:slug>/", core_views.service_detail, name="service_detail"),
+    path("services/<int:service_id>/cases/<int:page>/", core_views.service_cases, name="service_cases"),
     path("products/", core_views.product_list, name="product_list"),
     path("products/<slug:slug>/", core_views.product_detail, name="product_detail"),
     path("lead/", core_views.lead_create, name="lead_create"),
+    path("lead/async/", core_views.lead_create_async, name="lead_create_async"),
     path("contacts/", core_views.contacts, name="contacts"),
     path("faq/", core_views.faq_page, name="faq_page"),
+    path("reviews/", core_views.review_list, name="review_list"),
     path("reviews/new/", core_views.review_create, name="review_create"),
     
     prefix_default_language=False,
     
 )
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.MEDIA_SERVE:
+    # Range + кэш + sendfile; MEDIA_SERVE=0, если /media/ целиком отдаёт nginx
+    urlpatterns += [path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", core_views.media_file, name="media_file")]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'avtohim_site.settings')
 
 application = get_wsgi_application()
+
+# WARMUP=1 — переводы, резолверы, БД, кэши и шаблоны до первого запроса (core/warmup.py)
+from core.warmup import run_from_env  # noqa: E402
+
+run_from_env()
@@ -1,17 +1,103 @@
 # core/admin.py
+import datetime
+
+from django.conf import settings
 from django.contrib import admin
-from . import translation
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+from . import leadstats, translation
 from .models import SiteSettings
-from django.utils.text import slugify
-from unidecode import unidecode
 from modeltranslation.admin import TranslationAdmin, TranslationTabularInline
-from .models import Service, Case, FAQ, Review, Branch
+from .models import Service, Case, FAQ, Review, Branch, Lead
+
+# выше — COUNT(*) заменяем оценкой (без фильтров) или считаем «не больше» (с фильтрами)
+ADMIN_ESTIMATE_THRESHOLD = 10_000
 
-def autoslug(value):
+
+class EstimatedCountPaginator(Paginator):
     """
-    Транслитерирует и слагает.
+    Пагинатор для растущих таблиц: без фильтров — оценка числа строк
+    (reltuples в PostgreSQL, MAX(id) в SQLite) вместо COUNT(*);
+    с фильтрами — COUNT по подзапросу с LIMIT.
     """
-    return slugify(unidecode(value))[:200]
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not qs.query.where:
+            estimate = _estimated_rows(qs)
+            if estimate > ADMIN_ESTIMATE_THRESHOLD:
+                # MAX(id) не уменьшается после удаления (архив лидов) — маленькую
+                # таблицу считаем честно, COUNT с LIMIT дешевле порога не выйдет
+                exact = qs.order_by()[:ADMIN_ESTIMATE_THRESHOLD + 1].count()
+                return estimate if exact > ADMIN_ESTIMATE_THRESHOLD else exact
+        # дальше порога страницы всё равно не листают — сузьте фильтром/датой
+        return qs.order_by()[:ADMIN_ESTIMATE_THRESHOLD].count()
+
+
+def _estimated_rows(qs):
+    connection = connections[qs.db]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [qs.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:  # -1 — таблицу ещё не анализировали
+            return row[0]
+    return qs.model._base_manager.using(qs.db).aggregate(n=Max("pk"))["n"] or 0
+
+
+class DateSpanQuerySet(QuerySet):
+    """
+    Для date_hierarchy: годы и месяцы — все между MIN и MAX (два значения
+    из индекса), а не DISTINCT по усечённой дате каждой строки таблицы.
+    Дни — как обычно: к этому уровню выборка уже сужена до месяца.
+    """
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None):
+        if kind not in ("year", "month"):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        span = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if not span["first"]:
+            return []
+        first, last = (timezone.localtime(v) for v in (span["first"], span["last"]))
+        values, year, month = [], first.year, first.month if kind == "month" else 1
+        while (year, month) <= (last.year, last.month):
+            values.append(datetime.datetime(year, month, 1, tzinfo=first.tzinfo))
+            if kind == "year":
+                year += 1
+            else:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return values[::-1] if order == "DESC" else values
+
+
+class LangFilter(admin.SimpleListFilter):
+    """Языки из настроек — без SELECT DISTINCT lang по всей таблице."""
+
+    title = "Язык"
+    parameter_name = "lang"
+
+    def lookups(self, request, model_admin):
+        return settings.LANGUAGES
+
+    def queryset(self, request, queryset):
+        return queryset.filter(lang=self.value()) if self.value() else queryset
+
+class PublishedServiceFilter(admin.SimpleListFilter):
+    """Только услуги, у которых есть строки в этом списке, — вместо RelatedFieldListFilter по всей таблице Service."""
+
+    title = "Услуга"
+    parameter_name = "service"
+
+    def lookups(self, request, model_admin):
+        # и снятые с публикации: их кейсы/FAQ тоже нужно находить
+        services = Service.objects.filter(pk__in=model_admin.model.objects.values("service_id"))
+        return [(s.pk, s.title) for s in services.order_by("order", "id")]
+
+    def queryset(self, request, queryset):
+        return queryset.filter(service_id=self.value()) if self.value() else queryset
 
 class FAQInline(TranslationTabularInline):
     model = FAQ
@@ -34,19 +120,12 @@ class ServiceAdmin(TranslationAdmin):
         ("SEO", {"fields": ("meta_title", "meta_description")}),
     )
 
-    def save_model(self, request, obj, form, change):
-        # если slug'и пустые — автогенерируем из title для всех языков
-        for code in ("", "_ky", "_en"):
-            t = getattr(obj, f"title{code}", None)
-            s = getattr(obj, f"slug{code}", None)
-            if t and not s:
-                setattr(obj, f"slug{code}", autoslug(t))
-        super().save_model(request, obj, form, change)
-
 @admin.register(Case)
 class CaseAdmin(TranslationAdmin):
     list_display = ("title", "service", "is_published", "created_at")
-    list_filter = ("is_published", "service")
+    list_filter = ("is_published", PublishedServiceFilter)
+    list_select_related = ("service",)
+    autocomplete_fields = ("service",)
     search_fields = ("title",)
     fieldsets = (
         (None, {"fields": ("service", "title", "slug", "before_image", "after_image")}),
@@ -54,18 +133,12 @@ class CaseAdmin(TranslationAdmin):
         ("Публикация", {"fields": ("is_published",)}),
     )
 
-    def save_model(self, request, obj, form, change):
-        for code in ("", "_ky", "_en"):
-            t = getattr(obj, f"title{code}", None)
-            s = getattr(obj, f"slug{code}", None)
-            if t and not s:
-                setattr(obj, f"slug{code}", autoslug(t))
-        super().save_model(request, obj, form, change)
-
 @admin.register(FAQ)
 class FAQAdmin(TranslationAdmin):
     list_display = ("question", "service", "order", "is_published")
-    list_filter = ("is_published", "service")
+    list_filter = ("is_published", PublishedServiceFilter)
+    list_select_related = ("service",)
+    autocomplete_fields = ("service",)
     search_fields = ("question",)
 
 try:
@@ -91,4 +164,33 @@ class BranchAdmin(admin.ModelAdmin):
     list_display = ("name", "address_locality", "is_active", "sort")
     list_editable = ("is_active", "sort")
     search_fields = ("name", "street_address", "address_locality")
-    prepopulated_fields = {"slug": ("name",)}
\ No newline at end of file
+    prepopulated_fields = {"slug": ("name",)}
+
+@admin.register(Lead)
+class LeadAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "name", "phone", "service", "status")
+    list_display_links = ("created_at", "name")
+    list_filter = ("status", LangFilter)
+    list_select_related = ("service",)
+    date_hierarchy = "created_at"
+    search_fields = ("^phone", "name")
+    autocomplete_fields = ("service",)
+    readonly_fields = ("created_at", "updated_at")
+    list_per_page = 50
+    # без второго COUNT(*) по всей таблице рядом с отфильтрованным
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    # статус — действиями (один UPDATE), а не list_editable: 50 форм на странице дороже самого запроса
+    actions = ("mark_inwork", "mark_done")
+
+    @admin.action(description="Перевести в «В работе»")
+    def mark_inwork(self, request, queryset):
+        leadstats.apply_status(queryset, Lead.Status.INWORK)
+
+    @admin.action(description="Отметить завершёнными")
+    def mark_done(self, request, queryset):
+        leadstats.apply_status(queryset, Lead.Status.DONE)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return DateSpanQuerySet(qs.model, query=qs.query, using=qs.db)
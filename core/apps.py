@@ -2,6 +2,8 @@ from django.apps import AppConfig
 from django.dispatch import receiver
 from django.db.backends.signals import connection_created
 
+from . import sqlite_profile  # профиль PRAGMA + периодический optimize/checkpoint
+
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
@@ -9,11 +11,10 @@ class CoreConfig(AppConfig):
     def ready(self):
         # важно, чтобы модуль загрузился
         from . import translation  # noqa: F401
+        from . import signals  # noqa: F401
+        from . import perf  # noqa: F401  (счётчик SQL на новых соединениях)
 
 @receiver(connection_created)
 def _sqlite_pragmas(sender, connection, **kwargs):
     if connection.vendor == "sqlite":
-        cur = connection.cursor()
-        cur.execute("PRAGMA journal_mode=WAL;")
-        cur.execute("PRAGMA synchronous=NORMAL;")
-        cur.execute("PRAGMA foreign_keys=ON;")
+        sqlite_profile.apply(connection)  # профиль — SQLITE_PROFILE в settings
@@ -0,0 +1,138 @@
+# core/benchdata.py
+"""
+Синтетическое наполнение для бенчмарков и тестов бюджета запросов:
+товары с брендами/категориями, отзывы, услуги с кейсами и FAQ, филиалы —
+все переводимые поля заполнены на ru/ky/en.
+
+Пишет через bulk_create (сигналы не шлются, save() не вызывается —
+slug задаём сами). Для картинок кейсов кладёт одну маленькую JPEG в
+MEDIA_ROOT — миниатюры sorl генерируются по-настоящему.
+"""
+import io
+import os
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FAQ, Brand, Branch, Case, Product, ProductCategory, Review, Service, SiteSettings
+
+DEFAULT_SIZES = {
+    "products": 500,
+    "brands": 20,
+    "categories": 10,
+    "reviews": 2000,
+    "services": 50,
+    "cases_per_service": 3,
+    "faqs_per_service": 5,
+    "branches": 5,
+}
+
+CASE_IMAGE = "bench/case.jpg"
+
+
+def _case_image() -> str:
+    path = os.path.join(settings.MEDIA_ROOT, CASE_IMAGE)
+    if not os.path.exists(path):
+        from PIL import Image
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        buf = io.BytesIO()
+        Image.new("RGB", (1600, 900), (120, 130, 140)).save(buf, "JPEG", quality=70)
+        with open(path, "wb") as fh:
+            fh.write(buf.getvalue())
+    return CASE_IMAGE
+
+
+def _i18n(prefix: str, i: int) -> dict:
+    return {"ru": f"{prefix} {i}", "ky": f"{prefix} {i} (ky)", "en": f"{prefix} {i} (en)"}
+
+
+@transaction.atomic
+def seed(sizes: dict | None = None, rng_seed: int = 42) -> dict:
+    """Наполняет пустую БД; возвращает фактические размеры."""
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    rng = random.Random(rng_seed)
+    now = timezone.now()
+
+    SiteSettings.get_solo()
+
+    Branch.objects.bulk_create([
+        Branch(
+            name=f"Branch {i}", slug=f"branch-{i}", street_address=f"Street {i}",
+            geo_lat=42.87 + i / 100, geo_lng=74.59 + i / 100, sort=i,
+        )
+        for i in range(sizes["branches"])
+    ])
+
+    brands = Brand.objects.bulk_create([
+        Brand(title=f"Brand {i}", slug=f"brand-{i}") for i in range(sizes["brands"])
+    ])
+    categories = ProductCategory.objects.bulk_create([
+        ProductCategory(title=f"Category {i}", slug=f"category-{i}") for i in range(sizes["categories"])
+    ])
+    Product.objects.bulk_create([
+        Product(
+            title=f"Product {i}", slug=f"product-{i}",
+            brand=rng.choice(brands) if brands else None,
+            category=rng.choice(categories) if categories else None,
+            short_desc="Synthetic product " * 3, full_desc="Lorem ipsum " * 40,
+            price=rng.randint(300, 9000), unit="1 l", in_stock=rng.random() > 0.1,
+        )
+        for i in range(sizes["products"])
+    ], batch_size=500)
+
+    services = []
+    for i in range(sizes["services"]):
+        title, slug = _i18n("Service", i), {"ru": f"service-{i}", "ky": f"service-{i}-ky", "en": f"service-{i}-en"}
+        services.append(Service(
+            title=title["ru"], slug=slug["ru"], order=i, price_from=rng.randint(1000, 20000),
+            short_desc="Short " * 10, body="Body " * 200,
+            **{f"title_{lang}": v for lang, v in title.items()},
+            **{f"slug_{lang}": v for lang, v in slug.items()},
+            **{f"short_desc_{lang}": f"Short {lang} " * 10 for lang in title},
+            **{f"body_{lang}": f"Body {lang} " * 200 for lang in title},
+        ))
+    services = Service.objects.bulk_create(services)
+
+    image = _case_image() if sizes["cases_per_service"] else ""
+    Case.objects.bulk_create([
+        Case(
+            service=s, title=f"Case {s.pk}-{j}", slug=f"case-{s.pk}-{j}",
+            **{f"title_{lang}": f"Case {s.pk}-{j} {lang}" for lang in ("ru", "ky", "en")},
+            **{f"slug_{lang}": f"case-{s.pk}-{j}-{lang}" for lang in ("ru", "ky", "en")},
+            before_image=image, after_image=image,
+            metric_label="Compression", metric_before="8 bar", metric_after="13 bar",
+        )
+        for s in services
+        for j in range(sizes["cases_per_service"])
+    ], batch_size=500)
+
+    FAQ.objects.bulk_create([
+        FAQ(
+            service=s, order=j,
+            **{f"question_{lang}": f"Question {s.pk}-{j} {lang}?" for lang in ("ru", "ky", "en")},
+            **{f"answer_{lang}": f"Answer {lang} " * 20 for lang in ("ru", "ky", "en")},
+            question=f"Question {s.pk}-{j}?", answer="Answer " * 20,
+        )
+        for s in services
+        for j in range(sizes["faqs_per_service"])
+    ], batch_size=500)
+
+    sources = [c for c, _ in Review.Source.choices]
+    Review.objects.bulk_create([
+        Review(
+            author=f"Author {i}", rating=rng.choice((3, 4, 5, 5, 5)), source=rng.choice(sources),
+            text=f"Review {i} " * 15,
+            **{f"text_{lang}": f"Review {i} {lang} " * 15 for lang in ("ru", "ky", "en")},
+        )
+        for i in range(sizes["reviews"])
+    ], batch_size=500)
+    # auto_now_add проставил всем одно время — разносим для реалистичной сортировки
+    for i, pk in enumerate(Review.objects.order_by("pk").values_list("pk", flat=True)):
+        if i % 200 == 0:
+            Review.objects.filter(pk__gte=pk).update(created_at=now - timedelta(days=i // 200))
+
+    return sizes
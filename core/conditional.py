@@ -0,0 +1,65 @@
+# core/conditional.py
+"""
+Conditional GET (ETag / Last-Modified) для публичных страниц.
+
+Валидаторы считаются одним запросом из MAX(updated_at)+COUNT таблиц,
+которые попадают в страницу, плюс язык. Если ничего не менялось —
+Django отдаёт 304 до вызова view, шаблоны не рендерятся.
+"""
+import datetime
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+from .freshness import stamp_digest, table_stamps
+from .models import Branch, Review, SiteSettings
+
+# то, что рендерит base.html на каждой странице: SITESET, BRANCHES, SITE_RATING
+LAYOUT_SOURCES = (
+    (SiteSettings, "updated_at"),
+    (Branch, "updated_at"),
+    (Review, "updated_at"),
+)
+
+
+def _has_pending_messages(request) -> bool:
+    # len() не помечает сообщения прочитанными, в отличие от итерации
+    return bool(len(get_messages(request)))
+
+
+def conditional_page(*sources):
+    """
+    Декоратор view: @conditional_page((Service, "updated_at"), ...).
+    Страницы с ожидающими flash-сообщениями всегда рендерятся целиком.
+    """
+    sources = LAYOUT_SOURCES + sources
+
+    def _validators(request):
+        # condition() зовёт обе функции — считаем штампы один раз на запрос
+        if not hasattr(request, "_page_validators"):
+            if request.method not in ("GET", "HEAD") or _has_pending_messages(request):
+                request._page_validators = (None, None)
+            else:
+                stamps = table_stamps(sources)
+                etag = stamp_digest(
+                    get_language(),
+                    request.get_full_path(),
+                    # csrf-токен зашит в формы страницы — новая кука = новая страница
+                    request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+                    *stamps,
+                )
+                last_modified = max(
+                    (ts for ts, _ in stamps if isinstance(ts, datetime.datetime)), default=None
+                )
+                request._page_validators = (etag, last_modified)
+        return request._page_validators
+
+    def etag_func(request, *args, **kwargs):
+        return _validators(request)[0]
+
+    def last_modified_func(request, *args, **kwargs):
+        return _validators(request)[1]
+
+    return condition(etag_func=etag_func, last_modified_func=last_modified_func)
@@ -1,16 +1,60 @@
 # core/context_processors.py
+"""
+Общие для всех страниц данные шаблона.
 
+Всё ленивое и из кэша: SiteSettings и филиалы — по версии "layout",
+рейтинг — по версии "reviews" (отпечатки таблиц, см. core/versioning.py).
+Пока шаблон берёт шапку/подвал из фрагментного кэша ({% cache %} по
+языку + LAYOUT_VERSION), к БД идёт только запрос отпечатков — и тот
+не чаще раза в VERSION_STAMP_TTL на процесс.
+"""
+from django.core.cache import cache
 from django.db.models import Avg, Count
+from django.utils.functional import SimpleLazyObject
+
 from .models import SiteSettings, Review, Branch  # добавили Review
+from .versioning import get_version
 
-def site_settings(request):
-    SITESET = SiteSettings.get_solo()
+LAYOUT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cached(name, version, build):
+    key = f"ctx:{name}:{version}"
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, LAYOUT_CACHE_TIMEOUT)
+    return value
+
+
+def _rating():
     agg = Review.objects.filter(is_published=True).aggregate(avg=Avg("rating"), cnt=Count("id"))
-    rating = {
+    return {
         "value": round(agg["avg"] or 0, 1),
         "count": agg["cnt"] or 0,
     }
-    return {"SITESET": SITESET, "SITE_RATING": rating}
+
+
+def get_siteset():
+    return _cached("siteset", get_version("layout"), SiteSettings.get_solo)
+
+
+def get_branches():
+    return _cached("branches", get_version("layout"), lambda: list(Branch.objects.filter(is_active=True)))
+
+
+def get_rating():
+    return _cached("rating", get_version("reviews"), _rating)
+
+
+def site_settings(request):
+    return {
+        "SITESET": SimpleLazyObject(get_siteset),
+        "SITE_RATING": SimpleLazyObject(get_rating),
+        "LAYOUT_VERSION": get_version("layout"),
+        "LAYOUT_CACHE_TIMEOUT": LAYOUT_CACHE_TIMEOUT,
+    }
+
 
 def branches(request):
-    return {"BRANCHES": Branch.objects.filter(is_active=True)}
+    return {"BRANCHES": SimpleLazyObject(get_branches)}
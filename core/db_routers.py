@@ -0,0 +1,64 @@
+# core/db_routers.py
+"""
+Маршрутизация primary / replica.
+
+Чтения уходят на алиас "replica" только внутри публичных read-only
+страниц (GET/HEAD, url_name из REPLICA_VIEWS) — флаг ставит
+ReplicaRoutingMiddleware через contextvar. Всё остальное (админка,
+заявки, отзывы, фоновые задачи) читает и пишет в "default", так что
+отставание реплики не видно сразу после записи. Сессии, пользователи,
+права и лог админки (PRIMARY_ONLY_APPS) читаются с primary и на
+публичных страницах.
+
+Нет алиаса "replica" в DATABASES (или DB_REPLICA_READS=False) — роутер
+ничего не меняет.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = "replica"
+
+REPLICA_VIEWS = frozenset(getattr(settings, "DB_REPLICA_VIEWS", (
+    "home",
+    "service_list",
+    "service_detail",
+    "product_list",
+    "product_detail",
+    "faq_page",
+)))
+
+# сессии, логины, права и лог админки — всегда с primary: запись секундной давности
+# на реплике может ещё не появиться
+PRIMARY_ONLY_APPS = frozenset({"sessions", "auth", "contenttypes", "admin"})
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_configured() -> bool:
+    return settings.DB_REPLICA_READS and REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def replica_reads():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured() and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплика — копия primary: объекты с обоих алиасов — одни и те же строки
+        return True
@@ -5,6 +5,8 @@ from .models import Lead, Review
 class LeadForm(forms.ModelForm):
     # honeypot (от ботов)
     website = forms.CharField(required=False, widget=forms.HiddenInput)
+    # токен отправки, его заполняет JS на странице (см. base.html)
+    idempotency_key = forms.CharField(required=False, max_length=64, widget=forms.HiddenInput)
 
     class Meta:
         model = Lead
@@ -29,6 +31,10 @@ class LeadForm(forms.ModelForm):
             raise forms.ValidationError(_("Проверьте форму"))
         return cleaned
 
+    def save(self, commit=True):
+        self.instance.idempotency_key = self.cleaned_data.get("idempotency_key") or None
+        return super().save(commit)
+
 class ReviewForm(forms.ModelForm):
     class Meta:
         model = Review
@@ -0,0 +1,60 @@
+# core/freshness.py
+"""
+Дешёвые «отпечатки» свежести таблиц: последний timestamp + число строк.
+Без выборки самих строк; несколько таблиц — одним запросом.
+"""
+import datetime
+import hashlib
+
+from django.db import connections, router
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def _as_datetime(value):
+    # SQLite отдаёт MAX() по raw-запросу строкой, Postgres — готовым datetime
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    dt = parse_datetime(str(value))
+    if dt is not None and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, datetime.timezone.utc)
+    return dt
+
+
+def table_stamps(sources):
+    """
+    sources: [(модель, имя поля времени | "pk"), ...]
+    Возвращает [(последнее значение, число строк), ...] в том же порядке.
+    Число строк ловит удаления, которые не двигают MAX(поле).
+    """
+    if not sources:
+        return []
+    connection = connections[router.db_for_read(sources[0][0])]
+    qn = connection.ops.quote_name
+    selects = []
+    for i, (model, field) in enumerate(sources):
+        column = model._meta.pk.column if field == "pk" else model._meta.get_field(field).column
+        selects.append(
+            f"SELECT {i}, MAX({qn(column)}), COUNT(*) FROM {qn(model._meta.db_table)}"
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(" UNION ALL ".join(selects))
+        rows = sorted(cursor.fetchall())
+    return [
+        (value if field == "pk" else _as_datetime(value), count)
+        for (_, value, count), (_, field) in zip(rows, sources)
+    ]
+
+
+def model_stamp(model, field="updated_at"):
+    """(последнее изменение, число строк) для одной таблицы."""
+    return table_stamps([(model, field)])[0]
+
+
+def stamp_digest(*parts) -> str:
+    """
+    Короткий хэш от произвольных частей (штампов, языка и т.п.) —
+    годится и для ключа кэша, и для ETag.
+    """
+    raw = "|".join(repr(p) for p in parts)
+    return hashlib.md5(raw.encode("utf-8"), usedforsecurity=False).hexdigest()[:16]
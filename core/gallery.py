@@ -0,0 +1,46 @@
+# core/gallery.py
+"""
+Галерея кейсов «до/после» услуги по страницам.
+
+Первая страница встраивается в service_detail, следующие подгружает HTMX
+(hx-trigger="revealed" на последнем элементе) с view service_cases.
+Готовый HTML страницы кэшируется по (услуга, язык, страница, версия
+"cases:<id>") — вместе с ним и все поиски миниатюр sorl; версия —
+отпечаток таблиц Case и Service (core/versioning.py), общий для всех воркеров.
+"""
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.translation import get_language
+
+from .models import Case
+from .versioning import get_version
+
+CASES_PER_PAGE = 4
+GALLERY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _render(service_id, page):
+    offset = (page - 1) * CASES_PER_PAGE
+    # на один больше — узнать, есть ли следующая страница, без COUNT
+    cases = list(
+        Case.objects.filter(service_id=service_id, service__is_published=True, is_published=True)
+        [offset:offset + CASES_PER_PAGE + 1]
+    )
+    if not cases:
+        return ""
+    return render_to_string("services/_cases_page.html", {
+        "cases": cases[:CASES_PER_PAGE],
+        "service_id": service_id,
+        "next_page": page + 1 if len(cases) > CASES_PER_PAGE else None,
+    })
+
+
+def cases_page(service_id, page=1):
+    """HTML страницы галереи; "" — кейсов на этой странице нет."""
+    version = get_version(f"cases:{service_id}")
+    key = f"cases:{service_id}:{get_language()}:{page}:{version}"
+    html = cache.get(key)
+    if html is None:
+        html = _render(service_id, page)
+        cache.set(key, html, GALLERY_CACHE_TIMEOUT)
+    return html
@@ -0,0 +1,175 @@
+# core/lead_archive.py
+"""
+Архив старых заявок: gzip JSONL по месяцам — LEAD_ARCHIVE_DIR/leads-YYYY-MM.jsonl.gz.
+
+Файлы только дописываются: каждая пачка — отдельный gzip-член,
+записанный одним write и fsync до того, как строки удаляются из базы.
+Удаление — короткими транзакциями по пачке, чтобы не держать блокировку
+записи SQLite. Если процесс упал между записью и удалением, пачка
+попадёт в архив повторно — чтение пропускает повторы по id.
+
+Если процесс упал посреди write, в конце файла остаётся оборванный член:
+перед первой дозаписью за запуск файл обрезается до конца последнего
+целого члена. Чтение разбирает члены по одному (а не одним потоком
+gzip.open) и пропускает битые — строки следующих членов не теряются
+даже в файлах, повреждённых до этой проверки.
+
+Сводки LeadDailyStat архивация не трогает (core/leadstats.py).
+"""
+import datetime
+import gzip
+import json
+import os
+import re
+import time
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .leads import phone_digits
+from .models import Lead
+
+FIELDS = [f.attname for f in Lead._meta.concrete_fields]
+_FILE_RE = re.compile(r"^leads-(\d{4})-(\d{2})\.jsonl\.gz$")
+_GZIP_MAGIC = b"\x1f\x8b\x08"
+
+
+def archive_dir() -> Path:
+    return Path(settings.LEAD_ARCHIVE_DIR)
+
+
+def month_path(year: int, month: int) -> Path:
+    return archive_dir() / f"leads-{year:04d}-{month:02d}.jsonl.gz"
+
+
+def months() -> list:
+    """[(год, месяц)] архивных файлов по возрастанию."""
+    if not archive_dir().is_dir():
+        return []
+    found = (_FILE_RE.match(name) for name in os.listdir(archive_dir()))
+    return sorted((int(m[1]), int(m[2])) for m in found if m)
+
+
+def retention_cutoff(retention_months: int, today=None) -> datetime.datetime:
+    """Начало (по местному времени) месяца retention_months назад — архивируем только целые месяцы."""
+    today = today or timezone.localdate()
+    index = today.year * 12 + today.month - 1 - retention_months
+    return timezone.make_aware(datetime.datetime(index // 12, index % 12 + 1, 1))
+
+
+def _members(data: bytes):
+    """(начало, конец, содержимое) целых gzip-членов; битый кусок пропускается до следующего заголовка."""
+    view = memoryview(data)
+    pos = 0
+    while pos < len(data):
+        decoder = zlib.decompressobj(wbits=31)  # gzip-заголовок и CRC
+        try:
+            payload = decoder.decompress(view[pos:])
+        except zlib.error:
+            payload = None
+        if payload is not None and decoder.eof:
+            end = len(data) - len(decoder.unused_data)
+            yield pos, end, payload
+            pos = end
+            continue
+        pos = data.find(_GZIP_MAGIC, pos + 1)
+        if pos < 0:
+            return
+
+
+def _cut_torn_tail(path: Path):
+    """Обрезает хвост после последнего целого члена — остаток оборванной записи."""
+    if not path.exists():
+        return
+    data = path.read_bytes()
+    good = max((end for _, end, _ in _members(data)), default=0)
+    if good < len(data):
+        with open(path, "r+b") as fh:
+            fh.truncate(good)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+
+def _append(path: Path, rows):
+    payload = "".join(json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder) + "\n" for row in rows)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as fh:
+        fh.write(gzip.compress(payload.encode("utf-8")))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def archive(before: datetime.datetime, chunk_size: int = 500, pause: float = 0.0, dry_run: bool = False) -> dict:
+    """Переносит заявки с created_at < before в архив и удаляет их пачками; возвращает счётчики."""
+    stats = {"archived": 0, "chunks": 0, "months": set()}
+    old = Lead.objects.filter(created_at__lt=before).order_by("created_at", "id")
+    if dry_run:
+        for created_at in old.values_list("created_at", flat=True).iterator(chunk_size=2000):
+            local = timezone.localtime(created_at)
+            stats["months"].add((local.year, local.month))
+            stats["archived"] += 1
+        return stats
+
+    checked = set()
+    while rows := list(old.values(*FIELDS)[:chunk_size]):
+        by_month = {}
+        for row in rows:
+            local = timezone.localtime(row["created_at"])
+            by_month.setdefault((local.year, local.month), []).append(row)
+        for (year, month), month_rows in by_month.items():
+            path = month_path(year, month)
+            if path not in checked:
+                _cut_torn_tail(path)
+                checked.add(path)
+            _append(path, month_rows)
+            stats["months"].add((year, month))
+        # только после fsync архива; у Lead нет каскадов и delete-сигналов — один DELETE … WHERE id IN
+        with transaction.atomic():
+            Lead.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        stats["archived"] += len(rows)
+        stats["chunks"] += 1
+        if pause:
+            time.sleep(pause)  # окно для писателей сайта между транзакциями
+    return stats
+
+
+def _read(path: Path):
+    # оборванный/битый член пропускается: его строки не удалялись из базы (fsync до DELETE)
+    for _, _, payload in _members(path.read_bytes()):
+        for line in payload.decode("utf-8").splitlines():
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_leads(date_from=None, date_to=None, phone=None, **filters):
+    """
+    Архивные заявки (dict, created_at/updated_at — datetime) по возрастанию месяца,
+    только чтение. date_from/date_to — местные даты включительно; phone — по цифрам
+    номера; остальные фильтры — точное совпадение полей (status="done", service_id=3).
+    """
+    digits = phone_digits(phone) if phone else None
+    seen = set()
+    for year, month in months():
+        if date_from and (year, month) < (date_from.year, date_from.month):
+            continue
+        if date_to and (year, month) > (date_to.year, date_to.month):
+            continue
+        for row in _read(month_path(year, month)):
+            if row["id"] in seen:
+                continue
+            seen.add(row["id"])
+            row["created_at"] = parse_datetime(row["created_at"])
+            row["updated_at"] = parse_datetime(row["updated_at"])
+            day = timezone.localdate(row["created_at"])
+            if (date_from and day < date_from) or (date_to and day > date_to):
+                continue
+            if digits and phone_digits(row["phone"]) != digits:
+                continue
+            if any(row.get(name) != value for name, value in filters.items()):
+                continue
+            yield row
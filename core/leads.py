@@ -0,0 +1,84 @@
+# core/leads.py
+"""
+Идемпотентный приём заявок.
+
+Повтор (двойной клик, ретрай сети, повторная отправка формы) отсекается
+до записи в БД и до уведомлений:
+  1) cache.add() по токену формы и по телефону в окне LEAD_DEDUP_WINDOW —
+     атомарно и без обращения к БД;
+  2) страховка для нескольких воркеров с локальным кэшем — индексный
+     exists() по (phone, created_at) / idempotency_key;
+  3) последний рубеж — unique на Lead.idempotency_key.
+Если запись упала (база занята, таймаут очереди), ключи снимаются
+(release) — повтор пользователя должен дойти до БД.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Lead
+
+LEAD_DEDUP_WINDOW = getattr(settings, "LEAD_DEDUP_WINDOW", 5 * 60)  # секунды
+
+
+def phone_digits(phone: str) -> str:
+    return re.sub(r"\D", "", phone or "")
+
+
+def _claim_keys(phone: str, token: str) -> list[str]:
+    keys = []
+    if token:
+        keys.append(f"lead:idem:{token}")
+    digits = phone_digits(phone)
+    if digits:
+        keys.append(f"lead:phone:{digits}")
+    return keys
+
+
+def _recent_duplicates(phone: str, token: str):
+    since = timezone.now() - timedelta(seconds=LEAD_DEDUP_WINDOW)
+    q = Q(phone=phone, created_at__gte=since)
+    if token:
+        q |= Q(idempotency_key=token)
+    return Lead.objects.filter(q)
+
+
+def is_duplicate(phone: str, token: str = "") -> bool:
+    """True — заявку уже приняли; иначе занимает ключи под эту отправку."""
+    for key in _claim_keys(phone, token):
+        if not cache.add(key, 1, LEAD_DEDUP_WINDOW):
+            return True
+    return _recent_duplicates(phone, token).exists()
+
+
+async def ais_duplicate(phone: str, token: str = "") -> bool:
+    for key in _claim_keys(phone, token):
+        if not await cache.aadd(key, 1, LEAD_DEDUP_WINDOW):
+            return True
+    return await _recent_duplicates(phone, token).aexists()
+
+
+def release(phone: str, token: str = "") -> None:
+    """Снять ключи is_duplicate, если заявку записать не удалось — иначе повтор ответят «принято» и она потеряется."""
+    cache.delete_many(_claim_keys(phone, token))
+
+
+async def arelease(phone: str, token: str = "") -> None:
+    await cache.adelete_many(_claim_keys(phone, token))
+
+
+def lead_payload(lead) -> dict:
+    """Данные для notify_lead / anotify_lead."""
+    return {
+        "name": lead.name,
+        "phone_e164": lead.phone,
+        "service": getattr(lead.service, "title", ""),
+        "comment": lead.message,
+        "utm_source": lead.utm_source,
+        "utm_medium": lead.utm_medium,
+        "utm_campaign": lead.utm_campaign,
+    }
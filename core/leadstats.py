@@ -0,0 +1,145 @@
+# core/leadstats.py
+"""
+Суточные сводки заявок (LeadDailyStat): день × услуга × язык × UTM.
+
+Счётчики ведутся инкрементально — новая заявка и смена статуса
+(core/signals.py, массовые действия админки через apply_status) дают
+UPDATE … SET n = n + 1 по ключу строки. Команда rollup_leads
+пересчитывает дни из сырых заявок, если счётчики разошлись
+(заявки, вставленные в обход сигналов, правки created_at).
+Удаление заявок сводки не трогает: история остаётся после архивации.
+
+«Новые» не храним: new = leads - in_work - done.
+"""
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Lead, LeadDailyStat, Service
+
+KEY_FIELDS = ("service_pk", "lang", "utm_source", "utm_medium", "utm_campaign")
+STATUS_COUNTERS = {Lead.Status.INWORK: "in_work", Lead.Status.DONE: "done"}
+GROUPINGS = ("day", "service", "lang", "utm_source", "utm_medium", "utm_campaign")
+
+
+def _key(day, service_id, lang, utm_source, utm_medium, utm_campaign) -> tuple:
+    return day, service_id or 0, lang or "", utm_source or "", utm_medium or "", utm_campaign or ""
+
+
+def lead_key(lead) -> tuple:
+    return _key(
+        timezone.localdate(lead.created_at), lead.service_id, lead.lang,
+        lead.utm_source, lead.utm_medium, lead.utm_campaign,
+    )
+
+
+def _bump(key, deltas):
+    deltas = {field: n for field, n in deltas.items() if n}
+    if not deltas:
+        return
+    lookup = dict(zip(("day",) + KEY_FIELDS, key))
+    updates = {field: F(field) + n for field, n in deltas.items()}
+    if LeadDailyStat.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            LeadDailyStat.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # строку дня успел создать параллельный запрос
+        LeadDailyStat.objects.filter(**lookup).update(**updates)
+
+
+def record_created(lead):
+    deltas = Counter(leads=1)
+    if lead.status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[lead.status]] += 1
+    _bump(lead_key(lead), deltas)
+
+
+def record_status_change(lead, old_status):
+    if old_status == lead.status:
+        return
+    deltas = Counter()
+    if old_status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[old_status]] -= 1
+    if lead.status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[lead.status]] += 1
+    _bump(lead_key(lead), deltas)
+
+
+@transaction.atomic
+def apply_status(queryset, status) -> int:
+    """queryset.update(status=…) с поправкой сводок: по одному UPDATE на затронутый ключ."""
+    changed = queryset.exclude(status=status)
+    deltas = defaultdict(Counter)
+    for row in changed.values_list(
+        "created_at", "service_id", "lang", "utm_source", "utm_medium", "utm_campaign", "status",
+    ).iterator(chunk_size=2000):
+        counter = deltas[_key(timezone.localdate(row[0]), *row[1:6])]
+        if row[6] in STATUS_COUNTERS:
+            counter[STATUS_COUNTERS[row[6]]] -= 1
+        if status in STATUS_COUNTERS:
+            counter[STATUS_COUNTERS[status]] += 1
+    updated = changed.update(status=status)
+    for key, counter in deltas.items():
+        _bump(key, counter)
+    return updated
+
+
+@transaction.atomic
+def rebuild(since=None, until=None) -> int:
+    """Пересчитывает сводки за дни [since, until] из Lead (None — без границы); возвращает число строк."""
+    tz = timezone.get_current_timezone()
+    leads = Lead.objects.annotate(day=TruncDate("created_at", tzinfo=tz))
+    stats = LeadDailyStat.objects.all()
+    if since:
+        leads, stats = leads.filter(day__gte=since), stats.filter(day__gte=since)
+    if until:
+        leads, stats = leads.filter(day__lte=until), stats.filter(day__lte=until)
+    rows = (
+        leads.order_by()
+        .values("day", "service_id", "lang", "utm_source", "utm_medium", "utm_campaign")
+        .annotate(
+            leads=Count("id"),
+            in_work=Count("id", filter=Q(status=Lead.Status.INWORK)),
+            done=Count("id", filter=Q(status=Lead.Status.DONE)),
+        )
+    )
+    objs = [
+        LeadDailyStat(
+            **dict(zip(("day",) + KEY_FIELDS, _key(
+                r["day"], r["service_id"], r["lang"], r["utm_source"], r["utm_medium"], r["utm_campaign"],
+            ))),
+            leads=r["leads"], in_work=r["in_work"], done=r["done"],
+        )
+        for r in rows.iterator(chunk_size=2000)
+    ]
+    stats.delete()
+    LeadDailyStat.objects.bulk_create(objs, batch_size=500)
+    return len(objs)
+
+
+def report(date_from: datetime.date, date_to: datetime.date, group: str = "day") -> dict:
+    """Строки отчёта за период, сгруппированные по group, и итог — только из LeadDailyStat."""
+    field = "service_pk" if group == "service" else group
+    qs = LeadDailyStat.objects.filter(day__gte=date_from, day__lte=date_to)
+    sums = {"leads": Sum("leads"), "in_work": Sum("in_work"), "done": Sum("done")}
+    rows = list(qs.values(field).annotate(**sums).order_by("-day" if group == "day" else "-leads"))
+    total = {counter: sum(row[counter] or 0 for row in rows) for counter in sums}
+
+    names = {}
+    if group == "service":
+        names = {pk: str(s) for pk, s in Service.objects.in_bulk([r["service_pk"] for r in rows if r["service_pk"]]).items()}
+    for row in [*rows, total]:
+        for counter in sums:
+            row[counter] = row[counter] or 0
+        row["new"] = row["leads"] - row["in_work"] - row["done"]
+        row["conversion"] = round(100 * row["done"] / row["leads"], 1) if row["leads"] else 0.0
+    for row in rows:
+        value = row[field]
+        row["label"] = names.get(value, "—") if group == "service" else (value or "—")
+    return {"rows": rows, "total": total}
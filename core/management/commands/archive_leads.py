@@ -0,0 +1,51 @@
+# core/management/commands/archive_leads.py
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+from django.utils import timezone
+
+from core import lead_archive
+from core.models import Lead
+from core.sqlite_profile import maintain
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит заявки старше --months месяцев (LEAD_RETENTION_MONTHS) в gzip JSONL по месяцам "
+        "(LEAD_ARCHIVE_DIR) и удаляет их из базы короткими транзакциями по --chunk-size. "
+        "Для cron; сводки LeadDailyStat остаются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=settings.LEAD_RETENTION_MONTHS)
+        parser.add_argument("--before", type=datetime.date.fromisoformat, help="вместо --months: всё раньше даты YYYY-MM-DD")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--pause", type=float, default=0.05, help="секунд между пачками — окно для записи сайта")
+        parser.add_argument("--dry-run", action="store_true", help="только посчитать")
+
+    def handle(self, *args, **opts):
+        if opts["before"]:
+            before = timezone.make_aware(datetime.datetime.combine(opts["before"], datetime.time.min))
+        else:
+            if opts["months"] < 1:
+                raise CommandError("--months должно быть не меньше 1")
+            before = lead_archive.retention_cutoff(opts["months"])
+
+        stats = lead_archive.archive(before, opts["chunk_size"], opts["pause"], opts["dry_run"])
+        months = ", ".join(f"{y}-{m:02d}" for y, m in sorted(stats["months"])) or "—"
+        if opts["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"[dry-run] к архивации до {before:%Y-%m-%d}: {stats['archived']} заявок ({months})"
+            ))
+            return
+
+        connection = connections[router.db_for_write(Lead)]
+        if stats["archived"] and connection.vendor == "sqlite":
+            # удалённые страницы сидят в -wal до чекпойнта
+            maintain(connection, "TRUNCATE")
+        self.stdout.write(self.style.SUCCESS(
+            f"В архив до {before:%Y-%m-%d}: {stats['archived']} заявок, пачек {stats['chunks']} ({months}) "
+            f"→ {lead_archive.archive_dir()}"
+        ))
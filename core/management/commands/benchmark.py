@@ -0,0 +1,256 @@
+# core/management/commands/benchmark.py
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.urls import LocalePrefixPattern, URLPattern, URLResolver, get_resolver, reverse
+from django.utils import translation
+
+from core import benchdata, sitemaps
+from core.models import Product, Service
+
+# view, которые меряются отдельно (POST) или не являются страницами сайта
+# (service_cases — HTMX-фрагмент, первая страница входит в service_detail)
+SKIP_NAMES = {"lead_create", "lead_create_async", "set_language", "service_cases", "media_file"}
+STAFF_NAMES = {"db_write_stats", "perf_stats", "lead_stats"}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _named_patterns(patterns, i18n=False):
+    """(url_name, под i18n_patterns ли) для всех именованных маршрутов, без include-ов."""
+    for p in patterns:
+        if isinstance(p, URLResolver):
+            # админку и django.conf.urls.i18n не меряем
+            if p.app_name == "admin" or p.urlconf_name == "django.conf.urls.i18n":
+                continue
+            yield from _named_patterns(p.url_patterns, i18n or isinstance(p.pattern, LocalePrefixPattern))
+        elif isinstance(p, URLPattern) and p.name:
+            yield p.name, i18n
+
+
+class Command(BaseCommand):
+    help = (
+        "Воспроизводимый бенчмарк: временная БД с синтетикой (core/benchdata.py), "
+        "перцентили задержки и число SQL по всем URL из urls.py на ru/ky/en "
+        "и конкурентный lead_create. Результат — JSON для сравнения между коммитами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-o", "--output", default="benchmark.json")
+        parser.add_argument("-n", "--iterations", type=int, default=30, help="запросов на URL")
+        parser.add_argument("--lead-threads", type=int, default=8)
+        parser.add_argument("--lead-requests", type=int, default=25, help="заявок на поток")
+        parser.add_argument("--products", type=int, default=benchdata.DEFAULT_SIZES["products"])
+        parser.add_argument("--reviews", type=int, default=benchdata.DEFAULT_SIZES["reviews"])
+        parser.add_argument("--services", type=int, default=benchdata.DEFAULT_SIZES["services"])
+        parser.add_argument("--branches", type=int, default=benchdata.DEFAULT_SIZES["branches"])
+        parser.add_argument("--compare", help="прошлый JSON: показать изменение p50/запросов")
+
+    def handle(self, *args, **opts):
+        sizes = {k: opts[k] for k in ("products", "reviews", "services", "branches")}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # файловая БД (а не shared-cache :memory:) — конкурентная запись как в проде;
+            # MEDIA_ROOT временный — миниатюры кейсов не засоряют media/
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(tmp, "bench.sqlite3")
+            old_media, settings.MEDIA_ROOT = settings.MEDIA_ROOT, tmp
+            old_ratelimit, settings.RATELIMIT_ENABLED = getattr(settings, "RATELIMIT_ENABLED", True), False
+            setup_test_environment()
+            db_config = setup_databases(verbosity=0, interactive=False, aliases={"default"}, serialize=False)
+            try:
+                t0 = time.perf_counter()
+                sizes = benchdata.seed(sizes)
+                seed_s = time.perf_counter() - t0
+                self.stdout.write(f"Наполнение: {seed_s:.1f} c {sizes}")
+                urls = self._bench_urls(opts["iterations"])
+                leads = self._bench_leads(opts["lead_threads"], opts["lead_requests"])
+            finally:
+                teardown_databases(db_config, verbosity=0)
+                teardown_test_environment()
+                settings.MEDIA_ROOT, settings.RATELIMIT_ENABLED = old_media, old_ratelimit
+
+        result = {
+            "meta": {
+                "commit": self._git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "iterations": opts["iterations"],
+                "sizes": sizes,
+                "seed_seconds": round(seed_s, 2),
+            },
+            "urls": urls,
+            "lead_create": leads,
+        }
+        with open(opts["output"], "w", encoding="utf-8") as fh:
+            json.dump(result, fh, ensure_ascii=False, indent=2)
+        self._print(result)
+        if opts["compare"]:
+            self._compare(opts["compare"], result)
+        self.stdout.write(self.style.SUCCESS(f"Записано в {opts['output']}"))
+
+    # ---------- URL ----------
+
+    def _sample_kwargs(self, name, lang):
+        """Варианты kwargs для маршрута; [] — нечем подставить."""
+        if name == "service_detail":
+            svc = Service.objects.filter(is_published=True).order_by("order").first()
+            slug = (getattr(svc, f"slug_{lang}", None) or svc.slug) if svc else None
+            return [{"slug": slug}] if slug else []
+        if name == "product_detail":
+            product = Product.objects.filter(is_published=True).order_by("pk").first()
+            return [{"slug": product.slug}] if product else []
+        if name == "sitemap_section":
+            return [{"section": s} for s in sitemaps.SITEMAPS]
+        return [{}]
+
+    def _targets(self):
+        targets = []
+        for name, i18n in _named_patterns(get_resolver().url_patterns):
+            if name in SKIP_NAMES:
+                continue
+            for lang in ([code for code, _ in settings.LANGUAGES] if i18n else [settings.LANGUAGE_CODE]):
+                with translation.override(lang):
+                    for kwargs in self._sample_kwargs(name, lang):
+                        try:
+                            targets.append((name, lang, reverse(name, kwargs=kwargs)))
+                        except Exception as exc:
+                            self.stderr.write(f"пропуск {name} {kwargs}: {exc}")
+        return targets
+
+    def _staff_client(self):
+        from django.contrib.auth import get_user_model
+
+        user = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+        client = Client(HTTP_USER_AGENT="benchmark")
+        client.force_login(user)
+        return client
+
+    def _bench_urls(self, iterations):
+        anon, staff = Client(HTTP_USER_AGENT="benchmark"), self._staff_client()
+        results = []
+        for name, lang, url in self._targets():
+            client = staff if name in STAFF_NAMES else anon
+            client.get(url)  # прогрев: кэши JSON-LD/sitemap, миниатюры
+            latencies, queries, status = [], [], None
+            for _ in range(iterations):
+                with CaptureQueriesContext(connections["default"]) as ctx:
+                    t0 = time.perf_counter()
+                    response = client.get(url)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                    latencies.append(time.perf_counter() - t0)
+                queries.append(len(ctx.captured_queries))
+                status = response.status_code
+            results.append({
+                "name": name,
+                "lang": lang,
+                "url": url,
+                "status": status,
+                "queries": max(queries),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            })
+        return results
+
+    # ---------- заявки ----------
+
+    def _bench_leads(self, threads, per_thread):
+        url = reverse("lead_create")
+        latencies, statuses = [], {}
+        lock = threading.Lock()
+
+        def worker(t):
+            client = Client(HTTP_USER_AGENT="benchmark")
+            local = []
+            for i in range(per_thread):
+                data = {"name": f"Bench {t}", "phone": f"+996{t:03d}{i:06d}", "lang": "ru", "message": "bench"}
+                t0 = time.perf_counter()
+                response = client.post(url, data)
+                local.append((time.perf_counter() - t0, response.status_code))
+            connections.close_all()
+            with lock:
+                for latency, status in local:
+                    latencies.append(latency)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+        started = time.perf_counter()
+        for th in pool:
+            th.start()
+        for th in pool:
+            th.join()
+        elapsed = time.perf_counter() - started
+        total = threads * per_thread
+        return {
+            "threads": threads,
+            "requests": total,
+            "statuses": {str(k): v for k, v in sorted(statuses.items())},
+            "rps": round(total / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+
+    # ---------- вывод ----------
+
+    @staticmethod
+    def _git_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=5,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def _print(self, result):
+        self.stdout.write(f"{'url':<40} {'st':>3} {'q':>4} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for r in result["urls"]:
+            self.stdout.write(
+                f"{r['url'][:40]:<40} {r['status']:>3} {r['queries']:>4} "
+                f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}"
+            )
+        lc = result["lead_create"]
+        self.stdout.write(
+            f"lead_create x{lc['threads']}: {lc['rps']} rps, p50 {lc['p50_ms']} ms, "
+            f"p95 {lc['p95_ms']} ms, статусы {lc['statuses']}"
+        )
+
+    def _compare(self, path, result):
+        with open(path, encoding="utf-8") as fh:
+            old = json.load(fh)
+        before = {(r["url"]): r for r in old.get("urls", [])}
+        self.stdout.write(f"\nСравнение с {path} ({old.get('meta', {}).get('commit')}):")
+        for r in result["urls"]:
+            prev = before.get(r["url"])
+            if not prev:
+                continue
+            dp = (r["p50_ms"] - prev["p50_ms"]) / prev["p50_ms"] * 100 if prev["p50_ms"] else 0
+            dq = r["queries"] - prev["queries"]
+            flag = "  <-- " if dq > 0 or dp > 20 else ""
+            self.stdout.write(f"{r['url'][:40]:<40} p50 {dp:+6.1f}%  запросов {dq:+d}{flag}")
@@ -0,0 +1,116 @@
+# core/management/commands/copy_database.py
+from django.apps import apps
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит все данные между алиасами БД (SQLite → Postgres, primary → локальная реплика) "
+        "пачками по первичному ключу, с сохранением id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", required=True, help="алиас-источник (например legacy)")
+        parser.add_argument("--target", required=True, help="алиас-приёмник (например default)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--no-migrate", action="store_true", help="не запускать migrate на приёмнике")
+        parser.add_argument(
+            "--flush", action="store_true",
+            help="очистить приёмник перед копированием (иначе он должен быть пустым)",
+        )
+
+    def handle(self, *args, **opts):
+        source, target = opts["source"], opts["target"]
+        for alias in (source, target):
+            if alias not in connections.settings:
+                raise CommandError(f"Нет алиаса БД {alias!r} в DATABASES")
+        if source == target:
+            raise CommandError("source и target совпадают")
+
+        if not opts["no_migrate"]:
+            call_command("migrate", database=target, verbosity=0)
+        if opts["flush"]:
+            # без post_migrate: contenttypes/permissions приедут из источника с теми же id
+            call_command("flush", database=target, interactive=False, inhibit_post_migrate=True, verbosity=0)
+
+        models = self._models()
+        if not opts["flush"]:
+            generated = (ContentType, Permission)  # их создаёт migrate — заменим копией из источника
+            busy = [
+                m._meta.label for m in models
+                if m not in generated and m._base_manager.using(target).exists()
+            ]
+            if busy:
+                raise CommandError(f"Приёмник не пуст ({', '.join(busy[:5])}) — запустите с --flush")
+            ContentType._base_manager.using(target).all().delete()  # каскадом уходят и Permission
+
+        total = 0
+        for model in models:
+            copied = self._copy_model(model, source, target, opts["chunk_size"])
+            total += copied
+            self.stdout.write(f"{model._meta.label}: {copied}")
+
+        self._reset_sequences(target, models)
+        self.stdout.write(self.style.SUCCESS(f"Готово: {total} строк, {len(models)} таблиц"))
+
+    @staticmethod
+    def _models():
+        """
+        Модели так, чтобы цель каждого ForeignKey копировалась раньше ссылающейся
+        (serializers.sort_dependencies смотрит только на natural keys), затем
+        авто-созданные M2M-таблицы.
+        """
+        models = [m for m in apps.get_models() if m._meta.managed and not m._meta.proxy]
+        targets = {
+            m: {
+                f.related_model._meta.concrete_model
+                for f in m._meta.concrete_fields
+                if f.many_to_one or f.one_to_one
+            } & set(models) - {m}  # ссылка на себя — внутри пачки, проверка FK отложена до коммита
+            for m in models
+        }
+        ordered, done = [], set()
+        while len(ordered) < len(models):
+            ready = [m for m in models if m not in done and targets[m] <= done]
+            if not ready:
+                # цикл FK между таблицами: остаток в исходном порядке
+                ready = [m for m in models if m not in done]
+            ordered.extend(ready)
+            done.update(ready)
+        through = [
+            f.remote_field.through
+            for m in ordered
+            for f in m._meta.local_many_to_many
+            if f.remote_field.through._meta.auto_created
+        ]
+        return ordered + through
+
+    @staticmethod
+    def _copy_model(model, source, target, chunk_size) -> int:
+        # keyset по pk: без OFFSET, каждая пачка — один индексный проход
+        qs = model._base_manager.using(source).order_by("pk")
+        copied, last_pk = 0, None
+        while True:
+            chunk = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            rows = list(chunk[:chunk_size])
+            if not rows:
+                return copied
+            with transaction.atomic(using=target):
+                model._base_manager.using(target).bulk_create(rows, batch_size=chunk_size)
+            copied += len(rows)
+            last_pk = rows[-1].pk
+
+    @staticmethod
+    def _reset_sequences(target, models):
+        # Postgres: после вставки с явными id сдвинуть sequence, иначе следующий INSERT упадёт
+        connection = connections[target]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cur:
+                for sql in statements:
+                    cur.execute(sql)
@@ -0,0 +1,81 @@
+# core/management/commands/export_catalog.py
+import csv
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Product
+
+from .import_catalog import COLUMNS
+
+
+def _row(product):
+    return {
+        "slug": product.slug,
+        "title": product.title,
+        "brand": product.brand.title if product.brand else "",
+        "category": product.category.title if product.category else "",
+        "price": "" if product.price is None else product.price,
+        "unit": product.unit,
+        "in_stock": int(product.in_stock),
+        "is_published": int(product.is_published),
+        "short_desc": product.short_desc,
+        "full_desc": product.full_desc,
+        "cover": os.path.basename(product.cover.name) if product.cover else "",
+        "gallery": ";".join(os.path.basename(i.image.name) for i in product.images.all()),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгрузка каталога в CSV/XLSX в формате import_catalog — потоком, пачками по --chunk-size "
+        "(бренды/категории через JOIN, галереи одним запросом на пачку)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-o", "--output", help="файл .csv/.xlsx; по умолчанию CSV в stdout")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--delimiter", default=",")
+
+    def handle(self, *args, **opts):
+        products = (
+            Product.objects.select_related("brand", "category")
+            .prefetch_related("images")
+            .order_by("pk")
+            .iterator(chunk_size=opts["chunk_size"])
+        )
+        output = opts["output"]
+        if output and output.lower().endswith(".xlsx"):
+            count = self._xlsx(output, products)
+        else:
+            fh = open(output, "w", encoding="utf-8-sig", newline="") if output else sys.stdout
+            try:
+                writer = csv.DictWriter(fh, COLUMNS, delimiter=opts["delimiter"])
+                writer.writeheader()
+                count = 0
+                for product in products:
+                    writer.writerow(_row(product))
+                    count += 1
+            finally:
+                if output:
+                    fh.close()
+        if output:
+            self.stdout.write(self.style.SUCCESS(f"Выгружено товаров: {count} → {output}"))
+
+    @staticmethod
+    def _xlsx(path, products):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise CommandError("Для .xlsx нужен openpyxl (pip install openpyxl)")
+        wb = Workbook(write_only=True)  # строки сразу уходят во временный файл
+        ws = wb.create_sheet("products")
+        ws.append(COLUMNS)
+        count = 0
+        for product in products:
+            row = _row(product)
+            ws.append([row[c] for c in COLUMNS])
+            count += 1
+        wb.save(path)
+        return count
@@ -0,0 +1,249 @@
+# core/management/commands/import_catalog.py
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Brand, Product, ProductCategory, ProductImage
+from core.slugs import SlugAllocator, make_slug
+
+# колонки прайса (их же пишет export_catalog); gallery — имена файлов через ";"
+COLUMNS = [
+    "slug", "title", "brand", "category", "price", "unit", "in_stock", "is_published",
+    "short_desc", "full_desc", "cover", "gallery",
+]
+UPDATE_FIELDS = [
+    "title", "brand", "category", "price", "unit", "in_stock", "is_published", "short_desc", "full_desc",
+]
+_TRUE = {"1", "true", "yes", "y", "да", "+"}
+
+
+def _rows_csv(path, delimiter):
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        yield from csv.DictReader(fh, delimiter=delimiter)
+
+
+def _rows_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CommandError("Для .xlsx нужен openpyxl (pip install openpyxl)")
+    wb = load_workbook(path, read_only=True, data_only=True)  # read_only — построчно, без всей книги в памяти
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(c or "").strip() for c in next(rows, ())]
+        for values in rows:
+            yield {k: ("" if v is None else str(v)) for k, v in zip(header, values)}
+    finally:
+        wb.close()
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _bool(value, default):
+    value = (value or "").strip().lower()
+    return default if not value else value in _TRUE
+
+
+def _slug(value, max_length):
+    """slug из файла: валидный — как есть, иначе транслит ("Масло 5W30" → "maslo-5w30"); "" — не задан."""
+    if not value:
+        return ""
+    try:
+        validate_slug(value)
+    except ValidationError:
+        return make_slug(value, max_length, fallback="")
+    return value if len(value) <= max_length else make_slug(value, max_length, fallback="")
+
+
+def _price(value):
+    value = (value or "").replace(" ", "").replace(",", ".")
+    try:
+        return max(int(float(value)), 0) if value else None
+    except ValueError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Импорт прайса товаров из CSV/XLSX потоком: бренды и категории upsert пачками, "
+        "slug подбираются в памяти, существующие товары (по slug или названию+бренду) обновляются, "
+        "обложки и галереи копируются из --images в пуле потоков."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file")
+        parser.add_argument("--images", help="папка с файлами из колонок cover/gallery")
+        parser.add_argument("--workers", type=int, default=8, help="потоков для копирования картинок")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--delimiter", default=",", help="разделитель CSV (для Excel-выгрузок часто ;)")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        path = opts["file"]
+        if not os.path.isfile(path):
+            raise CommandError(f"Нет файла {path}")
+        if opts["images"] and not os.path.isdir(opts["images"]):
+            raise CommandError(f"Нет папки {opts['images']}")
+        ext = os.path.splitext(path)[1].lower()
+        rows = _rows_xlsx(path) if ext in (".xlsx", ".xlsm") else _rows_csv(path, opts["delimiter"])
+
+        self.images_dir = opts["images"]
+        self.brands = {b.title.casefold(): b for b in Brand.objects.all()}
+        self.categories = {c.title.casefold(): c for c in ProductCategory.objects.all()}
+        self.brand_slugs = SlugAllocator(Brand, fallback="brand")
+        self.category_slugs = SlugAllocator(ProductCategory, fallback="category")
+        self.product_slugs = SlugAllocator(Product, fallback="product")
+        # существующие товары: slug и (название, бренд) → slug — без загрузки моделей
+        self.existing, self.by_title = set(), {}
+        for slug, title, brand_id in Product.objects.values_list("slug", "title", "brand_id").iterator(chunk_size=2000):
+            self.existing.add(slug)
+            self.by_title[(title.casefold(), brand_id)] = slug
+        self.slug_max_length = Product._meta.get_field("slug").max_length
+        self.cover_to = Product._meta.get_field("cover").upload_to
+        self.gallery_to = ProductImage._meta.get_field("image").upload_to
+
+        stats = {"rows": 0, "created": 0, "updated": 0, "skipped": 0, "images": 0, "missing_images": 0}
+        if opts["dry_run"]:
+            self.images_dir = None  # файлы в MEDIA откатить нельзя
+        # пачка — своя транзакция (запись не держит блокировку SQLite весь импорт);
+        # dry-run — всё в одной внешней и откат в конце
+        with transaction.atomic() if opts["dry_run"] else nullcontext():
+            with ThreadPoolExecutor(max_workers=opts["workers"]) as pool:
+                self.pool = pool
+                for chunk in _chunks(rows, opts["chunk_size"]):
+                    with transaction.atomic():
+                        self._import_chunk(chunk, stats)
+                    self.stdout.write(f"  … {stats['rows']} строк")
+            if opts["dry_run"]:
+                transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS(
+            ("[dry-run, откатено] " if opts["dry_run"] else "")
+            + "строк {rows}: новых {created}, обновлено {updated}, пропущено {skipped}; "
+              "картинок {images}, не найдено {missing_images}".format(**stats)
+        ))
+
+    # ---------- справочники ----------
+
+    def _upsert_lookup(self, titles, cache, model, slugs):
+        missing = {t.casefold(): t for t in titles if t and t.casefold() not in cache}
+        if missing:
+            created = model.objects.bulk_create(
+                [model(title=title, slug=slugs.allocate(title)) for title in missing.values()]
+            )
+            for obj in created:
+                cache[obj.title.casefold()] = obj
+
+    # ---------- товары ----------
+
+    def _import_chunk(self, chunk, stats):
+        chunk = [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in chunk]
+        self._upsert_lookup({r.get("brand", "") for r in chunk}, self.brands, Brand, self.brand_slugs)
+        self._upsert_lookup({r.get("category", "") for r in chunk}, self.categories, ProductCategory, self.category_slugs)
+
+        now = timezone.now()
+        products, images, seen = [], [], set()
+        for row in chunk:
+            stats["rows"] += 1
+            title = row.get("title")
+            if not title:
+                stats["skipped"] += 1
+                continue
+            brand = self.brands.get(row.get("brand", "").casefold())
+            category = self.categories.get(row.get("category", "").casefold())
+            title_key = (title.casefold(), brand.pk if brand else None)
+            wanted = _slug(row.get("slug"), self.slug_max_length)
+            slug = wanted if wanted and wanted in self.existing else self.by_title.get(title_key)
+            if slug in seen:
+                stats["skipped"] += 1  # повтор в одной пачке
+                continue
+            if slug:
+                stats["updated"] += 1
+            else:
+                if wanted and wanted not in self.product_slugs.taken:
+                    slug = wanted
+                    self.product_slugs.reserve(slug)
+                else:
+                    slug = self.product_slugs.allocate(title)
+                self.existing.add(slug)
+                self.by_title[title_key] = slug
+                stats["created"] += 1
+            seen.add(slug)
+            product = Product(
+                slug=slug, title=title, brand=brand, category=category,
+                price=_price(row.get("price")), unit=row.get("unit", "")[:40],
+                in_stock=_bool(row.get("in_stock"), True), is_published=_bool(row.get("is_published"), True),
+                short_desc=row.get("short_desc", ""), full_desc=row.get("full_desc", ""), updated_at=now,
+            )
+            products.append(product)
+            if self.images_dir and (row.get("cover") or row.get("gallery")):
+                images.append((product, row.get("cover", ""), [g.strip() for g in row.get("gallery", "").split(";") if g.strip()]))
+
+        stored = self._copy_images(images, stats) if images else {}
+        # обложку обновляем только там, где она пришла — иначе затрём загруженную в админке
+        with_cover = [p for p in products if p.cover]
+        without_cover = [p for p in products if not p.cover]
+        for group, fields in ((with_cover, UPDATE_FIELDS + ["cover"]), (without_cover, UPDATE_FIELDS)):
+            if group:
+                # INSERT … ON CONFLICT (slug) DO UPDATE: и новые, и существующие одним запросом на пачку;
+                # pk возвращаются RETURNING — нужны для галерей
+                Product.objects.bulk_create(
+                    group, update_conflicts=True, unique_fields=["slug"], update_fields=fields + ["updated_at"],
+                )
+        if images:
+            self._replace_galleries(images, stored)
+
+    # ---------- картинки ----------
+
+    def _store(self, upload_to, filename):
+        """Копирует файл в MEDIA; повторный импорт того же файла не плодит копий."""
+        src = os.path.join(self.images_dir, filename)
+        if not os.path.isfile(src):
+            return None
+        name = upload_to + os.path.basename(filename)
+        if default_storage.exists(name) and default_storage.size(name) == os.path.getsize(src):
+            return name
+        with open(src, "rb") as fh:
+            return default_storage.save(name, File(fh))
+
+    def _copy_images(self, items, stats):
+        """Все файлы пачки — параллельно; проставляет product.cover, возвращает {(upload_to, файл): имя}."""
+        jobs = {}
+        for _product, cover, gallery in items:
+            for to, filename in ([(self.cover_to, cover)] if cover else []) + [(self.gallery_to, g) for g in gallery]:
+                if (to, filename) not in jobs:
+                    jobs[(to, filename)] = self.pool.submit(self._store, to, filename)
+        stored = {key: future.result() for key, future in jobs.items()}
+        stats["images"] += sum(1 for name in stored.values() if name)
+        stats["missing_images"] += sum(1 for name in stored.values() if not name)
+        for product, cover, _gallery in items:
+            if cover and stored.get((self.cover_to, cover)):
+                product.cover = stored[(self.cover_to, cover)]
+        return stored
+
+    def _replace_galleries(self, items, stored):
+        rows, replace = [], []
+        for product, _cover, gallery in items:
+            names = [stored[(self.gallery_to, g)] for g in gallery if stored.get((self.gallery_to, g))]
+            if names:
+                replace.append(product.pk)
+                rows += [
+                    ProductImage(product_id=product.pk, image=name, alt=product.title[:200], sort=i)
+                    for i, name in enumerate(names)
+                ]
+        if replace:
+            ProductImage.objects.filter(product_id__in=replace).delete()
+            ProductImage.objects.bulk_create(rows)
@@ -0,0 +1,47 @@
+# core/management/commands/perfstats.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import perf
+
+
+class Command(BaseCommand):
+    help = (
+        "Гистограммы замеров по view (core/perf.py): count, mean, p50/p95/p99 (верхняя граница корзины). "
+        "Видит данные воркеров только при общем кэше (Redis/Memcached)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--view", help="только view с этим именем (подстрока)")
+        parser.add_argument("--metric", default="total_ms", choices=list(perf.METRICS), help="метрика для сортировки")
+        parser.add_argument("--json", action="store_true", help="вывести полный отчёт JSON")
+        parser.add_argument("--reset", action="store_true", help="обнулить гистограммы")
+
+    def handle(self, *args, **opts):
+        if opts["reset"]:
+            perf.reset()
+            self.stdout.write(self.style.SUCCESS("Гистограммы обнулены"))
+            return
+
+        report = perf.report()
+        if opts["view"]:
+            report = {k: v for k, v in report.items() if opts["view"] in k}
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+            return
+        if not report:
+            self.stdout.write("Нет данных")
+            return
+
+        metric = opts["metric"]
+        rows = sorted(report.items(), key=lambda kv: kv[1].get(metric, {}).get("mean", 0), reverse=True)
+        self.stdout.write(f"{'view':<32} {'n':>6}  " + "  ".join(f"{m:>22}" for m in perf.METRICS))
+        for view, stats in rows:
+            n = stats.get("total_ms", {}).get("count", 0)
+            cells = []
+            for m in perf.METRICS:
+                s = stats.get(m)
+                cells.append(f"{s['mean']:>7} /{str(s['p95']):>6} /{str(s['p99']):>6}" if s else f"{'—':>22}")
+            self.stdout.write(f"{view[:32]:<32} {n:>6}  " + "  ".join(cells))
+        self.stdout.write("ячейка: mean / p95 / p99")
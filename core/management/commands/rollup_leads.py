@@ -0,0 +1,38 @@
+# core/management/commands/rollup_leads.py
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import lead_archive, leadstats
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает суточные сводки заявок (LeadDailyStat) из таблицы Lead за последние --days дней "
+        "(или --since/--until). Для cron: чинит расхождения инкрементальных счётчиков. "
+        "Месяцы, уже перенесённые в архив (archive_leads), пропускаются — иначе их сводки обнулились бы."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="сколько последних дней, включая сегодня")
+        parser.add_argument("--since", type=datetime.date.fromisoformat, help="с даты YYYY-MM-DD")
+        parser.add_argument("--until", type=datetime.date.fromisoformat, help="по дату YYYY-MM-DD включительно")
+        parser.add_argument("--all", action="store_true", help="все дни (первичное заполнение)")
+
+    def handle(self, *args, **opts):
+        if opts["all"]:
+            since = until = None
+        else:
+            until = opts["until"]
+            since = opts["since"] or timezone.localdate() - datetime.timedelta(days=max(opts["days"], 1) - 1)
+        archived = lead_archive.months()
+        if archived:
+            year, month = archived[-1]
+            floor = datetime.date(year + month // 12, month % 12 + 1, 1)
+            since = max(since, floor) if since else floor
+        if since and until and until < since:
+            raise CommandError(f"--until раньше {since} (начала периода или конца архива)")
+        rows = leadstats.rebuild(since, until)
+        period = f"{since or 'начало'} … {until or 'сегодня'}"
+        self.stdout.write(self.style.SUCCESS(f"Сводки пересчитаны ({period}): строк {rows}"))
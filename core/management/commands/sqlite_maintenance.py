@@ -0,0 +1,35 @@
+# core/management/commands/sqlite_maintenance.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.sqlite_profile import maintain
+
+
+class Command(BaseCommand):
+    help = "Обслуживание SQLite: PRAGMA optimize, wal_checkpoint, по желанию ANALYZE/VACUUM (для cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--checkpoint", default="TRUNCATE", choices=["PASSIVE", "FULL", "RESTART", "TRUNCATE"],
+            help="режим wal_checkpoint (TRUNCATE обнуляет -wal файл)",
+        )
+        parser.add_argument("--analyze", action="store_true", help="полный ANALYZE вместо выборочного optimize")
+        parser.add_argument("--vacuum", action="store_true", help="VACUUM (блокирует запись на время работы)")
+
+    def handle(self, *args, **opts):
+        connection = connections[opts["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError(f"{opts['database']}: не SQLite ({connection.vendor})")
+
+        with connection.cursor() as cur:
+            if opts["analyze"]:
+                cur.execute("ANALYZE")
+            if opts["vacuum"]:
+                cur.execute("VACUUM")
+        result = maintain(connection, opts["checkpoint"])
+        self.stdout.write(self.style.SUCCESS(
+            "optimize ok; checkpoint {checkpoint}: busy={busy} log={log_frames} checkpointed={checkpointed}".format(
+                checkpoint=opts["checkpoint"], **result,
+            )
+        ))
@@ -0,0 +1,24 @@
+# core/management/commands/warm_templates.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Компилирует все шаблоны из templates/ (с --all — и из приложений). "
+        "Проверка перед выкладкой: код выхода 1, если есть синтаксические ошибки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="и шаблоны приложений (админка и т.п.)")
+
+    def handle(self, *args, **opts):
+        result = warm_templates(include_apps=opts["all"])
+        for name, error in result["errors"].items():
+            self.stderr.write(f"{name}: {error}")
+        if result["errors"]:
+            raise CommandError(f"Ошибок в шаблонах: {len(result['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Скомпилировано шаблонов: {result['compiled']} за {result['seconds']} c"
+        ))
@@ -0,0 +1,34 @@
+# core/management/commands/warmup.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогрев (core/warmup.py) с временем по шагам: переводы, резолверы URL, modeltranslation, "
+        "соединение с БД, кэши SiteSettings/филиалов/рейтинга, шаблоны. "
+        "Кэш процесса (LocMem) прогревается только у этой команды — в воркерах это делает WARMUP=1."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--step", action="append", choices=[name for name, _ in warmup.STEPS],
+            help="только эти шаги (можно несколько раз)",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        report = warmup.run(opts["step"])
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            for row in report:
+                status = row.get("detail") or self.style.ERROR(row.get("error", ""))
+                self.stdout.write(f"{row['step']:<18} {row['ms']:>8} ms  {status}")
+            self.stdout.write(f"{'итого':<18} {round(sum(r['ms'] for r in report), 1):>8} ms")
+        failed = [r["step"] for r in report if "error" in r]
+        if failed:
+            raise CommandError(f"Шаги с ошибками: {', '.join(failed)}")
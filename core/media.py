@@ -0,0 +1,151 @@
+# core/media.py
+"""
+Отдача загруженных файлов (MEDIA_ROOT) — замена django.views.static.serve.
+
+- Cache-Control: миниатюры sorl (THUMBNAIL_PREFIX, по умолчанию cache/)
+  адресуются хэшем исходника и опций — год и immutable; остальное —
+  MEDIA_MAX_AGE. ETag/Last-Modified по stat(), If-None-Match → 304.
+- Range: один диапазон bytes=a-b / a- / -n → 206, вне файла → 416.
+- Zero-copy: FileResponse отдаёт объект файла, и gunicorn через
+  wsgi.file_wrapper шлёт его os.sendfile() (с учётом seek и Content-Length,
+  поэтому и для Range). За nginx/Apache можно вовсе не читать файл в Python:
+  MEDIA_SENDFILE="x-accel-redirect" | "x-sendfile".
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _RangeFile:
+    """Файл, с которого читается не больше length байт начиная с start.
+
+    fileno() отдаём настоящий: gunicorn берёт смещение из позиции файла
+    и ограничивает sendfile заголовком Content-Length.
+    """
+
+    def __init__(self, fh, start, length):
+        fh.seek(start)
+        self._fh = fh
+        self._left = length
+
+    def read(self, size=-1):
+        if self._left <= 0:
+            return b""
+        size = self._left if size is None or size < 0 else min(size, self._left)
+        data = self._fh.read(size)
+        self._left -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def close(self):
+        self._fh.close()
+
+
+def _parse_range(header, size):
+    """(start, end) включительно; None — заголовка нет или он не про один диапазон; ValueError — 416."""
+    match = _RANGE_RE.match(header or "")
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # последние n байт
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError
+    return start, end
+
+
+def _cache_control(path):
+    prefix = getattr(settings, "THUMBNAIL_PREFIX", "cache/")
+    if path.startswith(prefix):
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_MAX_AGE}"
+
+
+def _with_headers(response, headers):
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def serve(request, path):
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:  # выход за MEDIA_ROOT
+        raise Http404
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": _cache_control(path),
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("If-None-Match")
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since") or "")
+    if (if_none_match and etag in if_none_match) or (
+        not if_none_match and if_modified_since and int(stat.st_mtime) <= if_modified_since
+    ):
+        return _with_headers(HttpResponseNotModified(), headers)
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    sendfile = settings.MEDIA_SENDFILE
+    if sendfile:
+        # диапазоны, 304 и sendfile — на стороне веб-сервера
+        response = _with_headers(HttpResponse(content_type=content_type), headers)
+        if sendfile == "x-accel-redirect":
+            response["X-Accel-Redirect"] = settings.MEDIA_SENDFILE_PREFIX.rstrip("/") + "/" + path
+        else:
+            response["X-Sendfile"] = fullpath
+        return response
+
+    try:
+        byte_range = _parse_range(request.headers.get("Range"), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+    # If-Range с устаревшим ETag — отдаём файл целиком
+    if_range = request.headers.get("If-Range")
+    if byte_range and if_range and if_range != etag and if_range != headers["Last-Modified"]:
+        byte_range = None
+
+    fh = open(fullpath, "rb")
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(_RangeFile(fh, start, end - start + 1), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(fh, content_type=content_type)
+    _with_headers(response, headers)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
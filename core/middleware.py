@@ -0,0 +1,218 @@
+# core/middleware.py
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import db_routers, perf, ratelimit
+from .leads import phone_digits
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, умеющий работать в async-цепочке.
+
+    Штатный WhiteNoiseMiddleware только sync: под ASGI из-за него Django
+    переводит всю цепочку в sync-режим и гоняет каждый запрос (и async-view)
+    через поток sync_to_async. Здесь поиск файла — словарь в памяти,
+    а в поток уходит только отдача самой статики.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # в DEBUG ищем по диску — это I/O
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """
+    Отсекает спам на POST /lead/ и /reviews/new/ до валидации формы и любых
+    запросов к БД: скользящее окно по IP и телефону (core/ratelimit.py)
+    и дешёвый фильтр ботов (пустой User-Agent, заполненный honeypot).
+    Ставить после LocaleMiddleware — иначе не разрезолвить /ky/... и /en/...
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _limits(self, request):
+        """None — не наш запрос; HttpResponse — бот; иначе [(ключ, лимит, окно)]."""
+        if request.method != "POST":
+            return None
+        try:
+            url_name = resolve(request.path_info, getattr(request, "urlconf", None)).url_name
+        except Resolver404:
+            return None
+        rules = ratelimit.get_rules().get(url_name)
+        if not rules:
+            return None
+
+        if not request.META.get("HTTP_USER_AGENT") or request.POST.get("website"):
+            return HttpResponse("Bad request", status=400, content_type="text/plain")
+
+        values = {"ip": ratelimit.client_ip(request), "phone": phone_digits(request.POST.get("phone"))}
+        return [
+            (f"{url_name}:{dim}:{values[dim]}", limit, window)
+            for dim, (limit, window) in rules.items()
+            if values.get(dim)
+        ]
+
+    @staticmethod
+    def _too_many(window):
+        response = HttpResponse(
+            "Слишком много запросов, попробуйте позже.", status=429, content_type="text/plain; charset=utf-8"
+        )
+        response["Retry-After"] = str(window)
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        limits = self._limits(request)
+        if isinstance(limits, HttpResponse):
+            return limits
+        limiter = ratelimit.get_limiter()
+        for key, limit, window in limits or ():
+            if not limiter.hit(key, limit, window):
+                return self._too_many(window)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        limits = self._limits(request)
+        if isinstance(limits, HttpResponse):
+            return limits
+        limiter = ratelimit.get_limiter()
+        for key, limit, window in limits or ():
+            if not await limiter.ahit(key, limit, window):
+                return self._too_many(window)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Включает чтение с реплики (core/db_routers.py) для GET/HEAD публичных
+    страниц из db_routers.REPLICA_VIEWS. Ставить после LocaleMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _use_replica(request) -> bool:
+        if request.method not in ("GET", "HEAD") or not db_routers.replica_configured():
+            return False
+        try:
+            url_name = resolve(request.path_info, getattr(request, "urlconf", None)).url_name
+        except Resolver404:
+            return False
+        return url_name in db_routers.REPLICA_VIEWS
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._use_replica(request):
+            return self.get_response(request)
+        with db_routers.replica_reads():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not self._use_replica(request):
+            return await self.get_response(request)
+        with db_routers.replica_reads():
+            return await self.get_response(request)
+
+
+class PerfMiddleware:
+    """
+    Замеры запроса (core/perf.py): SQL, шаблоны, контекст-процессоры, кэш,
+    миниатюры. Пишет гистограммы по view и заголовок Server-Timing —
+    его видят staff и DEBUG (PERF_SERVER_TIMING="all" — все).
+    Ставить сразу после WhiteNoise: статика не меряется, остальное — целиком.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _user_needed():
+        """Нужно ли смотреть request.user, чтобы решить про Server-Timing."""
+        return getattr(settings, "PERF_SERVER_TIMING", "staff") == "staff" and not settings.DEBUG
+
+    @staticmethod
+    def _show_timing(user):
+        mode = getattr(settings, "PERF_SERVER_TIMING", "staff")
+        return mode == "all" or (mode == "staff" and (settings.DEBUG or (user is not None and user.is_staff)))
+
+    @staticmethod
+    def _finish(request, response, timings, show_timing):
+        timings.finish()
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else f"unresolved:{response.status_code}"
+        if response.status_code == 304:
+            view += ":304"
+        if show_timing:
+            response["Server-Timing"] = timings.server_timing()
+        return view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = perf.start()
+        try:
+            response = self.get_response(request)
+            # пользователь (сессия + auth_user) грузится до finish — его SQL входит в замер
+            user = getattr(request, "user", None) if self._user_needed() else None
+            view = self._finish(request, response, timings, self._show_timing(user))
+        finally:
+            perf.stop(token)
+        if perf.record(view, timings):
+            perf.flush()
+        return response
+
+    async def __acall__(self, request):
+        timings, token = perf.start()
+        try:
+            response = await self.get_response(request)
+            # request.user в async-цепочке трогать нельзя (SynchronousOnlyOperation) — только auser()
+            user = await request.auser() if self._user_needed() and hasattr(request, "auser") else None
+            view = self._finish(request, response, timings, self._show_timing(user))
+        finally:
+            perf.stop(token)
+        if perf.record(view, timings):
+            # сброс в кэш — синхронный клиент кэша, раз в PERF_FLUSH_INTERVAL
+            await sync_to_async(perf.flush, thread_sensitive=False)()
+        return response
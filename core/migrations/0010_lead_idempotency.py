@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_catalog_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['phone', 'created_at'], name='core_lead_phone_e8c6a4_idx'),
+        ),
+    ]
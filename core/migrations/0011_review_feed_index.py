@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_lead_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['is_published', '-created_at', '-id'], name='review_feed_idx'),
+        ),
+    ]
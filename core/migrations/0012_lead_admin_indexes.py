@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_review_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['-created_at', '-id'], name='lead_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='lead_status_created_idx'),
+        ),
+    ]
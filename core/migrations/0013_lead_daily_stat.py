@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_lead_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('service_pk', models.PositiveIntegerField(default=0)),
+                ('lang', models.CharField(blank=True, max_length=8)),
+                ('utm_source', models.CharField(blank=True, max_length=64)),
+                ('utm_medium', models.CharField(blank=True, max_length=64)),
+                ('utm_campaign', models.CharField(blank=True, max_length=64)),
+                ('leads', models.IntegerField(default=0)),
+                ('in_work', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Статистика заявок за день',
+                'verbose_name_plural': 'Статистика заявок по дням',
+                'constraints': [models.UniqueConstraint(fields=('day', 'service_pk', 'lang', 'utm_source', 'utm_medium', 'utm_campaign'), name='lead_daily_stat_key')],
+            },
+        ),
+    ]
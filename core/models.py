@@ -5,10 +5,11 @@ from django.db import models
 from django.urls import reverse
 from model_utils.models import TimeStampedModel
 from django.utils.translation import gettext_lazy as _
-from django.utils.text import slugify
 from sorl.thumbnail import ImageField
 from django import forms
 
+from .slugs import fill_slugs
+
 class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -48,6 +49,10 @@ class Service(TimeStampedModel):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        fill_slugs(self)  # пустые slug_<lang> — из title_<lang>
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         """
         Возвращает URL с локализованным slug (если заполнены slug_ky / slug_en).
@@ -76,6 +81,10 @@ class Case(TimeStampedModel):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        fill_slugs(self)
+        super().save(*args, **kwargs)
+
 class FAQ(TimeStampedModel):
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="faqs", null=True, blank=True)
     question = models.CharField(max_length=255)
@@ -115,6 +124,10 @@ class Review(TimeStampedModel):
         ordering = ["-created_at"]
         verbose_name = _("Отзыв")
         verbose_name_plural = _("Отзывы")
+        indexes = [
+            # лента отзывов: keyset по (created_at, id) среди опубликованных (core/reviews.py)
+            models.Index(fields=["is_published", "-created_at", "-id"], name="review_feed_idx"),
+        ]
 
     def __str__(self):
         return f"{self.author} ({self.rating}/5)"
@@ -141,14 +154,53 @@ class Lead(TimeStampedModel):
 
     consent = models.BooleanField(_("Согласие с политикой"), default=True)
 
+    # токен формы: повторная отправка той же формы не создаёт вторую заявку
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["phone", "created_at"]),
+            # список в админке: сортировка и date_hierarchy, фильтр по статусу
+            models.Index(fields=["-created_at", "-id"], name="lead_created_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="lead_status_created_idx"),
+        ]
         verbose_name = _("Заявка")
         verbose_name_plural = _("Заявки")
 
     def __str__(self):
         return f"{self.name} / {self.phone}"
 
+class LeadDailyStat(models.Model):
+    """
+    Суточные счётчики заявок по (услуга, язык, UTM) — для отчётов без скана Lead.
+    Ведутся инкрементально (core/leadstats.py), пересчитываются командой rollup_leads.
+    """
+    day = models.DateField()
+    # не FK: в ключе уникальности не должно быть NULL; 0 — «без услуги»
+    service_pk = models.PositiveIntegerField(default=0)
+    lang = models.CharField(max_length=8, blank=True)
+    utm_source = models.CharField(max_length=64, blank=True)
+    utm_medium = models.CharField(max_length=64, blank=True)
+    utm_campaign = models.CharField(max_length=64, blank=True)
+
+    leads = models.IntegerField(default=0)
+    in_work = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "service_pk", "lang", "utm_source", "utm_medium", "utm_campaign"],
+                name="lead_daily_stat_key",
+            ),
+        ]
+        verbose_name = _("Статистика заявок за день")
+        verbose_name_plural = _("Статистика заявок по дням")
+
+    def __str__(self):
+        return f"{self.day}: {self.leads}"
+
 class SiteSettings(TimeStampedModel):
     # Бренд и описание
     brand = models.CharField(_("Бренд"), max_length=120, default="Avto_Him_Zavod")
@@ -204,6 +256,7 @@ class Brand(models.Model):
     title = models.CharField(_("Бренд"), max_length=120, unique=True)
     slug = models.SlugField(max_length=140, unique=True, blank=True)
     logo = ImageField(_("Логотип"), upload_to="brands/", blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = _("Бренд")
@@ -214,13 +267,13 @@ class Brand(models.Model):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
+        fill_slugs(self, fallback="brand")
         super().save(*args, **kwargs)
 
 class ProductCategory(models.Model):
     title = models.CharField(_("Категория"), max_length=120, unique=True)
     slug = models.SlugField(max_length=140, unique=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = _("Категория товара")
@@ -231,8 +284,7 @@ class ProductCategory(models.Model):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
+        fill_slugs(self, fallback="category")
         super().save(*args, **kwargs)
 
 class Product(models.Model):
@@ -251,6 +303,7 @@ class Product(models.Model):
     in_stock = models.BooleanField(_("В наличии"), default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = _("Товар")
@@ -261,14 +314,7 @@ class Product(models.Model):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base = slugify(self.title)
-            slug = base
-            i = 2
-            while Product.objects.filter(slug=slug).exists():
-                slug = f"{base}-{i}"
-                i += 1
-            self.slug = slug
+        fill_slugs(self, fallback="product")
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -279,6 +325,7 @@ class ProductImage(models.Model):
     image = ImageField(_("Фото"), upload_to="products/gallery/")
     alt = models.CharField(_("ALT"), max_length=200, blank=True)
     sort = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["sort", "id"]
@@ -308,6 +355,7 @@ class Branch(models.Model):
 
     is_active = models.BooleanField("Показывать на сайте", default=True)
     sort = models.PositiveIntegerField("Порядок", default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("sort", "name")
@@ -0,0 +1,326 @@
+# core/perf.py
+"""
+Замеры на уровне запроса: куда уходит время.
+
+PerfMiddleware (core/middleware.py) кладёт в contextvar RequestTimings,
+а хуки ниже дописывают в него:
+  * SQL — execute_wrapper, который вешается на каждое соединение при
+    connection_created (число запросов и время);
+  * шаблоны — бэкенд TimedDjangoTemplates (время render() верхнего шаблона,
+    включая include и контекст-процессоры);
+  * контекст-процессоры — там же, каждый обёрнут отдельно;
+  * кэш — InstrumentedLocMemCache (hit/miss по get/get_many);
+  * миниатюры sorl — TimedThumbnailBackend (время и число сгенерированных).
+
+Итог уходит в заголовок Server-Timing и в гистограммы по view: сначала
+в память процесса, раз в PERF_FLUSH_INTERVAL — инкрементами в кэш.
+Читать — manage.py perfstats или /internal/perf/ (staff). С LocMemCache
+каждый процесс видит только свои цифры; общая картина — с Redis/Memcached.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template as DjangoTemplate
+from sorl.thumbnail.base import ThumbnailBackend
+
+PERF_FLUSH_INTERVAL = getattr(settings, "PERF_FLUSH_INTERVAL", 10)
+PERF_KEY_TIMEOUT = 60 * 60 * 24 * 7
+
+# верхние границы корзин гистограмм; последняя — «всё, что больше»
+MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, float("inf"))
+METRICS = {
+    "total_ms": MS_BUCKETS,
+    "db_ms": MS_BUCKETS,
+    "queries": COUNT_BUCKETS,
+    "template_ms": MS_BUCKETS,
+    "context_ms": MS_BUCKETS,
+    "thumbnail_ms": MS_BUCKETS,
+}
+
+_current = ContextVar("perf_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = (
+        "started", "queries", "db", "template", "context",
+        "thumbnails", "thumbnail", "cache_hits", "cache_misses", "total",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = self.template = self.context = self.thumbnail = self.total = 0.0
+        self.thumbnails = 0
+        self.cache_hits = self.cache_misses = 0
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def values(self) -> dict:
+        return {
+            "total_ms": self.total * 1000,
+            "db_ms": self.db * 1000,
+            "queries": self.queries,
+            "template_ms": self.template * 1000,
+            "context_ms": self.context * 1000,
+            "thumbnail_ms": self.thumbnail * 1000,
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join((
+            f"total;dur={self.total * 1000:.1f}",
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f"tpl;dur={self.template * 1000:.1f}",
+            f"ctx;dur={self.context * 1000:.1f}",
+            f'thumb;dur={self.thumbnail * 1000:.1f};desc="{self.thumbnails} generated"',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+        ))
+
+
+def start() -> tuple:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+# ---------- хуки ----------
+
+def _query_timer(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - t0
+        timings.queries += 1
+
+
+@receiver(connection_created)
+def _install_query_timer(sender, connection, **kwargs):
+    # execute_wrappers живёт на обёртке соединения и переживает переподключение
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_timer)
+
+
+class _TimedTemplate(DjangoTemplate):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        t0 = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template += time.perf_counter() - t0
+
+
+def _timed_processor(processor):
+    def wrapper(request):
+        timings = _current.get()
+        if timings is None:
+            return processor(request)
+        t0 = time.perf_counter()
+        try:
+            return processor(request)
+        finally:
+            timings.context += time.perf_counter() - t0
+
+    wrapper.__name__ = getattr(processor, "__name__", "processor")
+    wrapper.__wrapped__ = processor
+    return wrapper
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates с замером render() и контекст-процессоров."""
+
+    def __init__(self, params):
+        super().__init__(params)
+        engine = self.engine
+        # cached_property: подменяем готовый кортеж обёрнутыми процессорами
+        engine.__dict__["template_context_processors"] = tuple(
+            _timed_processor(p) for p in engine.template_context_processors
+        )
+
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return _TimedTemplate(template.template, self)
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache со счётчиком hit/miss для текущего запроса."""
+
+    _MISS = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._MISS, version)
+        timings = _current.get()
+        if value is self._MISS:
+            if timings is not None:
+                timings.cache_misses += 1
+            return default
+        if timings is not None:
+            timings.cache_hits += 1
+        return value
+    # get_many у LocMemCache — цикл по get(), считается здесь же
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """sorl: время get_thumbnail (вкл. kvstore) и число реально сгенерированных миниатюр."""
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        timings = _current.get()
+        if timings is None:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        t0 = time.perf_counter()
+        try:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        finally:
+            timings.thumbnail += time.perf_counter() - t0
+
+    def _create_thumbnail(self, source_image, geometry_string, options, thumbnail):
+        timings = _current.get()
+        if timings is not None:
+            timings.thumbnails += 1
+        return super()._create_thumbnail(source_image, geometry_string, options, thumbnail)
+
+
+# ---------- гистограммы ----------
+
+def _bucket(value, bounds) -> int:
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            return i
+    return len(bounds) - 1
+
+
+class _Histograms:
+    """Буфер процесса: {(view, metric, bucket): n} + суммы; сбрасывается в кэш инкрементами."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._sums = {}
+        self._views = set()
+        self._flushed = time.monotonic()
+
+    def record(self, view: str, values: dict) -> bool:
+        """True — пора сбросить буфер в кэш (flush)."""
+        with self._lock:
+            self._views.add(view)
+            for metric, value in values.items():
+                key = (view, metric, _bucket(value, METRICS[metric]))
+                self._counts[key] = self._counts.get(key, 0) + 1
+                # суммы — в микросекундах/штуках, incr работает с целыми
+                skey = (view, metric)
+                self._sums[skey] = self._sums.get(skey, 0) + int(value * 1000)
+            return time.monotonic() - self._flushed >= PERF_FLUSH_INTERVAL
+
+    def flush(self):
+        with self._lock:
+            counts, sums, views = self._counts, self._sums, self._views
+            self._counts, self._sums, self._views = {}, {}, set()
+            self._flushed = time.monotonic()
+        if not counts:
+            return
+        known = cache.get("perf:views") or set()
+        if not views <= known:
+            cache.set("perf:views", known | views, PERF_KEY_TIMEOUT)
+        for (view, metric, bucket), n in counts.items():
+            _incr(f"perf:{view}:{metric}:{bucket}", n)
+        for (view, metric), total in sums.items():
+            _incr(f"perf:{view}:{metric}:sum", total)
+
+
+def _incr(key, delta):
+    if cache.add(key, delta, PERF_KEY_TIMEOUT):
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, PERF_KEY_TIMEOUT)
+
+
+histograms = _Histograms()
+
+
+def record(view: str, timings: RequestTimings) -> bool:
+    return histograms.record(view, timings.values())
+
+
+def flush():
+    histograms.flush()
+
+
+def _quantile(counts, bounds, q):
+    total = sum(counts)
+    if not total:
+        return 0
+    rank = q * total
+    seen = 0
+    for n, bound in zip(counts, bounds):
+        seen += n
+        if seen >= rank:
+            return bound if bound != float("inf") else f">{bounds[-2]}"
+    return bounds[-1]
+
+
+def report() -> dict:
+    """{view: {metric: {count, mean, p50, p95, p99, buckets}}} — верхние границы корзин."""
+    histograms.flush()
+    views = sorted(cache.get("perf:views") or ())
+    result = {}
+    for view in views:
+        keys = [
+            f"perf:{view}:{metric}:{suffix}"
+            for metric, bounds in METRICS.items()
+            for suffix in [*range(len(bounds)), "sum"]
+        ]
+        raw = cache.get_many(keys)
+        stats = {}
+        for metric, bounds in METRICS.items():
+            counts = [raw.get(f"perf:{view}:{metric}:{i}", 0) for i in range(len(bounds))]
+            n = sum(counts)
+            if not n:
+                continue
+            stats[metric] = {
+                "count": n,
+                "mean": round(raw.get(f"perf:{view}:{metric}:sum", 0) / 1000 / n, 2),
+                "p50": _quantile(counts, bounds, 0.50),
+                "p95": _quantile(counts, bounds, 0.95),
+                "p99": _quantile(counts, bounds, 0.99),
+                "buckets": {("inf" if b == float("inf") else b): c for b, c in zip(bounds, counts) if c},
+            }
+        if stats:
+            result[view] = stats
+    return result
+
+
+def reset():
+    histograms.flush()
+    views = cache.get("perf:views") or ()
+    cache.delete_many([
+        f"perf:{view}:{metric}:{suffix}"
+        for view in views
+        for metric, bounds in METRICS.items()
+        for suffix in [*range(len(bounds)), "sum"]
+    ])
+    cache.delete("perf:views")
@@ -0,0 +1,131 @@
+# core/ratelimit.py
+"""
+Скользящее окно для POST-форм (заявки, отзывы).
+
+Два бэкенда:
+  * MemoryRateLimiter — точный «журнал» меток времени в памяти процесса;
+    годится для одного воркера / dev.
+  * CacheRateLimiter — sliding window counter поверх Django-кэша (два
+    соседних фиксированных окна с весом); общий для всех воркеров, если
+    кэш общий (Redis/Memcached).
+"""
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# url_name -> {измерение: (лимит, окно в секундах)}
+DEFAULT_RULES = {
+    "lead_create": {"ip": (5, 60), "phone": (3, 600)},
+    "lead_create_async": {"ip": (5, 60), "phone": (3, 600)},
+    "review_create": {"ip": (3, 600)},
+}
+
+
+class BaseRateLimiter:
+    def hit(self, key: str, limit: int, window: int) -> bool:
+        """Учитывает попытку; False — лимит превышен."""
+        raise NotImplementedError
+
+    async def ahit(self, key: str, limit: int, window: int) -> bool:
+        return await sync_to_async(self.hit, thread_sensitive=False)(key, limit, window)
+
+
+class MemoryRateLimiter(BaseRateLimiter):
+    # раз в столько попыток выкидываем ключи, по которым давно не было запросов
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._hits: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._max_window = 0
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            self._counter += 1
+            self._max_window = max(self._max_window, window)
+            if self._counter % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+            log = self._hits.setdefault(key, deque())
+            while log and log[0] <= now - window:
+                log.popleft()
+            if len(log) >= limit:
+                return False
+            log.append(now)
+            return True
+
+    async def ahit(self, key, limit, window):
+        # только память и lock без ожидания I/O — поток не нужен
+        return self.hit(key, limit, window)
+
+    def _sweep(self, now):
+        horizon = now - self._max_window
+        stale = [k for k, log in self._hits.items() if not log or log[-1] <= horizon]
+        for k in stale:
+            del self._hits[k]
+
+
+class CacheRateLimiter(BaseRateLimiter):
+    def hit(self, key, limit, window):
+        now = time.time()
+        bucket = int(now // window)
+        cur_key = f"rl:{key}:{window}:{bucket}"
+        prev_key = f"rl:{key}:{window}:{bucket - 1}"
+
+        cache.add(cur_key, 0, window * 2)
+        try:
+            current = cache.incr(cur_key)
+        except ValueError:
+            # ключ вытеснили между add и incr
+            cache.set(cur_key, 1, window * 2)
+            current = 1
+        previous = cache.get(prev_key, 0)
+        # доля предыдущего окна, ещё попадающая в скользящее окно
+        weight = 1 - (now % window) / window
+        return previous * weight + current <= limit
+
+
+_limiter = None
+
+
+def get_limiter() -> BaseRateLimiter:
+    global _limiter
+    if _limiter is None:
+        backend = getattr(settings, "RATELIMIT_BACKEND", "cache")
+        _limiter = MemoryRateLimiter() if backend == "memory" else CacheRateLimiter()
+    return _limiter
+
+
+@receiver(setting_changed)
+def _reset_limiter(setting, **kwargs):
+    # override_settings(RATELIMIT_BACKEND=...) в тестах — новый бэкенд с чистым состоянием
+    global _limiter
+    if setting == "RATELIMIT_BACKEND":
+        _limiter = None
+
+
+def get_rules() -> dict:
+    if not getattr(settings, "RATELIMIT_ENABLED", True):
+        return {}
+    return getattr(settings, "RATELIMIT_RULES", DEFAULT_RULES)
+
+
+def client_ip(request) -> str:
+    """
+    REMOTE_ADDR, а за прокси — адрес, дописанный в X-Forwarded-For нашим
+    крайним прокси (RATELIMIT_TRUSTED_PROXIES-й с конца). Левый край
+    заголовка присылает клиент — по нему лимит обходился бы подменой.
+    """
+    proxies = getattr(settings, "RATELIMIT_TRUSTED_PROXIES", 1)
+    if getattr(settings, "RATELIMIT_TRUST_X_FORWARDED_FOR", False) and proxies > 0:
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,87 @@
+# core/reviews.py
+"""
+Лента отзывов: keyset-пагинация по (created_at, id) и кэш страниц.
+
+Курсор — "<created_at в мкс>-<id>" последнего показанного отзыва;
+следующая страница — строго «старше» его, так что глубина прокрутки
+не влияет на стоимость запроса (в отличие от OFFSET). Фильтры —
+оценка и источник. HTML каждой страницы кэшируется по (язык, фильтры,
+курсор, версия "reviews") — версия это отпечаток таблицы отзывов
+(core/versioning.py), её меняет любая запись: админка, форма, import_reviews
+из другого процесса.
+"""
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
+from django.utils.translation import get_language
+
+from .models import Review
+from .versioning import get_version
+
+REVIEWS_PER_PAGE = 10
+REVIEWS_CACHE_TIMEOUT = 60 * 60 * 24
+RATINGS = (5, 4, 3, 2, 1)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def encode_cursor(review) -> str:
+    return f"{(review.created_at - _EPOCH) // _MICROSECOND}-{review.pk}"
+
+
+def decode_cursor(value):
+    """(created_at, id) или None, если курсор пустой/битый."""
+    try:
+        ts, pk = value.split("-")
+        return _EPOCH + datetime.timedelta(microseconds=int(ts)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def parse_filters(params) -> dict:
+    """Только допустимые значения; остальное молча отбрасываем."""
+    filters = {}
+    rating = params.get("rating", "")
+    if rating.isdigit() and int(rating) in RATINGS:
+        filters["rating"] = int(rating)
+    if params.get("source") in Review.Source.values:
+        filters["source"] = params["source"]
+    return filters
+
+
+def filter_query(filters, **extra) -> str:
+    return urlencode({**filters, **{k: v for k, v in extra.items() if v}})
+
+
+def fetch_page(filters, cursor=None):
+    """(отзывы, курсор следующей страницы или None)."""
+    qs = Review.objects.filter(is_published=True, **filters).order_by("-created_at", "-id")
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    reviews = list(qs[:REVIEWS_PER_PAGE + 1])
+    next_cursor = encode_cursor(reviews[REVIEWS_PER_PAGE - 1]) if len(reviews) > REVIEWS_PER_PAGE else None
+    return reviews[:REVIEWS_PER_PAGE], next_cursor
+
+
+def page_html(filters, cursor=None) -> str:
+    version = get_version("reviews")
+    key = "reviews:{lang}:{rating}:{source}:{cursor}:{version}".format(
+        lang=get_language(), rating=filters.get("rating", ""), source=filters.get("source", ""),
+        cursor=cursor or "", version=version,
+    )
+    html = cache.get(key)
+    if html is None:
+        reviews, next_cursor = fetch_page(filters, cursor)
+        html = render_to_string("reviews/_page.html", {
+            "reviews": reviews,
+            "next_query": filter_query(filters, cursor=next_cursor) if next_cursor else None,
+            "first_page": not cursor,
+        })
+        cache.set(key, html, REVIEWS_CACHE_TIMEOUT)
+    return html
@@ -0,0 +1,60 @@
+# core/signals.py
+"""
+Инвалидация производных кэшей: версии — отпечатки таблиц в БД
+(core/versioning.py), а bump_version при сохранении/удалении лишь
+сбрасывает их снимок в этом процессе, чтобы правка была видна сразу.
+Плюс суточные сводки заявок (core/leadstats.py).
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import leadstats
+from .models import FAQ, Branch, Case, Lead, Review, Service, SiteSettings
+from .versioning import bump_version
+
+
+@receiver([post_save, post_delete], sender=SiteSettings)
+@receiver([post_save, post_delete], sender=Branch)
+def _bump_layout(sender, **kwargs):
+    bump_version("layout")
+
+
+@receiver([post_save, post_delete], sender=Review)
+def _bump_reviews(sender, **kwargs):
+    bump_version("reviews")
+
+
+@receiver([post_save, post_delete], sender=Service)
+def _bump_service(sender, instance, **kwargs):
+    bump_version(f"service:{instance.pk}")
+    # галерея кейсов фильтрует по публикации услуги
+    bump_version(f"cases:{instance.pk}")
+
+
+@receiver([post_save, post_delete], sender=FAQ)
+def _bump_faq(sender, instance, **kwargs):
+    bump_version("faq")
+    if instance.service_id:
+        bump_version(f"service:{instance.service_id}")
+
+
+@receiver([post_save, post_delete], sender=Case)
+def _bump_cases(sender, instance, **kwargs):
+    bump_version(f"cases:{instance.service_id}")
+
+
+@receiver(post_init, sender=Lead)
+def _remember_lead_status(sender, instance, **kwargs):
+    # __dict__: при .only()/.defer() без status не догружаем поле
+    instance._stats_status = instance.__dict__.get("status")
+
+
+@receiver(post_save, sender=Lead)
+def _count_lead(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        leadstats.record_created(instance)
+    elif instance._stats_status is not None:
+        leadstats.record_status_change(instance, instance._stats_status)
+    instance._stats_status = instance.status
@@ -0,0 +1,233 @@
+# core/sitemaps.py
+"""
+Sitemap по секциям: ru/ky/en URL с hreflang-альтернативами из локализованных slug.
+
+XML секции кэшируется под ключом, в который входит «отпечаток» таблиц секции
+(Max(updated_at/created_at) + count), поэтому пересобирается только та секция,
+где что-то реально поменялось. На промахе XML отдаётся потоком и параллельно
+складывается в кэш.
+"""
+import math
+from itertools import islice
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap
+from django.core.cache import cache
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.urls import reverse
+from django.utils import translation
+
+from .freshness import stamp_digest, table_stamps
+from .models import Case, FAQ, Product, Service
+
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+XML_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+XML_TAIL = "</urlset>\n"
+
+
+class I18nSitemap(Sitemap):
+    """
+    Базовая секция: элемент × язык, с альтернативами и x-default.
+    stamp_sources — (модель, поле времени), изменения которых инвалидируют секцию.
+    """
+    i18n = True
+    alternates = True
+    x_default = True
+    stamp_sources = ()
+
+    def stamp(self) -> str:
+        stamps = table_stamps(self.stamp_sources)
+        return stamp_digest(self.__class__.__name__, settings.LANGUAGES, *stamps)
+
+    def num_pages(self, stamp=None) -> int:
+        """
+        Число страниц секции. Штатный paginator строит список (элемент, язык)
+        по всей таблице — здесь COUNT, а результат кэшируется рядом с отпечатком.
+        """
+        key = f"sitemap:pages:{self.__class__.__name__}:{stamp or self.stamp()}"
+        pages = cache.get(key)
+        if pages is None:
+            if self._fixed_languages():
+                items = self.items()
+                count = items.count() if isinstance(items, QuerySet) else len(items)
+                count *= len(self._languages())
+            else:
+                # языки зависят от элемента (услуги без slug_<lang>) — обходим потоком
+                count = sum(1 for _ in self._entries())
+            pages = max(1, math.ceil(count / self.limit))
+            cache.set(key, pages, SITEMAP_CACHE_TIMEOUT)
+        return pages
+
+    def _fixed_languages(self) -> bool:
+        return type(self).get_languages_for_item is Sitemap.get_languages_for_item
+
+    def _entries(self, skip: int = 0):
+        """
+        Пары (элемент, язык) в порядке Sitemap._items(), начиная с номера skip.
+        Строки читаются .iterator() — ни списка на всю таблицу, ни кэша queryset;
+        при общем наборе языков читаются только элементы нужной страницы (срез).
+        """
+        items = self.items()
+        if self._fixed_languages():
+            languages = self._languages()
+            first, skip = divmod(skip, len(languages))
+            items = items[first:]
+        if isinstance(items, QuerySet):
+            items = items.iterator(chunk_size=self.limit)
+        entries = (
+            (obj, lang_code) for obj in items for lang_code in self.get_languages_for_item(obj)
+        )
+        return islice(entries, skip, None)
+
+    def _url_for(self, obj, lang_code, protocol, domain):
+        with translation.override(lang_code):
+            return f"{protocol}://{domain}{self.location(obj)}"
+
+    def iter_urls(self, page, protocol, domain):
+        """Как Sitemap.get_urls(), но генератором — ни страницы, ни секции целиком в памяти."""
+        for obj, lang_code in islice(self._entries((page - 1) * self.limit), self.limit):
+            languages = self.get_languages_for_item(obj)
+            alternates = [
+                (code, self._url_for(obj, code, protocol, domain)) for code in languages
+            ]
+            if self.x_default and settings.LANGUAGE_CODE in languages:
+                alternates.append(
+                    ("x-default", self._url_for(obj, settings.LANGUAGE_CODE, protocol, domain))
+                )
+            yield {
+                "location": self._url_for(obj, lang_code, protocol, domain),
+                "lastmod": self._get("lastmod", (obj, lang_code)),
+                "changefreq": self._get("changefreq", (obj, lang_code)),
+                "priority": self._get("priority", (obj, lang_code)),
+                "alternates": alternates,
+            }
+
+
+class StaticViewSitemap(I18nSitemap):
+    changefreq = "weekly"
+    priority = 0.6
+
+    def items(self):
+        return ["home", "service_list", "product_list", "faq_page", "review_list", "contacts"]
+
+    def location(self, item):
+        return reverse(item)
+
+
+class ServiceSitemap(I18nSitemap):
+    changefreq = "weekly"
+    priority = 0.8
+    # кейсы и FAQ показываются на странице услуги — их правки тоже двигают lastmod
+    stamp_sources = (
+        (Service, "updated_at"),
+        (Case, "updated_at"),
+        (FAQ, "updated_at"),
+    )
+
+    def items(self):
+        last_case = (
+            Case.objects.filter(service=OuterRef("pk"), is_published=True)
+            .order_by("-updated_at").values("updated_at")[:1]
+        )
+        last_faq = (
+            FAQ.objects.filter(service=OuterRef("pk"), is_published=True)
+            .order_by("-updated_at").values("updated_at")[:1]
+        )
+        return (
+            Service.objects.filter(is_published=True)
+            .annotate(case_last=Subquery(last_case), faq_last=Subquery(last_faq))
+            .order_by("order", "pk")
+        )
+
+    def get_languages_for_item(self, item):
+        # язык без своего slug отдал бы 404 — в sitemap его не показываем
+        return [code for code in self._languages() if getattr(item, f"slug_{code}", None)]
+
+    def lastmod(self, item):
+        return max(d for d in (item.updated_at, item.case_last, item.faq_last) if d)
+
+
+class ProductSitemap(I18nSitemap):
+    changefreq = "weekly"
+    priority = 0.5
+    stamp_sources = ((Product, "updated_at"),)
+
+    def items(self):
+        return Product.objects.filter(is_published=True).order_by("pk")
+
+    def lastmod(self, item):
+        return item.updated_at
+
+
+SITEMAPS = {
+    "static": StaticViewSitemap(),
+    "services": ServiceSitemap(),
+    "products": ProductSitemap(),
+}
+
+
+def _url_xml(url: dict) -> str:
+    lines = ["<url>", f"<loc>{escape(url['location'])}</loc>"]
+    if url["lastmod"]:
+        lines.append(f"<lastmod>{url['lastmod'].date().isoformat()}</lastmod>")
+    if url["changefreq"]:
+        lines.append(f"<changefreq>{url['changefreq']}</changefreq>")
+    if url["priority"] is not None:
+        lines.append(f"<priority>{url['priority']}</priority>")
+    for lang_code, href in url["alternates"]:
+        lines.append(
+            f'<xhtml:link rel="alternate" hreflang="{lang_code}" href={quoteattr(href)}/>'
+        )
+    lines.append("</url>\n")
+    return "".join(lines)
+
+
+def section_cache_key(name: str, page: int, protocol: str, domain: str, stamp: str | None = None) -> str:
+    return f"sitemap:{name}:{page}:{protocol}:{domain}:{stamp or SITEMAPS[name].stamp()}"
+
+
+def render_section(name: str, page: int, protocol: str, domain: str):
+    """Генератор кусков XML одной страницы секции."""
+    yield XML_HEAD
+    for url in SITEMAPS[name].iter_urls(page, protocol, domain):
+        yield _url_xml(url)
+    yield XML_TAIL
+
+
+def render_index(protocol: str, domain: str, stamps: dict | None = None) -> str:
+    stamps = stamps or {}
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    ]
+    for name, sitemap in SITEMAPS.items():
+        loc = f"{protocol}://{domain}{reverse('sitemap_section', kwargs={'section': name})}"
+        for page in range(1, sitemap.num_pages(stamps.get(name)) + 1):
+            suffix = f"?p={page}" if page > 1 else ""
+            lines.append(f"<sitemap><loc>{escape(loc + suffix)}</loc></sitemap>\n")
+    lines.append("</sitemapindex>\n")
+    return "".join(lines)
+
+
+def section_stamps() -> dict:
+    return {name: sitemap.stamp() for name, sitemap in SITEMAPS.items()}
+
+
+def index_cache_key(protocol: str, domain: str, stamps: dict | None = None) -> str:
+    stamps = stamps or section_stamps()
+    return f"sitemap:index:{protocol}:{domain}:{stamp_digest(*stamps.values())}"
+
+
+def cached_stream(key: str, chunks, timeout: int = SITEMAP_CACHE_TIMEOUT):
+    """Отдаёт куски клиенту и после последнего кладёт весь XML в кэш."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, "".join(parts), timeout)
@@ -0,0 +1,86 @@
+# core/slugs.py
+"""
+Подбор уникальных slug для всех моделей со slug.
+
+Заголовок транслитерируется (unidecode — иначе slugify выбрасывает
+кириллицу целиком), свободный суффикс ищется по уже занятым slug
+с тем же префиксом, полученным одним запросом. Для импорта —
+SlugAllocator: весь столбец одним запросом, дальше подбор в памяти.
+Поля modeltranslation (slug_ru / slug_ky / slug_en) заполняются
+каждое из своего title_<lang>.
+"""
+from django.db.models import Q
+from django.utils.text import slugify
+from modeltranslation.settings import AVAILABLE_LANGUAGES
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname
+from unidecode import unidecode
+
+# запас под суффикс "-NNNNN"
+_SUFFIX_RESERVE = 6
+
+
+def make_slug(value, max_length=200, fallback="item") -> str:
+    """Транслитерирует и слагает; пустой результат — fallback."""
+    base = slugify(unidecode(str(value or "")))[: max_length - _SUFFIX_RESERVE].strip("-")
+    return base or fallback
+
+
+def _next_free(base, taken) -> str:
+    slug, i = base, 2
+    while slug in taken:
+        slug, i = f"{base}-{i}", i + 1
+    return slug
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length or 50
+
+
+def allocate_slug(model, value, field="slug", fallback=None, exclude_pk=None) -> str:
+    """Свободный slug для одной записи: занятые «base» и «base-*» — одним запросом."""
+    base = make_slug(value, _max_length(model, field), fallback or model._meta.model_name)
+    qs = model._base_manager.filter(Q(**{field: base}) | Q(**{f"{field}__startswith": f"{base}-"}))
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return _next_free(base, set(qs.values_list(field, flat=True)))
+
+
+def slug_fields(model, field="slug", source="title"):
+    """[(поле slug, поле-источник)] — по языкам, если slug переводимый."""
+    try:
+        translated = field in translator.get_options_for_model(model).fields
+    except NotRegistered:
+        translated = False
+    if not translated:
+        return [(field, source)]
+    return [
+        (build_localized_fieldname(field, lang), build_localized_fieldname(source, lang))
+        for lang in AVAILABLE_LANGUAGES
+    ]
+
+
+def fill_slugs(instance, field="slug", source="title", fallback=None):
+    """Заполняет пустые slug (во всех языках) из соответствующих заголовков."""
+    model = type(instance)
+    for slug_field, source_field in slug_fields(model, field, source):
+        value = getattr(instance, source_field, None)
+        if value and not getattr(instance, slug_field, None):
+            setattr(instance, slug_field, allocate_slug(model, value, slug_field, fallback, instance.pk))
+
+
+class SlugAllocator:
+    """Пакетный подбор: занятые slug столбца одним запросом, дальше — в памяти."""
+
+    def __init__(self, model, field="slug", fallback=None):
+        self.taken = set(model._base_manager.values_list(field, flat=True).iterator(chunk_size=2000))
+        self.max_length = _max_length(model, field)
+        self.fallback = fallback or model._meta.model_name
+
+    def reserve(self, slug):
+        self.taken.add(slug)
+
+    def allocate(self, value) -> str:
+        slug = _next_free(make_slug(value, self.max_length, self.fallback), self.taken)
+        self.taken.add(slug)
+        return slug
@@ -0,0 +1,84 @@
+# core/sqlite_profile.py
+"""
+Профиль SQLite-соединения.
+
+PRAGMA выполняются один раз на соединение (connection_created, см.
+core/apps.py); при CONN_MAX_AGE > 0 соединение живёт между запросами,
+и настройка не повторяется на каждый запрос.
+
+  basic — WAL, synchronous=NORMAL, foreign_keys (как было);
+  tuned — плюс busy_timeout, temp_store=MEMORY, mmap_size, cache_size.
+
+Раз в SQLITE_MAINTENANCE_INTERVAL секунд после запроса процесс делает
+PRAGMA optimize и пассивный wal_checkpoint — на уже открытом соединении,
+новое ради этого не открывается. Полное обслуживание — manage.py sqlite_maintenance.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+
+BASIC_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def pragmas() -> tuple:
+    if getattr(settings, "SQLITE_PROFILE", "tuned") != "tuned":
+        return BASIC_PRAGMAS
+    return BASIC_PRAGMAS + (
+        f"PRAGMA busy_timeout={int(getattr(settings, 'SQLITE_BUSY_TIMEOUT', 30) * 1000)}",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA mmap_size={int(getattr(settings, 'SQLITE_MMAP_SIZE', 0))}",
+        # отрицательное значение — размер в KiB, а не в страницах
+        f"PRAGMA cache_size=-{int(getattr(settings, 'SQLITE_CACHE_SIZE_KB', 2000))}",
+    )
+
+
+def apply(connection):
+    # сырой курсор sqlite3 — без обёрток Django (debug-лог, execute_wrapper)
+    cur = connection.connection.cursor()
+    try:
+        for sql in pragmas():
+            cur.execute(sql)
+    finally:
+        cur.close()
+
+
+def maintain(connection, checkpoint: str = "PASSIVE") -> dict:
+    """PRAGMA optimize + wal_checkpoint; возвращает (busy, log, checkpointed) чекпойнта."""
+    with connection.cursor() as cur:
+        cur.execute("PRAGMA optimize")
+        cur.execute(f"PRAGMA wal_checkpoint({checkpoint})")
+        busy, log, checkpointed = cur.fetchone()
+    return {"busy": busy, "log_frames": log, "checkpointed": checkpointed}
+
+
+_last_run = time.monotonic()
+_lock = threading.Lock()
+
+
+@receiver(request_finished)
+def _periodic_maintenance(sender, **kwargs):
+    global _last_run
+    interval = getattr(settings, "SQLITE_MAINTENANCE_INTERVAL", 3600)
+    if not interval or time.monotonic() - _last_run < interval:
+        return
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != "sqlite" or connection.connection is None:
+        return
+    if not _lock.acquire(blocking=False):
+        return
+    try:
+        _last_run = time.monotonic()
+        maintain(connection)
+    except Exception:
+        # обслуживание не должно ронять ответ; следующая попытка — через interval
+        pass
+    finally:
+        _lock.release()
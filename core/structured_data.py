@@ -0,0 +1,251 @@
+# core/structured_data.py
+"""
+JSON-LD (schema.org) собирается в Python и сериализуется json.dumps —
+валидный JSON без ручного escapejs в шаблонах.
+
+Готовая строка <script> кэшируется по (объект, язык, хост, версия);
+версия — отпечаток таблиц в БД (core/versioning.py), так что правку
+SiteSettings/филиалов видят все воркеры, а не только сохранивший.
+"""
+import json
+
+from django.core.cache import cache
+from django.db.models import Avg, Count
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, gettext as _
+
+from .models import Branch, Review, SiteSettings
+from .versioning import get_versions
+
+JSONLD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# </script> и HTML-сущности внутри строк не должны ломать тег
+_SCRIPT_ESCAPES = {ord("<"): "\\u003C", ord(">"): "\\u003E", ord("&"): "\\u0026"}
+
+
+def to_script(*docs) -> str:
+    return "\n".join(
+        '<script type="application/ld+json">'
+        + json.dumps(doc, ensure_ascii=False).translate(_SCRIPT_ESCAPES)
+        + "</script>"
+        for doc in docs
+        if doc
+    )
+
+
+def _cached(key: str, build):
+    html = cache.get(key)
+    if html is None:
+        html = to_script(*build())
+        cache.set(key, html, JSONLD_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def _base_key(request, kind: str, *versions) -> str:
+    host = f"{request.scheme}://{request.get_host()}"
+    return f"jsonld:{kind}:{get_language()}:{host}:" + ":".join(str(v) for v in versions)
+
+
+def _coord(value):
+    return float(value) if value is not None else None
+
+
+def _postal_address(obj) -> dict:
+    return {
+        "@type": "PostalAddress",
+        "streetAddress": obj.street_address,
+        "addressLocality": obj.address_locality,
+        "addressRegion": obj.address_region,
+        "addressCountry": obj.address_country,
+    }
+
+
+def _geo(obj):
+    if obj.geo_lat is None or obj.geo_lng is None:
+        return None
+    return {"@type": "GeoCoordinates", "latitude": _coord(obj.geo_lat), "longitude": _coord(obj.geo_lng)}
+
+
+def _rating():
+    agg = Review.objects.filter(is_published=True).aggregate(avg=Avg("rating"), cnt=Count("id"))
+    if not agg["cnt"]:
+        return None
+    return {
+        "@type": "AggregateRating",
+        "ratingValue": round(agg["avg"], 1),
+        "reviewCount": agg["cnt"],
+    }
+
+
+def _local_business(site, with_geo=True) -> dict:
+    doc = {
+        "@type": "LocalBusiness",
+        "name": site.brand,
+        "telephone": site.phone_e164,
+        "address": _postal_address(site),
+    }
+    geo = _geo(site) if with_geo else None
+    if geo:
+        doc["geo"] = geo
+    return doc
+
+
+# ---------- документы ----------
+
+def business_documents(request):
+    """AutoRepair + филиалы — блок seo_jsonld из base.html."""
+    site = SiteSettings.get_solo()
+    branches = list(Branch.objects.filter(is_active=True))
+    doc = {
+        "@context": "https://schema.org",
+        "@type": "AutoRepair",
+        "name": site.brand,
+        "url": request.build_absolute_uri(reverse("home")),
+        "telephone": site.phone_e164,
+        "priceRange": "₸₸",
+        "address": _postal_address(site),
+    }
+    geo = _geo(site)
+    if geo:
+        doc["geo"] = geo
+    doc["areaServed"] = "Бишкек"
+    doc["availableLanguage"] = ["ru", "ky", "en"]
+    rating = _rating()
+    if rating:
+        doc["aggregateRating"] = rating
+    doc["knowsAbout"] = [
+        "Диагностика двигателя", "OBD-II", "Замер компрессии",
+        "Эндоскопия цилиндров", "Капремонт двигателя", "Ремонт моторов",
+    ]
+    doc["makesOffer"] = [
+        {
+            "@type": "Offer",
+            "itemOffered": {
+                "@type": "Service",
+                "serviceType": "Диагностика двигателя",
+                "areaServed": "Бишкек",
+                "provider": {"@type": "AutoRepair", "name": site.brand},
+            },
+        },
+        {
+            "@type": "Offer",
+            "itemOffered": {"@type": "Service", "serviceType": "Капитальный ремонт двигателя"},
+        },
+    ]
+    if branches:
+        doc["department"] = [
+            {
+                "@type": "LocalBusiness",
+                "name": b.name,
+                "telephone": b.phone_e164 or site.phone_e164,
+                "address": _postal_address(b),
+                "geo": _geo(b),
+            }
+            for b in branches
+        ]
+    else:
+        doc["department"] = [_local_business(site)]
+    return [doc]
+
+
+def home_documents(request):
+    """Service «Диагностика мотора» с рейтингом — блок seo_jsonld из home.html."""
+    site = SiteSettings.get_solo()
+    provider = _local_business(site, with_geo=False)
+    provider["url"] = request.build_absolute_uri(reverse("home"))
+    doc = {
+        "@context": "https://schema.org",
+        "@type": "Service",
+        "serviceType": _("Диагностика мотора"),
+        "areaServed": _("Бишкек, Кыргызстан"),
+        "provider": provider,
+    }
+    rating = _rating()
+    if rating:
+        doc["aggregateRating"] = rating
+    return [doc]
+
+
+def _breadcrumbs(request, *items) -> dict:
+    return {
+        "@context": "https://schema.org",
+        "@type": "BreadcrumbList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": i, "name": name, "item": request.build_absolute_uri(url)}
+            for i, (name, url) in enumerate(items, start=1)
+        ],
+    }
+
+
+def _faq_document(faqs):
+    if not faqs:
+        return None
+    return {
+        "@context": "https://schema.org",
+        "@type": "FAQPage",
+        "mainEntity": [
+            {
+                "@type": "Question",
+                "name": q.question,
+                "acceptedAnswer": {"@type": "Answer", "text": q.answer},
+            }
+            for q in faqs
+        ],
+    }
+
+
+def service_documents(request, service, faqs):
+    """Service + FAQPage + BreadcrumbList для страницы услуги."""
+    site = SiteSettings.get_solo()
+    doc = {
+        "@context": "https://schema.org",
+        "@type": "Service",
+        "name": service.title,
+        "description": service.short_desc or service.title,
+    }
+    if service.price_from:
+        doc["offers"] = {"@type": "Offer", "priceCurrency": "KGS", "price": service.price_from}
+    doc["provider"] = {
+        "@type": "LocalBusiness",
+        "name": site.brand,
+        "telephone": site.phone_e164,
+        "url": request.build_absolute_uri(reverse("home")),
+        "areaServed": "Bishkek, Kyrgyzstan",
+        "address": _postal_address(site),
+    }
+    breadcrumbs = _breadcrumbs(
+        request,
+        (_("Главная"), reverse("home")),
+        (_("Услуги"), reverse("service_list")),
+        (service.title, service.get_absolute_url()),
+    )
+    return [doc, _faq_document(list(faqs)), breadcrumbs]
+
+
+def faq_page_documents(request, faqs):
+    """BreadcrumbList + FAQPage для /faq/ (FAQPage — только если FAQ заведены в админке)."""
+    breadcrumbs = _breadcrumbs(request, (_("Главная"), reverse("home")), ("FAQ", reverse("faq_page")))
+    return [breadcrumbs, _faq_document(list(faqs))]
+
+
+# ---------- кэшируемые <script> ----------
+
+def business_script(request):
+    key = _base_key(request, "business", *get_versions("layout", "reviews"))
+    return _cached(key, lambda: business_documents(request))
+
+
+def home_script(request):
+    key = _base_key(request, "home", *get_versions("layout", "reviews"))
+    return _cached(key, lambda: home_documents(request))
+
+
+def service_script(request, service, faqs):
+    key = _base_key(request, f"service:{service.pk}", *get_versions("layout", f"service:{service.pk}"))
+    return _cached(key, lambda: service_documents(request, service, faqs))
+
+
+def faq_page_script(request, faqs):
+    key = _base_key(request, "faqpage", *get_versions("faq"))
+    return _cached(key, lambda: faq_page_documents(request, faqs))
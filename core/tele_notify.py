@@ -1,10 +1,15 @@
 # core/tele_notify.py
 from __future__ import annotations
+import asyncio
 import json
 import threading
+import httpx
 import requests
 from django.conf import settings
 
+# ссылки на фоновые задачи, чтобы их не собрал GC до завершения
+_background_tasks: set[asyncio.Task] = set()
+
 
 def _send_telegram_message(text: str, parse_mode: str | None = "HTML") -> None:
     token = settings.TELEGRAM_BOT_TOKEN
@@ -26,7 +31,27 @@ def _send_telegram_message(text: str, parse_mode: str | None = "HTML") -> None:
         pass
 
 
-def notify_lead(data: dict) -> None:
+async def _asend_telegram_message(text: str, parse_mode: str | None = "HTML") -> None:
+    token = settings.TELEGRAM_BOT_TOKEN
+    chat_id = settings.TELEGRAM_CHAT_ID
+    if not token or not chat_id:
+        return
+
+    url = f"https://api.telegram.org/bot{token}/sendMessage"
+    payload = {
+        "chat_id": chat_id,
+        "text": text,
+        "parse_mode": parse_mode,
+        "disable_web_page_preview": True,
+    }
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            await client.post(url, json=payload)
+    except httpx.HTTPError:
+        pass
+
+
+def format_lead(data: dict) -> str:
     """
     data ожидается вида:
     {
@@ -58,7 +83,21 @@ def notify_lead(data: dict) -> None:
     if utm_parts:
         lines.append("🔗 UTM: " + ", ".join(utm_parts))
 
-    text = "\n".join(lines)
+    return "\n".join(lines)
+
 
+def notify_lead(data: dict) -> None:
+    """Формат data — см. format_lead()."""
+    text = format_lead(data)
     # Отправим в отдельном потоке, чтобы не блокировать ответ пользователю
     threading.Thread(target=_send_telegram_message, args=(text,), daemon=True).start()
+
+
+def anotify_lead(data: dict) -> None:
+    """
+    Вариант notify_lead для async-view под ASGI: ставит отправку задачей
+    в текущий event loop, без потока и без ожидания ответа Telegram.
+    """
+    task = asyncio.get_running_loop().create_task(_asend_telegram_message(format_lead(data)))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -0,0 +1,66 @@
+# core/templatetags/critical_css.py
+"""
+{% page_css "home" %} — CSS страницы без блокировки отрисовки.
+
+static/css/critical/<page>.css собирает `npm run build:css:critical`:
+Tailwind с --content только из base.html + шаблонов этой страницы, то есть
+ровно классы, которые на ней есть (~в разы меньше main.css). Его вставляем
+в <style>, а полный main.css грузим отложенно (preload → stylesheet);
+ссылка берётся через {% static %}, так что с ManifestStaticFilesStorage
+это хэшированное имя с долгим кэшем WhiteNoise.
+
+Без аргумента или если файл страницы не собран — обычный блокирующий <link>.
+"""
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CRITICAL_DIR = "css/critical"
+MAIN_CSS = "css/main.css"
+
+_inline_cache = {}
+
+
+def _read(path):
+    """Содержимое статики: из STATIC_ROOT после collectstatic, иначе через finders."""
+    try:
+        if staticfiles_storage.exists(path):
+            with staticfiles_storage.open(path) as fh:
+                return fh.read().decode("utf-8")
+    except (OSError, ValueError):
+        pass
+    found = finders.find(path)
+    if found:
+        with open(found, encoding="utf-8") as fh:
+            return fh.read()
+    return None
+
+
+def critical_css(page):
+    """Критический CSS страницы или None; кэш на процесс (кроме DEBUG — там пересобирают)."""
+    path = f"{CRITICAL_DIR}/{page}.css"
+    if settings.DEBUG:
+        return _read(path)
+    if path not in _inline_cache:
+        _inline_cache[path] = _read(path)
+    return _inline_cache[path]
+
+
+@register.simple_tag
+def page_css(page=None):
+    href = static(MAIN_CSS)
+    css = critical_css(page) if page else None
+    if not css:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>\n'
+        '    <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '    <noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(css.replace("</", "<\\/")), href, href,
+    )
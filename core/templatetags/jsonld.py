@@ -0,0 +1,28 @@
+# core/templatetags/jsonld.py
+from django import template
+
+from core import structured_data
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def business_jsonld(context):
+    """AutoRepair/LocalBusiness по SiteSettings и филиалам: {% business_jsonld %}"""
+    return structured_data.business_script(context["request"])
+
+
+@register.simple_tag(takes_context=True)
+def home_jsonld(context):
+    return structured_data.home_script(context["request"])
+
+
+@register.simple_tag(takes_context=True)
+def service_jsonld(context, service, faqs):
+    """Service + FAQPage + хлебные крошки: {% service_jsonld service faqs %}"""
+    return structured_data.service_script(context["request"], service, faqs)
+
+
+@register.simple_tag(takes_context=True)
+def faq_page_jsonld(context, faqs):
+    return structured_data.faq_page_script(context["request"], faqs)
@@ -0,0 +1,129 @@
+# core/testing.py
+"""
+Бюджет SQL-запросов для тестов.
+
+    with query_budget(8):
+        client.get("/products/")
+
+или в TestCase с QueryBudgetMixin: ``with self.assertMaxQueries(8): ...``.
+
+При превышении падает AssertionError со списком запросов: для каждого —
+шаблон и строка, на которой он выполнился (ищем ближайший узел шаблона
+Node.render_annotated в стеке), и строка нашего Python-кода. Одинаковые
+по форме запросы группируются — N+1 видно сразу.
+"""
+import os
+import re
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template.base import Node, TokenType
+
+_PROJECT_DIR = str(settings.BASE_DIR)
+# обёртки замеров (core/perf.py) и этот модуль — не «место запроса»
+_SKIP_FILES = {__file__, os.path.join(_PROJECT_DIR, "core", "perf.py")}
+_PARAMS_RE = re.compile(r"('(?:[^']|'')*'|\b\d+\b)")
+
+
+@dataclass
+class CapturedQuery:
+    sql: str
+    template: str = ""  # "products/list.html:32 {{ p.brand.title }}"
+    code: str = ""      # "core/views.py:160 in product_list"
+
+    @property
+    def shape(self) -> str:
+        """SQL без литералов — для группировки повторов."""
+        return _PARAMS_RE.sub("?", self.sql)
+
+
+@dataclass
+class QueryLog:
+    budget: int
+    queries: list = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def report(self) -> str:
+        lines = [f"Бюджет SQL превышен: {len(self.queries)} > {self.budget}"]
+        for i, q in enumerate(self.queries, 1):
+            lines.append(f"{i:>3}. {q.sql}")
+            if q.template:
+                lines.append(f"       шаблон: {q.template}")
+            if q.code:
+                lines.append(f"       код:    {q.code}")
+        repeats = {}
+        for q in self.queries:
+            repeats.setdefault(q.shape, []).append(q)
+        repeated = [(shape, qs) for shape, qs in repeats.items() if len(qs) > 1]
+        if repeated:
+            lines.append("Повторяющиеся запросы (возможный N+1):")
+            for shape, qs in sorted(repeated, key=lambda kv: -len(kv[1])):
+                where = qs[0].template or qs[0].code
+                lines.append(f"  x{len(qs)}  {shape[:160]}")
+                if where:
+                    lines.append(f"       {where}")
+        return "\n".join(lines)
+
+
+def _template_location(frame) -> str:
+    while frame is not None:
+        if frame.f_code.co_name == "render_annotated":
+            node = frame.f_locals.get("self")
+            token = getattr(node, "token", None) if isinstance(node, Node) else None
+            if token is not None:
+                origin = getattr(node, "origin", None)
+                name = getattr(origin, "template_name", None) or getattr(origin, "name", "?")
+                tag = "{{ %s }}" if token.token_type == TokenType.VAR else "{%% %s %%}"
+                return f"{name}:{token.lineno} " + tag % token.contents
+        frame = frame.f_back
+    return ""
+
+
+def _code_location(frame) -> str:
+    """Ближайший кадр из кода проекта (не Django/site-packages и не обёртки)."""
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_DIR)
+            and "site-packages" not in filename
+            and filename not in _SKIP_FILES
+        ):
+            rel = os.path.relpath(filename, _PROJECT_DIR)
+            return f"{rel}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return ""
+
+
+@contextmanager
+def query_budget(budget: int, using: str = DEFAULT_DB_ALIAS):
+    """Падает, если внутри блока выполнено больше budget запросов."""
+    log = QueryLog(budget)
+
+    def recorder(execute, sql, params, many, context):
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            frame = sys._getframe(1)
+            try:
+                rendered = sql % tuple(repr(p) for p in params) if params and not many else sql
+            except (TypeError, ValueError):
+                rendered = sql
+            log.queries.append(CapturedQuery(rendered, _template_location(frame), _code_location(frame)))
+            del frame
+
+    with connections[using].execute_wrapper(recorder):
+        yield log
+    if len(log) > budget:
+        raise AssertionError(log.report())
+
+
+class QueryBudgetMixin:
+    """Для TestCase: ``with self.assertMaxQueries(n): ...``."""
+
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        return query_budget(budget, using)
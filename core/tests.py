@@ -1,3 +1,1245 @@
-from django.test import TestCase
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from . import benchdata, lead_archive, leadstats, reviews
+from .models import Brand, Lead, LeadDailyStat, Product, Review, Service
+from .slugs import SlugAllocator
+from .testing import QueryBudgetMixin, query_budget
+
+LANGS = ("ru", "ky", "en")
+
+# максимум SQL на «тёплый» запрос (кэши версий/JSON-LD/миниатюр уже заполнены);
+# не должен зависеть от числа строк — это и проверяют классы с разным наполнением
+PAGE_BUDGETS = {
+    "home": 2,
+    "service_list": 2,
+    "service_detail": 3,
+    "product_list": 4,
+    "product_detail": 5,
+    "contacts": 0,
+    "faq_page": 2,
+    "review_list": 0,
+    "review_create": 0,
+}
+SITEMAP_BUDGETS = {
+    "robots_txt": 0,
+    "sitemap_index": 2,
+    "sitemap_section": 1,  # только отпечаток секции — строки таблицы на попадании не читаются
+}
+LEAD_CREATE_BUDGET = 6
+
+# manifest появляется только после collectstatic, а тесты идут с DEBUG=False
+TEST_STORAGES = {**settings.STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+
+# отдельная (не зеркальная) тестовая реплика есть только в профиле settings_test
+SEPARATE_REPLICA = "replica" in settings.DATABASES and not settings.DATABASES["replica"].get("TEST", {}).get("MIRROR")
+
+SMALL = {
+    "products": 3, "brands": 2, "categories": 2, "reviews": 3,
+    "services": 2, "cases_per_service": 1, "faqs_per_service": 1, "branches": 1,
+}
+LARGE = {
+    "products": 60, "brands": 8, "categories": 5, "reviews": 120,
+    "services": 12, "cases_per_service": 3, "faqs_per_service": 4, "branches": 5,
+}
+
+
+class QueryBudgetCases(QueryBudgetMixin):
+    """Общие проверки; наполнение задают наследники через SIZES."""
+
+    SIZES = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media = tempfile.mkdtemp()
+        cls._media_override = override_settings(
+            MEDIA_ROOT=cls._media,
+            RATELIMIT_ENABLED=False,
+            STORAGES=TEST_STORAGES,
+            # отпечаток версий снимается раз в VERSION_STAMP_TTL на процесс — на тёплом
+            # запросе его не должно быть, а медленная машина не должна переживать TTL
+            VERSION_STAMP_TTL=60,
+        )
+        cls._media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls._media, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        benchdata.seed(cls.SIZES)
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+
+    def _url(self, name, lang):
+        with translation.override(lang):
+            if name == "service_detail":
+                svc = Service.objects.order_by("order").first()
+                return reverse(name, kwargs={"slug": getattr(svc, f"slug_{lang}") or svc.slug})
+            if name == "product_detail":
+                return reverse(name, kwargs={"slug": Product.objects.order_by("pk").first().slug})
+            return reverse(name)
+
+    def _assert_budget(self, url, budget):
+        warm = self.client.get(url)  # прогрев кэшей
+        if warm.streaming:
+            b"".join(warm.streaming_content)  # sitemap кладёт XML в кэш, дочитав поток
+        self.assertEqual(warm.status_code, 200)
+        with self.assertMaxQueries(budget):
+            response = self.client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+
+    def test_page_budgets(self):
+        for name, budget in PAGE_BUDGETS.items():
+            for lang in LANGS:
+                with self.subTest(view=name, lang=lang):
+                    self._assert_budget(self._url(name, lang), budget)
+
+    def test_sitemap_budgets(self):
+        for name, budget in SITEMAP_BUDGETS.items():
+            if name == "sitemap_section":
+                for section in ("static", "services", "products"):
+                    with self.subTest(section=section):
+                        self._assert_budget(reverse(name, kwargs={"section": section}), budget)
+            else:
+                with self.subTest(view=name):
+                    self._assert_budget(reverse(name), budget)
+
+    def test_lead_create_budget(self):
+        for i, lang in enumerate(LANGS):
+            with self.subTest(lang=lang), translation.override(lang):
+                data = {"name": "Test", "phone": f"+99670000000{i}", "lang": lang, "idempotency_key": f"k{i}"}
+                with self.assertMaxQueries(LEAD_CREATE_BUDGET):
+                    response = self.client.post(reverse("lead_create"), data)
+                self.assertEqual(response.status_code, 302)
+
+
+class QueryBudgetSmallTests(QueryBudgetCases, TestCase):
+    SIZES = SMALL
+
+
+class QueryBudgetLargeTests(QueryBudgetCases, TestCase):
+    SIZES = LARGE
+
+
+@override_settings(STORAGES=TEST_STORAGES, VERSION_STAMP_TTL=60)
+class LayoutVersionTests(TestCase):
+    """Шапка/подвал из {% cache %}: правку из другого процесса (без сигнала здесь) видно по отпечатку таблиц."""
+
+    def setUp(self):
+        from .models import SiteSettings
+
+        cache.clear()
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        SiteSettings.objects.create(id=1, phone_e164="+996700111111")
+
+    def test_edit_from_other_process(self):
+        from .models import Branch, SiteSettings
+
+        self.assertContains(self.client.get(reverse("contacts")), "tel:+996700111111")
+        # queryset.update() сигналов не шлёт — как запись, сделанная другим воркером
+        SiteSettings.objects.filter(pk=1).update(phone_e164="+996700222222", updated_at=timezone.now())
+        Branch.objects.bulk_create([Branch(name="Восток", slug="east", street_address="Жибек Жолу, 5", geo_lat=42.88, geo_lng=74.62)])
+
+        # в пределах VERSION_STAMP_TTL процесс помнит старый снимок
+        self.assertContains(self.client.get(reverse("contacts")), "tel:+996700111111")
+        with override_settings(VERSION_STAMP_TTL=0):
+            response = self.client.get(reverse("contacts"))
+        self.assertContains(response, "tel:+996700222222")
+        self.assertContains(response, "Жибек Жолу, 5")
+
+
+@override_settings(STORAGES=TEST_STORAGES, VERSION_STAMP_TTL=60)
+class JsonLdTests(TestCase):
+    """core/structured_data.py: валидный JSON-LD, кэш сбрасывается правкой SiteSettings и филиалов."""
+
+    def setUp(self):
+        from .models import Branch, SiteSettings
+
+        cache.clear()
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        self.site = SiteSettings.objects.create(id=1, brand="Avto_Him_Zavod", phone_e164="+996700111111")
+        self.branch = Branch.objects.create(
+            name="Центр", slug="center", street_address="Киевская, 1", geo_lat=42.87, geo_lng=74.59,
+        )
+
+    def _documents(self):
+        import json
+        import re
+
+        html = self.client.get(reverse("contacts")).content.decode()
+        scripts = re.findall(r'<script type="application/ld\+json">(.*?)</script>', html, re.S)
+        self.assertTrue(scripts)
+        docs = [json.loads(script) for script in scripts]  # ValueError — невалидный JSON
+        return next(doc for doc in docs if doc.get("@type") == "AutoRepair")
+
+    def test_valid_and_invalidated(self):
+        import json
+
+        doc = self._documents()
+        self.assertEqual(doc["@context"], "https://schema.org")
+        self.assertEqual(doc["telephone"], "+996700111111")
+
+        self.site.phone_e164 = "+996700222222"
+        self.site.brand = 'Avto "Him" </script>'
+        self.site.save()
+        doc = self._documents()
+        self.assertEqual((doc["telephone"], doc["name"]), ("+996700222222", 'Avto "Him" </script>'))
+
+        # запись другого воркера: здесь сигнала нет, виден только новый отпечаток Branch
+        from .models import Branch
+
+        Branch.objects.filter(pk=self.branch.pk).update(street_address="Токтогула, 9", updated_at=timezone.now())
+        with override_settings(VERSION_STAMP_TTL=0):
+            doc = self._documents()
+        self.assertIn("Токтогула, 9", json.dumps(doc, ensure_ascii=False))
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ConditionalPageTests(TestCase):
+    """core/conditional.py: повтор с валидаторами — 304; правка данных шапки/подвала меняет ETag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import Branch, SiteSettings
+
+        cls.site = SiteSettings.objects.create()
+        cls.branch = Branch.objects.create(name="Центр", slug="center", street_address="Киевская, 1", geo_lat=42.87, geo_lng=74.59)
+        cls.review = Review.objects.create(author="Азамат", rating=5, text="Отлично")
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        self.url = reverse("faq_page")
+
+    def _get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        self.assertIn(response.status_code, (200, 304))
+        return response
+
+    def test_not_modified(self):
+        # первый визит ставит csrf-куку, а она входит в ETag — валидаторы берём со второго
+        self._get()
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"] and first["Last-Modified"])
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.assertEqual(self._get(HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+
+    def test_layout_edits_change_etag(self):
+        self._get()
+        etag = self._get()["ETag"]
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        edits = {
+            "SiteSettings": lambda: self.site.save(),
+            "Branch": lambda: self.branch.save(),
+            "Review": lambda: Review.objects.create(author="Бекзат", rating=4, text="Хорошо"),
+        }
+        for name, edit in edits.items():
+            with self.subTest(model=name):
+                edit()
+                response = self._get(HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+                etag = response["ETag"]
+
+    def test_product_image_edit_changes_etag(self):
+        from .models import ProductImage
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media):
+            product = Product.objects.create(title="Масло", slug="maslo")
+            image = ProductImage.objects.create(product=product, image=benchdata._case_image(), alt="до")
+            self.url = reverse("product_detail", args=[product.slug])
+            self._get()
+            etag = self._get()["ETag"]
+            # правка без вставки/удаления строки: alt, порядок
+            image.alt, image.sort = "после", 5
+            image.save()
+            response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "после")
+
+
+class ReviewFeedTests(TestCase):
+    """core/reviews.py: курсор проходит всю ленту без дублей и пропусков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # benchdata даёт пачкам по 200 отзывов одинаковый created_at — проверка разрыва ничьих по id
+        benchdata.seed({**SMALL, "reviews": 450, "cases_per_service": 0})
+
+    def _walk(self, filters):
+        ids, cursor = [], None
+        while True:
+            page, cursor = reviews.fetch_page(filters, cursor)
+            ids += [r.pk for r in page]
+            if cursor is None:
+                return ids
+
+    def test_cursor_walks_whole_feed(self):
+        for filters in ({}, {"rating": 5}, {"source": Review.Source.GOOGLE}):
+            with self.subTest(filters=filters):
+                expected = list(
+                    Review.objects.filter(is_published=True, **filters)
+                    .order_by("-created_at", "-id").values_list("pk", flat=True)
+                )
+                self.assertEqual(self._walk(filters), expected)
+
+    def test_bad_cursor(self):
+        self.assertIsNone(reviews.decode_cursor("abc"))
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        with override_settings(STORAGES=TEST_STORAGES):
+            self.assertEqual(self.client.get(reverse("review_list"), {"cursor": "1-2-3"}).status_code, 404)
+
+
+class CaseGalleryTests(TestCase):
+    """core/gallery.py: номер страницы и инвалидация по изменениям услуги."""
+
+    def test_page_zero_is_404(self):
+        service = Service.objects.create(title="S", slug="s")
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        with override_settings(STORAGES=TEST_STORAGES):
+            response = self.client.get(reverse("service_cases", args=[service.pk, 0]), HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 404)
+
+    def test_service_change_invalidates_pages(self):
+        from .versioning import get_version
+
+        service = Service.objects.create(title="S", slug="s")
+        before = get_version(f"cases:{service.pk}")
+        service.is_published = False
+        service.save()
+        self.assertNotEqual(get_version(f"cases:{service.pk}"), before)
+
+
+    @override_settings(VERSION_STAMP_TTL=60)
+    def test_case_added_elsewhere_changes_version(self):
+        from .models import Case
+        from .versioning import get_version
+
+        service = Service.objects.create(title="S", slug="s")
+        before = get_version(f"cases:{service.pk}")
+        # bulk_create сигналов не шлёт — как запись из другого процесса
+        Case.objects.bulk_create([Case(service=service, title="Новый кейс", slug="new-case", before_image="b.jpg", after_image="a.jpg")])
+        self.assertEqual(get_version(f"cases:{service.pk}"), before)  # снимок процесса ещё жив
+        with override_settings(VERSION_STAMP_TTL=0):
+            self.assertNotEqual(get_version(f"cases:{service.pk}"), before)
+
+
+class SitemapPagingTests(TestCase):
+    """Страницы секции читаются потоком, без штатного paginator, и совпадают с его разбиением."""
+
+    def _pages(self, sitemap):
+        from django.contrib.sitemaps import Sitemap
+
+        expected = [
+            [sitemap._url_for(obj, lang, "https", "testserver") for obj, lang in sitemap.paginator.page(p).object_list]
+            for p in sitemap.paginator.page_range
+        ]
+        cache.clear()
+        with mock.patch.object(Sitemap, "paginator", new_callable=mock.PropertyMock, side_effect=AssertionError):
+            pages = sitemap.num_pages()
+            got = [
+                [url["location"] for url in sitemap.iter_urls(p, "https", "testserver")]
+                for p in range(1, pages + 1)
+            ]
+        return expected, got
+
+    def test_pages_match_django(self):
+        from .sitemaps import ProductSitemap, ServiceSitemap
+
+        benchdata.seed({**SMALL, "products": 5, "services": 4, "cases_per_service": 0})
+        # у одной услуги нет en-slug — языки зависят от элемента
+        Service.objects.filter(pk=Service.objects.order_by("pk").values("pk")[:1]).update(slug_en=None)
+        for sitemap_class in (ProductSitemap, ServiceSitemap):
+            with self.subTest(sitemap=sitemap_class.__name__):
+                sitemap = sitemap_class()
+                sitemap.limit = 4
+                expected, got = self._pages(sitemap)
+                self.assertGreater(len(expected), 2)
+                self.assertEqual(got, expected)
+
+
+class SlugTests(TestCase):
+    """core/slugs.py: транслит, суффиксы и slug_<lang> у переводимых моделей."""
+
+    def test_transliterated_and_unique(self):
+        Product.objects.create(title="Масло 1")
+        with self.assertNumQueries(2):  # подбор slug + INSERT
+            product = Product.objects.create(title="Масло 1")
+        self.assertEqual(product.slug, "maslo-1-2")
+        self.assertEqual(Brand.objects.create(title="Шелл").slug, "shell")
+
+    def test_translated_slugs(self):
+        service = Service.objects.create(title_ru="Раскоксовка", title_en="Decoking", slug_ru="raskoksovka")
+        self.assertEqual((service.slug_ru, service.slug_en, service.slug_ky), ("raskoksovka", "decoking", None))
+
+    def test_bulk_allocator(self):
+        Product.objects.create(title="Масло")
+        slugs = SlugAllocator(Product)
+        self.assertEqual([slugs.allocate("Масло") for _ in range(2)], ["maslo-2", "maslo-3"])
+
+
+class QueryBudgetReportTests(TestCase):
+    """Сам инструмент: при превышении — SQL, шаблон и строка, группировка повторов."""
+
+    def test_report_points_to_template_line(self):
+        from django.template import Context, Template
+
+        benchdata.seed({**SMALL, "products": 4, "cases_per_service": 0})
+        template = Template("{% for p in products %}\n{{ p.brand.title }}\n{% endfor %}")
+        products = list(Product.objects.all())
+        with self.assertRaises(AssertionError) as ctx:
+            with query_budget(1):
+                template.render(Context({"products": products}))
+        report = str(ctx.exception)
+        self.assertIn("Бюджет SQL превышен: 4 > 1", report)
+        self.assertIn(":2 {{ p.brand.title }}", report)
+        self.assertIn("x4", report)
+
+    def test_within_budget_passes(self):
+        with query_budget(1) as log:
+            Product.objects.count()
+        self.assertEqual(len(log), 1)
+
+
+class SqliteProfileTests(TestCase):
+    """Профиль соединения: PRAGMA на открытом соединении и периодическое обслуживание."""
+
+    def test_tuned_pragmas_on_connection(self):
+        from django.db import connection
+
+        with connection.cursor() as cur:
+            cur.execute("PRAGMA temp_store")
+            self.assertEqual(cur.fetchone()[0], 2)  # MEMORY
+            cur.execute("PRAGMA cache_size")
+            self.assertEqual(cur.fetchone()[0], -settings.SQLITE_CACHE_SIZE_KB)
+            cur.execute("PRAGMA foreign_keys")
+            self.assertEqual(cur.fetchone()[0], 1)
+
+    def test_basic_profile(self):
+        from . import sqlite_profile
+
+        with override_settings(SQLITE_PROFILE="basic"):
+            self.assertEqual(sqlite_profile.pragmas(), sqlite_profile.BASIC_PRAGMAS)
+        with override_settings(SQLITE_PROFILE="tuned", SQLITE_CACHE_SIZE_KB=512, SQLITE_BUSY_TIMEOUT=5):
+            tuned = sqlite_profile.pragmas()
+        self.assertIn("PRAGMA cache_size=-512", tuned)
+        self.assertIn("PRAGMA busy_timeout=5000", tuned)
+
+    def test_periodic_maintenance_respects_interval(self):
+        import time
+
+        from django.core.signals import request_finished
+
+        from . import sqlite_profile
+
+        self.client.get(reverse("robots_txt"), HTTP_USER_AGENT="tests")  # соединение открыто
+        with override_settings(SQLITE_MAINTENANCE_INTERVAL=60), \
+                mock.patch.object(sqlite_profile, "maintain") as maintain, \
+                mock.patch.object(sqlite_profile, "_last_run", time.monotonic() - 61):
+            request_finished.send(sender=None)
+            request_finished.send(sender=None)
+        maintain.assert_called_once()
+
+
+class WarmTemplatesTests(TestCase):
+    """Компиляция шаблонов до выкладки и продакшен-профиль с кэширующим загрузчиком."""
+
+    def test_project_templates_compile(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("warm_templates", stdout=out)
+        self.assertIn("Скомпилировано шаблонов", out.getvalue())
+
+    def test_syntax_error_fails_command(self):
+        from io import StringIO
+
+        from django.core.management import CommandError, call_command
+
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        with open(os.path.join(tmp, "ok.html"), "w") as f:
+            f.write("{{ value }}")
+        with open(os.path.join(tmp, "broken.html"), "w") as f:
+            f.write("{% if value %}без endif")
+        templates = [{**settings.TEMPLATES[0], "DIRS": [tmp]}]
+        err = StringIO()
+        with override_settings(TEMPLATES=templates), self.assertRaises(CommandError):
+            call_command("warm_templates", stdout=StringIO(), stderr=err)
+        self.assertIn("broken.html", err.getvalue())
+        self.assertNotIn("ok.html", err.getvalue())
+
+    def _import_prod(self, env):
+        import importlib
+        import sys
+
+        sys.modules.pop("avtohim_site.settings_prod", None)
+        self.addCleanup(sys.modules.pop, "avtohim_site.settings_prod", None)
+        with mock.patch.dict(os.environ, env):
+            return importlib.import_module("avtohim_site.settings_prod")
+
+    def test_prod_settings_use_cached_loader(self):
+        prod = self._import_prod({"DJANGO_SECRET_KEY": "k", "DJANGO_ALLOWED_HOSTS": "avtohim.kg, www.avtohim.kg"})
+        self.assertFalse(prod.DEBUG)
+        self.assertEqual(prod.ALLOWED_HOSTS, ["avtohim.kg", "www.avtohim.kg"])
+        options = prod.TEMPLATES[0]["OPTIONS"]
+        self.assertEqual(options["loaders"][0][0], "django.template.loaders.cached.Loader")
+        self.assertNotIn("django.template.context_processors.debug", options["context_processors"])
+
+    def test_prod_settings_require_secret_key(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        with self.assertRaises(ImproperlyConfigured):
+            self._import_prod({"DJANGO_SECRET_KEY": ""})
+
+
+class WarmupTests(TestCase):
+    """Прогрев воркера: все шаги с временем, заполненные кэши, упавший шаг — в отчёте."""
+
+    databases = {"default", "replica"} if SEPARATE_REPLICA else {"default"}  # шаг database открывает все
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(VERSION_STAMP_TTL=60)
+    def test_run_fills_caches(self):
+        from . import warmup
+        from .context_processors import get_branches, get_rating, get_siteset
+
+        benchdata.seed({**SMALL, "cases_per_service": 0})
+        report = warmup.run()
+        self.assertEqual([row["step"] for row in report], [name for name, _ in warmup.STEPS])
+        for row in report:
+            self.assertNotIn("error", row, row)
+            self.assertGreaterEqual(row["ms"], 0)
+        with self.assertNumQueries(0):
+            get_siteset()
+            get_branches()
+            get_rating()
+
+    def test_failing_step_is_reported(self):
+        from . import warmup
+
+        def broken():
+            raise RuntimeError("нет каталога")
+
+        steps = [(name, broken if name == "urls" else func) for name, func in warmup.STEPS]
+        with mock.patch.object(warmup, "STEPS", steps), self.assertLogs("core.warmup", "ERROR"):
+            report = warmup.run(["urls", "translations"])
+        self.assertEqual([row["step"] for row in report], ["translations", "urls"])
+        self.assertEqual(report[1]["error"], "RuntimeError: нет каталога")
+        self.assertIn("detail", report[0])
+
+    def test_run_from_env(self):
+        from . import warmup
+
+        with mock.patch.dict(os.environ, {"WARMUP": "", "WARM_TEMPLATES": ""}):
+            self.assertIsNone(warmup.run_from_env())
+        with mock.patch.dict(os.environ, {"WARMUP": "", "WARM_TEMPLATES": "1"}):
+            self.assertEqual([row["step"] for row in warmup.run_from_env()], ["templates"])
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class CriticalCssTests(TestCase):
+    """{% page_css %}: критический CSS в <style>, main.css — отложенно; без файла — обычный <link>."""
+
+    def setUp(self):
+        from .templatetags import critical_css
+
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        os.makedirs(os.path.join(tmp, "static", "css", "critical"))
+        with open(os.path.join(tmp, "static", "css", "critical", "home.css"), "w") as f:
+            f.write(".hero{color:red}</style><script>")
+        override = override_settings(
+            STATICFILES_DIRS=[os.path.join(tmp, "static")], STATIC_ROOT=os.path.join(tmp, "root"),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch.dict(critical_css._inline_cache, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_inlines_critical_css(self):
+        from .templatetags.critical_css import page_css
+
+        html = page_css("home")
+        self.assertIn("<style>.hero{color:red}<\\/style><script></style>", html)
+        self.assertIn('<link rel="preload" href="/static/css/main.css" as="style"', html)
+        self.assertIn('<noscript><link rel="stylesheet" href="/static/css/main.css"></noscript>', html)
+
+    def test_falls_back_to_link(self):
+        from .templatetags.critical_css import page_css
+
+        for page in (None, "product_list"):
+            self.assertEqual(page_css(page), '<link rel="stylesheet" href="/static/css/main.css">')
+
+    def test_home_page_uses_critical_css(self):
+        home = self.client.get(reverse("home"), HTTP_USER_AGENT="tests")
+        self.assertContains(home, "<style>.hero{color:red}")
+        contacts = self.client.get(reverse("contacts"), HTTP_USER_AGENT="tests")
+        self.assertNotContains(contacts, "<style>.hero")
+        self.assertContains(contacts, '<link rel="stylesheet" href="/static/css/main.css">')
+
+
+class CopyDatabaseTests(TestCase):
+    """manage.py copy_database: таблицы копируются после тех, на которые ссылаются."""
+
+    def test_models_in_foreign_key_order(self):
+        from django.apps import apps
+
+        from .management.commands.copy_database import Command
+
+        # порядок не должен держаться на порядке INSTALLED_APPS
+        registered = apps.get_models()
+        with mock.patch.object(apps, "get_models", return_value=registered[::-1]):
+            models = Command._models()
+        position = {model: i for i, model in enumerate(models)}
+        self.assertEqual(len(position), len(models))
+        for model in models:
+            for field in model._meta.concrete_fields:
+                target = field.related_model and field.related_model._meta.concrete_model
+                if (field.many_to_one or field.one_to_one) and target is not model:
+                    with self.subTest(field=f"{model._meta.label}.{field.name}"):
+                        self.assertLess(position[target], position[model])
+
+
+class ImportCatalogTests(TestCase):
+    """import_catalog: upsert по slug и по названию+бренду, обложка не затирается пустой колонкой."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=os.path.join(self.dir, "media"))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _import(self, text):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        images = os.path.join(self.dir, "img")
+        os.makedirs(images, exist_ok=True)
+        with open(os.path.join(images, "new.jpg"), "wb") as fh:
+            fh.write(b"jpeg")
+        path = os.path.join(self.dir, "price.csv")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("slug,title,brand,category,price,cover\n" + text)
+        call_command("import_catalog", path, images=images, workers=2, stdout=StringIO())
+
+    def test_upsert(self):
+        brand = Brand.objects.create(title="Shell")
+        by_slug = Product.objects.create(title="Oil A", slug="oil-a", brand=brand, cover="products/old.jpg")
+        by_title = Product.objects.create(title="Oil B", slug="oil-b", brand=brand, cover="products/old.jpg")
+
+        self._import(
+            "oil-a,Oil A 4L,shell,Oils,100,\n"     # по slug; пустая обложка — старая остаётся
+            ",oil b,Shell,Oils,200,new.jpg\n"      # по названию+бренду (без регистра); обложка меняется
+            "Масло 5W30,Масло,Shell,Oils,300,\n"   # новый; slug из файла — транслитом
+        )
+        self.assertEqual(Product.objects.count(), 3)
+        by_slug.refresh_from_db()
+        by_title.refresh_from_db()
+        self.assertEqual((by_slug.title, by_slug.price, by_slug.cover.name), ("Oil A 4L", 100, "products/old.jpg"))
+        self.assertEqual((by_title.price, by_title.cover.name), (200, "products/new.jpg"))
+        created = Product.objects.get(price=300)
+        self.assertEqual(created.slug, "maslo-5w30")
+        self.assertEqual(created.get_absolute_url(), reverse("product_detail", args=["maslo-5w30"]))
+        self.assertEqual(created.category.slug, "oils")
+
+
+@override_settings(VERSION_STAMP_TTL=60)
+class ImportReviewsTests(TestCase):
+    """import_reviews: CSV + JSON Lines пачками, дедупликация, дата из выгрузки, текст — в text_<lang>."""
+
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self._write("google.csv", (
+            "author,rating,text,url,date\n"
+            "Азамат,5,Отлично,https://g.page/r/1,2023-05-01T10:00:00Z\n"
+            "Азамат,5,Повтор по ссылке,https://g.page/r/1,\n"
+            "Бекзат,FIVE,Быстро и качественно,,\n"
+            "Без оценки,,Текст,,\n"
+        ))
+        self._write("google.jsonl", (
+            '{"user": {"name": "Чынара"}, "stars": 4, "comment": "Хорошо", "date": 1682935200}\n'
+            '\n'
+            '{"author": "бекзат", "rating": 5, "text": "  быстро   и качественно "}\n'
+        ))
+
+    def _write(self, name, text):
+        with open(os.path.join(self.dir, name), "w", encoding="utf-8") as fh:
+            fh.write(text)
+
+    def _import(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        out = StringIO()
+        files = [os.path.join(self.dir, name) for name in ("google.csv", "google.jsonl")]
+        call_command("import_reviews", *files, source="google", lang="en", chunk_size=1, stdout=out)
+        return out.getvalue()
+
+    def test_import(self):
+        with translation.override("ru"):
+            out = self._import()
+        self.assertIn("прочитано 6, добавлено 3, дублей 2, без оценки/текста 1", out)
+        self.assertEqual(Review.objects.count(), 3)
+
+        first = Review.objects.get(source_url="https://g.page/r/1")
+        self.assertEqual(first.created_at, datetime.datetime(2023, 5, 1, 10, tzinfo=datetime.timezone.utc))
+        self.assertEqual(first.text_en, "Отлично")
+        self.assertFalse(first.text_ru)  # язык выгрузки — только en
+        by_ts = Review.objects.get(author="Чынара")
+        self.assertEqual(by_ts.created_at.timestamp(), 1682935200)
+
+        # повторный импорт: всё уже в базе — ключи строятся по text_en
+        with translation.override("ru"):
+            out = self._import()
+        self.assertIn("добавлено 0, дублей 5", out)
+        self.assertEqual(Review.objects.count(), 3)
+
+    def test_web_caches_see_import_from_other_process(self):
+        from .context_processors import get_rating
+
+        Review.objects.create(author="Было", rating=1, text="Плохо", source="google")
+        self.assertEqual(get_rating()["count"], 1)
+        self.assertNotIn("Отлично", reviews.page_html({}))
+        # команда в отдельном процессе: сброс её снимка сюда не доходит
+        with mock.patch("core.management.commands.import_reviews.bump_version"):
+            self._import()
+        self.assertEqual(get_rating()["count"], 1)  # снимок этого процесса ещё жив
+        with override_settings(VERSION_STAMP_TTL=0):
+            self.assertEqual(get_rating()["count"], 4)
+            self.assertIn("Чынара", reviews.page_html({}))
+
+    def test_json_array_streaming(self):
+        from io import StringIO
+
+        from core.management.commands.import_reviews import _iter_json_array
+
+        payload = '[{"text": "a, ]"}, {"text": "b"},\n {"nested": {"x": [1, 2]}}]'
+        items = list(_iter_json_array(StringIO(payload), chunk_size=4))
+        self.assertEqual(items, [{"text": "a, ]"}, {"text": "b"}, {"nested": {"x": [1, 2]}}])
+
+
+class LeadAdminTests(TestCase):
+    """Списки в админке: оценка числа строк, годы без DISTINCT, фильтр по услугам со строками."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        Lead.objects.bulk_create([Lead(name=f"N{i}", phone=f"+99670000{i:04d}") for i in range(30)])
+
+    def test_changelist(self):
+        from . import admin as core_admin
+
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        self.client.force_login(self.admin)
+        with override_settings(STORAGES=TEST_STORAGES):
+            response = self.client.get(reverse("admin:core_lead_changelist"), {"status__exact": "new"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 30)
+        with mock.patch.object(core_admin, "ADMIN_ESTIMATE_THRESHOLD", 10):
+            paginator = core_admin.EstimatedCountPaginator(Lead.objects.all(), 10)
+            self.assertEqual(paginator.count, Lead.objects.aggregate(n=Max("pk"))["n"])
+            filtered = core_admin.EstimatedCountPaginator(Lead.objects.filter(status="new"), 10)
+            self.assertEqual(filtered.count, 10)
+            # после архивации MAX(id) прежний, а строк меньше порога — считаем честно
+            Lead.objects.filter(pk__in=Lead.objects.order_by("pk").values("pk")[:25]).delete()
+            archived = core_admin.EstimatedCountPaginator(Lead.objects.all(), 10)
+            self.assertEqual(archived.count, 5)
+
+    def test_case_service_filter(self):
+        from .models import Case
+
+        shown = Service.objects.create(title="Раскоксовка", slug="raskoksovka")
+        hidden = Service.objects.create(title="Черновик услуги", slug="draft", is_published=False)
+        empty = Service.objects.create(title="Без кейсов", slug="empty")
+        for svc in (shown, hidden):
+            Case.objects.create(service=svc, title=f"Кейс {svc.slug}", slug=f"case-{svc.slug}", before_image="b.jpg", after_image="a.jpg")
+
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        self.client.force_login(self.admin)
+        with override_settings(STORAGES=TEST_STORAGES):
+            response = self.client.get(reverse("admin:core_case_changelist"))
+            filtered = self.client.get(reverse("admin:core_case_changelist"), {"service": shown.pk})
+        self.assertContains(response, f"?service={shown.pk}")
+        self.assertContains(response, f"?service={hidden.pk}")  # кейсы снятой услуги тоже ищут
+        self.assertNotContains(response, f"?service={empty.pk}")
+        self.assertEqual([c.slug for c in filtered.context["cl"].result_list], ["case-raskoksovka"])
+
+    def test_year_span(self):
+        from .admin import DateSpanQuerySet
+
+        qs = DateSpanQuerySet(Lead)
+        years = [d.year for d in qs.datetimes("created_at", "year")]
+        self.assertEqual(years, [d.year for d in Lead.objects.datetimes("created_at", "year")])
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class LeadIdempotencyTests(TestCase):
+    """lead_create: повтор по токену формы и по телефону в окне LEAD_DEDUP_WINDOW — одна заявка, одно уведомление."""
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        patcher = mock.patch("core.views.notify_lead")
+        self.notify = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, phone, token=""):
+        data = {"name": "Иван", "phone": phone, "lang": "ru", "idempotency_key": token}
+        response = self.client.post(reverse("lead_create"), data)
+        self.assertEqual(response.status_code, 302)
+
+    def test_same_idempotency_key(self):
+        self._post("+996700111222", "tok-1")
+        self._post("+996700111222", "tok-1")
+        self.assertEqual(Lead.objects.count(), 1)
+        self.notify.assert_called_once()
+        # другой воркер с пустым локальным кэшем — отсекает уже БД
+        cache.clear()
+        self._post("+996700111222", "tok-1")
+        self.assertEqual(Lead.objects.count(), 1)
+        self.notify.assert_called_once()
+
+    def test_failed_write_releases_claims(self):
+        from django.db import OperationalError
+
+        with mock.patch("core.views.writequeue.insert", side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                self._post("+996700555666", "tok-x")
+        self.assertFalse(Lead.objects.exists())
+        # повтор с тем же токеном и телефоном — записывается, а не «принято» впустую
+        self._post("+996700555666", "tok-x")
+        self.assertEqual(Lead.objects.count(), 1)
+        self.notify.assert_called_once()
+
+    def test_same_phone_within_window(self):
+        from .leads import LEAD_DEDUP_WINDOW
+
+        self._post("+996700333444", "tok-a")
+        self._post("+996700333444", "tok-b")  # новая вкладка — новый токен, тот же телефон
+        cache.clear()
+        self._post("+996700333444", "tok-c")
+        self.assertEqual(Lead.objects.count(), 1)
+        self.assertEqual(self.notify.call_count, 1)
+
+        # за окном — уже новая заявка
+        Lead.objects.update(created_at=timezone.now() - datetime.timedelta(seconds=LEAD_DEDUP_WINDOW + 60))
+        cache.clear()
+        self._post("+996700333444", "tok-d")
+        self.assertEqual(Lead.objects.count(), 2)
+        self.assertEqual(self.notify.call_count, 2)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class LeadCreateAsyncTests(TestCase):
+    """lead_create_async под AsyncClient: запись, ошибка формы, повтор без второй записи и уведомления."""
+
+    def setUp(self):
+        from django.test import AsyncClient
+
+        cache.clear()
+        self.async_client = AsyncClient()
+        patcher = mock.patch("core.views.anotify_lead")
+        self.notify = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _post(self, **data):
+        from django.contrib.messages import get_messages
+
+        payload = {"name": "Иван", "phone": "+996700444555", "lang": "ru", **data}
+        # у AsyncClient заголовки по умолчанию в ASGI-scope не попадают — только headers= запроса
+        response = await self.async_client.post(reverse("lead_create_async"), payload, headers={"user-agent": "tests"})
+        self.assertEqual(response.status_code, 302)
+        # редирект не открываем — сообщения копятся в куке; нужно последнее
+        return [m.level_tag for m in get_messages(response.asgi_request)][-1]
+
+    async def test_created(self):
+        self.assertEqual(await self._post(idempotency_key="a1"), "success")
+        lead = await Lead.objects.aget()
+        self.assertEqual((lead.phone, lead.idempotency_key), ("+996700444555", "a1"))
+        self.notify.assert_called_once()
+
+    async def test_invalid(self):
+        self.assertEqual(await self._post(phone=""), "error")
+        self.assertFalse(await Lead.objects.aexists())
+        self.notify.assert_not_called()
+
+    async def test_duplicate(self):
+        await self._post(idempotency_key="a2")
+        # тот же токен и тот же телефон с новым токеном — «принято» без записи
+        self.assertEqual(await self._post(idempotency_key="a2"), "success")
+        self.assertEqual(await self._post(idempotency_key="a3"), "success")
+        self.assertEqual(await Lead.objects.acount(), 1)
+        self.notify.assert_called_once()
+
+
+@override_settings(STORAGES=TEST_STORAGES, RATELIMIT_RULES={"lead_create": {"ip": (2, 60), "phone": (5, 600)}})
+class RateLimitTests(TestCase):
+    """RateLimitMiddleware: 429 с Retry-After на обоих бэкендах, 400 для ботов — до запросов к БД."""
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        patcher = mock.patch("core.views.notify_lead")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, phone, website="", **extra):
+        data = {"name": "Иван", "phone": phone, "lang": "ru", "website": website}
+        return self.client.post(reverse("lead_create"), data, **extra)
+
+    def test_too_many_requests(self):
+        from .ratelimit import CacheRateLimiter, MemoryRateLimiter, get_limiter
+
+        for backend, limiter_cls in (("memory", MemoryRateLimiter), ("cache", CacheRateLimiter)):
+            with self.subTest(backend=backend), override_settings(RATELIMIT_BACKEND=backend):
+                cache.clear()
+                self.assertIsInstance(get_limiter(), limiter_cls)
+                for i in range(2):
+                    self.assertEqual(self._post(f"+99670055500{i}").status_code, 302)
+                with self.assertNumQueries(0):
+                    response = self._post("+996700555009")
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response["Retry-After"], "60")
+                # другой IP — своё окно
+                self.assertEqual(self._post("+996700555008", REMOTE_ADDR="10.0.0.2").status_code, 302)
+
+    @override_settings(RATELIMIT_TRUST_X_FORWARDED_FOR=True, RATELIMIT_TRUSTED_PROXIES=1)
+    def test_spoofed_forwarded_for(self):
+        # nginx дописывает реальный адрес в конец; левые адреса клиент меняет как хочет
+        for i in range(2):
+            response = self._post(f"+99670066600{i}", HTTP_X_FORWARDED_FOR=f"1.2.3.{i}, 203.0.113.7")
+            self.assertEqual(response.status_code, 302)
+        response = self._post("+996700666009", HTTP_X_FORWARDED_FOR="9.9.9.9, 203.0.113.7")
+        self.assertEqual(response.status_code, 429)
+        # другой реальный клиент за тем же nginx — своё окно
+        self.assertEqual(self._post("+996700666008", HTTP_X_FORWARDED_FOR="203.0.113.8").status_code, 302)
+
+    def test_bots(self):
+        with self.assertNumQueries(0):
+            honeypot = self._post("+996700555001", website="http://spam.example")
+            no_agent = self._post("+996700555002", HTTP_USER_AGENT="")
+        self.assertEqual((honeypot.status_code, no_agent.status_code), (400, 400))
+        self.assertFalse(Lead.objects.exists())
+
+
+@override_settings(SQLITE_WRITE_QUEUE=True)
+class WriteQueueTests(TransactionTestCase):
+    """core/writequeue.py: группа коммитится одной транзакцией, post_save(created=True), плохая строка падает одна."""
+
+    def setUp(self):
+        from django.db.models.signals import post_save
+
+        from . import writequeue
+
+        # свой экземпляр с долгим добором — чтобы все строки гарантированно попали в одну группу
+        self.queue = writequeue.WriteQueue(max_wait=0.2)
+        self.addCleanup(self.queue.stop)
+        patcher = mock.patch.object(writequeue, "_write_queue", self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.saved = []
+
+        def handler(sender, instance, created, **kwargs):
+            self.saved.append((instance.pk, created))
+
+        post_save.connect(handler, sender=Lead, weak=False)
+        self.addCleanup(post_save.disconnect, handler, sender=Lead)
+
+    def test_batch_commits(self):
+        from . import writequeue
+
+        futures = [self.queue.submit(Lead(name=f"N{i}", phone=f"+99670077700{i}")) for i in range(5)]
+        leads = [f.result(5) for f in futures]
+        self.assertTrue(all(lead.pk for lead in leads))
+        self.assertEqual(Lead.objects.count(), 5)  # видно из другого соединения — закоммичено
+        self.assertEqual(sorted(self.saved), sorted((lead.pk, True) for lead in leads))
+        self.assertEqual((self.queue.stats.batches, self.queue.stats.max_batch), (1, 5))
+        self.assertEqual(LeadDailyStat.objects.get().leads, 5)  # сигнал сводок отработал
+
+        lead = writequeue.insert(Lead(name="Через insert", phone="+996700777999"))
+        self.assertTrue(Lead.objects.filter(pk=lead.pk).exists())
+
+    def test_bad_row_fails_alone(self):
+        from django.db import IntegrityError
+
+        Lead.objects.create(name="Было", phone="+996700888000", idempotency_key="taken")
+        self.saved.clear()
+        futures = [
+            self.queue.submit(Lead(name="A", phone="+996700888001")),
+            self.queue.submit(Lead(name="Дубль", phone="+996700888002", idempotency_key="taken")),
+            self.queue.submit(Lead(name="B", phone="+996700888003")),
+        ]
+        good = [futures[0].result(5), futures[2].result(5)]
+        with self.assertRaises(IntegrityError):
+            futures[1].result(5)
+        self.assertEqual(Lead.objects.count(), 3)
+        self.assertEqual(sorted(self.saved), sorted((lead.pk, True) for lead in good))
+        self.assertEqual(self.queue.stats.failed_rows, 1)
+
+
+class LeadStatsTests(TestCase):
+    """core/leadstats.py: инкрементальные сводки совпадают с пересчётом из Lead."""
+
+    def _snapshot(self):
+        return sorted(LeadDailyStat.objects.values_list(
+            "day", "service_pk", "lang", "utm_source", "utm_medium", "utm_campaign", "leads", "in_work", "done",
+        ))
+
+    def test_incremental_matches_rebuild(self):
+        service = Service.objects.create(title="S", slug="s")
+        leads = [
+            Lead.objects.create(name=f"N{i}", phone=f"+99670000{i:04d}", service=service if i % 2 else None,
+                                utm_source="google" if i % 3 else "", utm_campaign="spring")
+            for i in range(12)
+        ]
+        leads[0].status = Lead.Status.INWORK
+        leads[0].save()
+        leads[0].status = Lead.Status.DONE
+        leads[0].save()
+        leadstats.apply_status(Lead.objects.filter(pk__in=[l.pk for l in leads[1:5]]), Lead.Status.DONE)
+        incremental = self._snapshot()
+        leadstats.rebuild()
+        self.assertEqual(incremental, self._snapshot())
+        self.assertEqual(sum(row[-1] for row in incremental), 5)
+
+    def test_dashboard_reads_rollups_only(self):
+        from django.contrib.auth.models import User
+
+        Lead.objects.create(name="N", phone="+996700000000", utm_source="ig")
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pass"))
+        with override_settings(STORAGES=TEST_STORAGES), query_budget(4) as log:  # сессия, пользователь, меню админки, сводка
+            response = self.client.get(reverse("lead_stats"), {"group": "utm_source"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q.sql for q in log.queries if '"core_lead"' in q.sql])
+        self.assertEqual([(r["label"], r["leads"]) for r in response.context["rows"]], [("ig", 1)])
+
+
+class LeadArchiveTests(TestCase):
+    """core/lead_archive.py: перенос пачками, чтение архива, сводки не меняются."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        override = override_settings(LEAD_ARCHIVE_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_archive_and_read(self):
+        for i in range(7):
+            Lead.objects.create(name=f"N{i}", phone=f"+996 700 000 {i:03d}", status="done" if i % 2 else "new")
+        old = timezone.make_aware(datetime.datetime(2024, 1, 15, 12))
+        Lead.objects.filter(pk__lte=Lead.objects.order_by("pk")[4].pk).update(created_at=old)
+        stats_before = list(LeadDailyStat.objects.values_list("leads", "done"))
+
+        stats = lead_archive.archive(lead_archive.retention_cutoff(6), chunk_size=2)
+        self.assertEqual((stats["archived"], stats["chunks"], stats["months"]), (5, 3, {(2024, 1)}))
+        self.assertEqual(Lead.objects.count(), 2)
+        self.assertEqual(lead_archive.months(), [(2024, 1)])
+        self.assertEqual(list(LeadDailyStat.objects.values_list("leads", "done")), stats_before)
+
+        rows = list(lead_archive.iter_leads())
+        self.assertEqual([r["name"] for r in rows], [f"N{i}" for i in range(5)])
+        self.assertEqual(rows[0]["created_at"], old)
+        self.assertEqual([r["name"] for r in lead_archive.iter_leads(phone="996700000003")], ["N3"])
+        self.assertEqual(len(list(lead_archive.iter_leads(status="done"))), 2)
+        self.assertEqual(list(lead_archive.iter_leads(date_from=datetime.date(2024, 2, 1))), [])
+        # повторный запуск — ничего не переносит
+        self.assertEqual(lead_archive.archive(lead_archive.retention_cutoff(6))["archived"], 0)
+
+    def _archive_old(self, names):
+        old = timezone.make_aware(datetime.datetime(2024, 1, 15, 12))
+        for name in names:
+            Lead.objects.create(name=name, phone="+996700000000")
+        Lead.objects.update(created_at=old)
+        return lead_archive.archive(lead_archive.retention_cutoff(6), chunk_size=1)
+
+    def test_torn_member_then_more_appends(self):
+        import gzip
+
+        self._archive_old(["A", "B"])
+        path = lead_archive.month_path(2024, 1)
+        # сбой посреди write: половина следующего члена
+        torn = gzip.compress(b'{"id": 999, "name": "torn"}\n' * 50)
+        with open(path, "ab") as fh:
+            fh.write(torn[: len(torn) // 2])
+
+        self.assertEqual([r["name"] for r in lead_archive.iter_leads()], ["A", "B"])
+        self._archive_old(["C"])
+        self.assertEqual([r["name"] for r in lead_archive.iter_leads()], ["A", "B", "C"])
+
+        # файл, испорченный до обрезки хвоста: битый член в середине, целые — после него
+        with open(path, "ab") as fh:
+            fh.write(torn[: len(torn) // 2])
+            fh.write(gzip.compress(b'{"id": 1000, "name": "D", "created_at": "2024-01-15T12:00:00+06:00", '
+                                   b'"updated_at": "2024-01-15T12:00:00+06:00", "phone": ""}\n'))
+        self.assertEqual([r["name"] for r in lead_archive.iter_leads()], ["A", "B", "C", "D"])
+
+
+@override_settings(STORAGES=TEST_STORAGES, PERF_SERVER_TIMING="staff")
+class PerfMiddlewareAsyncTests(TestCase):
+    """PerfMiddleware под ASGI: пользователь — через auser(), без SynchronousOnlyOperation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.staff = User.objects.create_user("staff", password="pass", is_staff=True)
+        cls.user = User.objects.create_user("user", password="pass")
+
+    async def test_logged_in_users(self):
+        from django.test import AsyncClient
+
+        for user, has_timing in ((self.staff, True), (self.user, False)):
+            client = AsyncClient(HTTP_USER_AGENT="tests")
+            await client.aforce_login(user)
+            for name in ("contacts", "faq_page"):
+                with self.subTest(user=user.username, page=name):
+                    response = await client.get(reverse(name))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual("Server-Timing" in response, has_timing)
+                    if has_timing:
+                        # запросы сессии и пользователя входят в замер
+                        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+
+@skipUnless(SEPARATE_REPLICA, "нужен профиль avtohim_site.settings_test")
+@override_settings(STORAGES=TEST_STORAGES, DB_REPLICA_READS=True)
+class ReplicaRoutingTests(TestCase):
+    """
+    core/db_routers.py: в settings_test "replica" — отдельная пустая база,
+    так видно, откуда пришли строки. Публичные страницы читают с реплики,
+    запись, сессии и пользователи — с primary.
+    """
+
+    databases = {"default", "replica"} if SEPARATE_REPLICA else {"default"}
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+
+    def test_public_view_reads_replica(self):
+        from django.contrib.auth.models import User
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        Service.objects.using("replica").create(title="Услуга с реплики", slug="from-replica")
+        Service.objects.create(title="Услуга с primary", slug="from-primary")
+        self.client.force_login(User.objects.create_user("staff", password="pass", is_staff=True))
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.get(reverse("service_list"))
+        self.assertContains(response, "Услуга с реплики")
+        self.assertNotContains(response, "Услуга с primary")
+        sql = " ".join(q["sql"] for q in replica_queries)
+        self.assertIn("core_service", sql)
+        self.assertNotIn("django_session", sql)
+        self.assertNotIn("auth_user", sql)
+
+    def test_writes_and_sessions_stay_on_primary(self):
+        from django.contrib.auth.models import User
+        from django.contrib.sessions.models import Session
+        from django.db import router
+
+        from . import db_routers
+
+        with db_routers.replica_reads():
+            self.assertEqual(router.db_for_read(Service), "replica")
+            self.assertEqual(router.db_for_write(Service), "default")
+            for model in (Session, User):
+                self.assertEqual(router.db_for_read(model), "default")
+        self.assertEqual(router.db_for_read(Service), "default")
+
+        response = self.client.post(reverse("lead_create"), {"name": "Иван", "phone": "+996700123456", "lang": "ru"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Lead.objects.using("default").count(), 1)
+        self.assertFalse(Lead.objects.using("replica").exists())
+
+
+class MediaServeTests(TestCase):
+    """core/media.py: кэш-заголовки, 304 и Range."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._media = tempfile.mkdtemp()
+        cls._media_override = override_settings(MEDIA_ROOT=cls._media, MEDIA_SENDFILE="", STORAGES=TEST_STORAGES)
+        cls._media_override.enable()
+        for name, payload in (("docs/a.bin", bytes(range(256)) * 4), ("cache/ab/cd/t.webp", b"webp")):
+            path = os.path.join(cls._media, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                fh.write(payload)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._media_override.disable()
+        shutil.rmtree(cls._media, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.defaults["HTTP_USER_AGENT"] = "tests"
+
+    def _body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_full_and_not_modified(self):
+        response = self.client.get("/media/docs/a.bin")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._body(response)), 1024)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertNotIn("immutable", response["Cache-Control"])
+        again = self.client.get("/media/docs/a.bin", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_thumbnails_are_immutable(self):
+        response = self.client.get("/media/cache/ab/cd/t.webp")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Content-Type"], "image/webp")
+
+    def test_ranges(self):
+        cases = {"bytes=10-19": (10, 19), "bytes=1000-": (1000, 1023), "bytes=-4": (1020, 1023)}
+        for header, (start, end) in cases.items():
+            with self.subTest(range=header):
+                response = self.client.get("/media/docs/a.bin", HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/1024")
+                self.assertEqual(self._body(response), (bytes(range(256)) * 4)[start:end + 1])
+        self.assertEqual(self.client.get("/media/docs/a.bin", HTTP_RANGE="bytes=2000-").status_code, 416)
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 404)
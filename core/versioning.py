@@ -0,0 +1,73 @@
+# core/versioning.py
+"""
+Версии контента для ключей производных кэшей (JSON-LD, фрагменты, лента).
+
+Версия — отпечаток таблиц, из которых собран кэш (core/freshness.py:
+MAX(updated_at) + COUNT), а не счётчик в кэше: CACHES по умолчанию —
+LocMem в памяти воркера, и счётчик, увеличенный в одном процессе
+(сигнал, manage.py), другие воркеры не увидели бы до таймаута кэша.
+Отпечаток читается из БД — его видят все процессы.
+
+Все таблицы снимаются одним запросом и запоминаются в процессе на
+VERSION_STAMP_TTL секунд: правку из другого процесса видно не позже
+чем через столько. bump_version() сбрасывает запомненное — свои правки
+процесс видит сразу.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .freshness import stamp_digest, table_stamps
+from .models import FAQ, Branch, Case, Review, Service, SiteSettings
+
+# префикс имени версии ("service:12" -> "service") -> таблицы, из которых собран кэш
+VERSION_SOURCES = {
+    "layout": (SiteSettings, Branch),
+    "reviews": (Review,),
+    "faq": (FAQ,),
+    "service": (Service, FAQ),
+    # галерея кейсов фильтрует и по публикации услуги
+    "cases": (Service, Case),
+}
+_MODELS = tuple(dict.fromkeys(model for models in VERSION_SOURCES.values() for model in models))
+
+_memo = None  # (monotonic-время снятия, {модель: штамп})
+_lock = threading.Lock()
+
+
+def _stamps() -> dict:
+    global _memo
+    memo = _memo
+    if memo is None or time.monotonic() - memo[0] > settings.VERSION_STAMP_TTL:
+        with _lock:
+            memo = _memo
+            if memo is None or time.monotonic() - memo[0] > settings.VERSION_STAMP_TTL:
+                stamps = table_stamps([(model, "updated_at") for model in _MODELS])
+                memo = _memo = (time.monotonic(), dict(zip(_MODELS, stamps)))
+    return memo[1]
+
+
+def get_version(name: str) -> str:
+    stamps = _stamps()
+    return stamp_digest(*(stamps[model] for model in VERSION_SOURCES[name.split(":", 1)[0]]))
+
+
+def get_versions(*names: str) -> tuple:
+    """Несколько версий по одному снимку таблиц."""
+    return tuple(get_version(name) for name in names)
+
+
+def _forget():
+    global _memo
+    _memo = None
+
+
+def bump_version(name: str) -> None:
+    """
+    После записи: забыть снимок, чтобы этот процесс сразу увидел правку.
+    Ещё раз — после коммита: снимок, снятый до коммита, был бы старым.
+    """
+    _forget()
+    transaction.on_commit(_forget)
@@ -1,22 +1,38 @@
 # core/views.py
+import datetime
 import json
 import urllib.request
 
 import os, requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib import messages
-from django.http import HttpResponseRedirect, JsonResponse
+from django.contrib import admin, messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import IntegrityError
+from django.contrib.sites.requests import RequestSite
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.safestring import mark_safe
 from django.utils.translation import get_language, gettext as _
-from django.views.decorators.http import require_POST, require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET, require_POST, require_http_methods
+from django.views.decorators.vary import vary_on_headers
+
+from . import gallery, leads, leadstats, media, perf, reviews, sitemaps, writequeue
+from .conditional import conditional_page
 
 from .forms import LeadForm, ReviewForm
-from .models import Service, Case, FAQ, Review, Lead, Product, ProductCategory, Brand, FAQ
-from .tele_notify import notify_lead
+from .models import Service, Case, FAQ, Review, Lead, Product, ProductCategory, ProductImage, Brand
+from .tele_notify import anotify_lead, notify_lead
 
 
 
+@conditional_page((Service, "updated_at"), (Review, "updated_at"))
 def home(request):
     services = Service.objects.filter(is_published=True).order_by("order")
     form = LeadForm(initial={
@@ -40,13 +56,15 @@ def _localized_slug_filter(field_base: str, slug_value: str):
     field = f"{field_base}_{lang}" if lang != settings.LANGUAGE_CODE else field_base
     return {field: slug_value}
 
+@conditional_page((Service, "updated_at"))
 def service_list(request):
     services = Service.objects.filter(is_published=True).order_by("order")
     return render(request, "services/list.html", {"services": services})
 
+@conditional_page((Service, "updated_at"), (Case, "updated_at"), (FAQ, "updated_at"), (Review, "updated_at"))
 def service_detail(request, slug):
     svc = get_object_or_404(Service, is_published=True, **_localized_slug_filter("slug", slug))
-    cases = svc.cases.filter(is_published=True)[:9]
+    cases_html = gallery.cases_page(svc.pk)
     faqs = svc.faqs.filter(is_published=True).order_by("order", "id")
     reviews = Review.objects.filter(is_published=True)[:6]
 
@@ -59,10 +77,24 @@ def service_detail(request, slug):
     })
 
     return render(request, "services/detail.html", {
-        "service": svc, "cases": cases, "faqs": faqs, "reviews": reviews,
+        "service": svc, "cases_html": mark_safe(cases_html), "faqs": faqs, "reviews": reviews,
         "LeadForm": LeadForm, "form_lead": form
     })
 
+@require_GET
+@vary_on_headers("HX-Request")
+def service_cases(request, service_id, page):
+    """Следующая страница галереи кейсов для HTMX; без HTMX — на страницу услуги."""
+    if page < 1:
+        raise Http404
+    if not request.htmx:
+        svc = get_object_or_404(Service, pk=service_id, is_published=True)
+        return redirect(svc.get_absolute_url())
+    html = gallery.cases_page(service_id, page)
+    if not html:
+        raise Http404
+    return HttpResponse(html)
+
 def _post_to_n8n(payload: dict):
     """
     Отправка данных в n8n, если настроен WEBHOOK.
@@ -80,41 +112,56 @@ def _post_to_n8n(payload: dict):
         # логировать по желанию
         pass
 
-@require_POST
-def lead_create(request):
-    form = LeadForm(request.POST)
-    if not form.is_valid():
-        return JsonResponse({"ok": False, "errors": form.errors}, status=400)
-
-    lead = form.save()  # у тебя уже сохранение в БД
-
-    # Вебхук в n8n (не блокируем пользователя при сбое)
-    url = getattr(settings, "N8N_WEBHOOK_URL", "")
-    if url:
-        try:
-            payload = {
-                "id": lead.id,
-                "name": lead.name,
-                "phone_e164": lead.phone_e164,
-                "service": getattr(lead.service, "title", ""),
-                "comment": lead.comment,
-                "utm_source": lead.utm_source,
-                "utm_medium": lead.utm_medium,
-                "utm_campaign": lead.utm_campaign,
-                "lang": request.LANGUAGE_CODE,
-            }
-            requests.post(url, json=payload, timeout=5)
-        except Exception:
-            pass  # просто логируй при желании
-
-    return JsonResponse({"ok": True})
-    
 def contacts(request):
     return render(request, "contacts.html")
 
-def faq_page(request):
-    faqs = FAQ.objects.filter(is_published=True, service__isnull=True).order_by("order","id")
-    return render(request, "faq.html", {"faqs": faqs})
+@require_GET
+def sitemap_index(request):
+    protocol, domain = request.scheme, RequestSite(request).domain
+    stamps = sitemaps.section_stamps()
+    key = sitemaps.index_cache_key(protocol, domain, stamps)
+    xml = cache.get(key)
+    if xml is None:
+        xml = sitemaps.render_index(protocol, domain, stamps)
+        cache.set(key, xml, sitemaps.SITEMAP_CACHE_TIMEOUT)
+    return HttpResponse(xml, content_type="application/xml")
+
+@require_GET
+def sitemap_section(request, section):
+    if section not in sitemaps.SITEMAPS:
+        raise Http404
+    try:
+        page = int(request.GET.get("p", 1))
+    except ValueError:
+        raise Http404
+    sitemap = sitemaps.SITEMAPS[section]
+    stamp = sitemap.stamp()
+    protocol, domain = request.scheme, RequestSite(request).domain
+    key = sitemaps.section_cache_key(section, page, protocol, domain, stamp)
+    xml = cache.get(key)
+    if xml is not None:
+        # в кэше только существующие страницы — число страниц не считаем
+        return HttpResponse(xml, content_type="application/xml")
+    if not 1 <= page <= sitemap.num_pages(stamp):
+        raise Http404
+    # секция поменялась — собираем заново и отдаём потоком
+    chunks = sitemaps.render_section(section, page, protocol, domain)
+    return StreamingHttpResponse(sitemaps.cached_stream(key, chunks), content_type="application/xml")
+
+@require_GET
+@cache_control(public=True, max_age=60 * 60 * 24)
+def robots_txt(request):
+    lines = [
+        "User-agent: *",
+        "Disallow: /admin/",
+        "Disallow: /*/admin/",
+        "Disallow: /i18n/",
+        "Disallow: /lead/",
+        "Disallow: /*/lead/",
+        "",
+        f"Sitemap: {request.build_absolute_uri(reverse('sitemap_index'))}",
+    ]
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain")
 
 def error_404(request, exception):
     return render(request, "errors/404.html", status=404)
@@ -122,8 +169,9 @@ def error_404(request, exception):
 def error_500(request):
     return render(request, "errors/500.html", status=500)
 
+@conditional_page((Product, "updated_at"), (ProductCategory, "updated_at"), (Brand, "updated_at"))
 def product_list(request):
-    qs = Product.objects.filter(is_published=True)
+    qs = Product.objects.filter(is_published=True).select_related("brand")
     cat_slug = request.GET.get("cat")
     brand_slug = request.GET.get("brand")
     if cat_slug:
@@ -139,6 +187,9 @@ def product_list(request):
         "brands": brands,
     })
 
+@conditional_page(
+    (Product, "updated_at"), (ProductImage, "updated_at"), (ProductCategory, "updated_at"), (Brand, "updated_at")
+)
 def product_detail(request, slug):
     product = get_object_or_404(Product, slug=slug, is_published=True)
     # ссылка в WhatsApp с префиллом
@@ -149,35 +200,94 @@ def product_detail(request, slug):
         "whatsapp_link": whatsapp_link,
     })
 
+def _lead_accepted(request):
+    messages.success(request, "Спасибо! Мы свяжемся с вами в ближайшее время.")
+    return redirect("home")
+
+def _lead_rejected(request):
+    messages.error(request, "Проверьте корректность данных в форме.")
+    # если у вас на главной эта форма, верните тот же шаблон с контекстом
+    return redirect("home")
+
 @require_POST
 def lead_create(request):
     form = LeadForm(request.POST)
-    if form.is_valid():
-        lead = form.save()
-
-        # Сформируем данные для телеги
-        payload = {
-            "name": getattr(lead, "name", "") or request.POST.get("name"),
-            "phone_e164": getattr(lead, "phone_e164", "") or request.POST.get("phone"),
-            "service": getattr(lead, "service_name", "") or request.POST.get("service"),
-            "comment": getattr(lead, "comment", "") or request.POST.get("comment"),
-            "utm_source": request.POST.get("utm_source"),
-            "utm_medium": request.POST.get("utm_medium"),
-            "utm_campaign": request.POST.get("utm_campaign"),
-        }
-        notify_lead(payload)  # ← отправка в Telegram
-
-        messages.success(request, "Спасибо! Мы свяжемся с вами в ближайшее время.")
-        return redirect("home")
+    if not form.is_valid():
+        return _lead_rejected(request)
+
+    phone = form.cleaned_data["phone"]
+    token = form.cleaned_data.get("idempotency_key") or ""
+    if leads.is_duplicate(phone, token):
+        # повтор уже принятой заявки: тот же ответ, без записи и уведомлений
+        return _lead_accepted(request)
+    try:
+        lead = writequeue.insert(form.save(commit=False))
+    except IntegrityError:
+        # тот же токен успел записать параллельный запрос
+        return _lead_accepted(request)
+    except Exception:
+        # "database is locked", таймаут очереди — заявки нет, повтор должен пройти
+        leads.release(phone, token)
+        raise
+
+    notify_lead(leads.lead_payload(lead))  # ← отправка в Telegram
+    return _lead_accepted(request)
+
+@require_POST
+async def lead_create_async(request):
+    """
+    Async-вариант lead_create для ASGI-деплоя: запись через async ORM,
+    уведомление — задачей в event loop, поток из sync-пула не занимается.
+    """
+    form = LeadForm(request.POST)
+    # ModelChoiceField(service) валидируется запросом в БД — это sync-код
+    if not await sync_to_async(form.is_valid)():
+        return _lead_rejected(request)
+
+    phone = form.cleaned_data["phone"]
+    token = form.cleaned_data.get("idempotency_key") or ""
+    if await leads.ais_duplicate(phone, token):
+        return _lead_accepted(request)
+    lead = form.save(commit=False)
+    try:
+        await writequeue.ainsert(lead)
+    except IntegrityError:
+        return _lead_accepted(request)
+    except Exception:
+        await leads.arelease(phone, token)
+        raise
+
+    payload = leads.lead_payload(lead)
+    if isinstance(request, ASGIRequest):
+        anotify_lead(payload)
     else:
-        messages.error(request, "Проверьте корректность данных в форме.")
-        # если у вас на главной эта форма, верните тот же шаблон с контекстом
-        return redirect("home")
-    
+        # под WSGI event loop живёт только на время запроса — задача бы не успела
+        notify_lead(payload)
+    return _lead_accepted(request)
+
+@conditional_page((FAQ, "updated_at"))
 def faq_page(request):
-    faqs = FAQ.objects.filter(is_published=True).order_by('order') if hasattr(FAQ, 'objects') else []
+    faqs = FAQ.objects.filter(is_published=True).order_by("order", "id")
     return render(request, "faq/page.html", {"faqs": faqs})
 
+@require_GET
+@vary_on_headers("HX-Request")
+def review_list(request):
+    """Все отзывы с фильтрами; HTMX-запрос с ?cursor= получает только следующую страницу."""
+    filters = reviews.parse_filters(request.GET)
+    cursor = request.GET.get("cursor") or None
+    if cursor and reviews.decode_cursor(cursor) is None:
+        raise Http404
+    page_html = mark_safe(reviews.page_html(filters, cursor))
+    if request.htmx:
+        return HttpResponse(page_html)
+    return render(request, "reviews/list.html", {
+        "page_html": page_html,
+        "filters": filters,
+        "ratings": reviews.RATINGS,
+        "sources": Review.Source.choices,
+    })
+
 @require_http_methods(["GET", "POST"])
 def review_create(request):
     if request.method == "POST":
@@ -185,7 +295,7 @@ def review_create(request):
         if form.is_valid():
             obj = form.save(commit=False)
             # по желанию: obj.is_published = False  # премодерация
-            obj.save()
+            writequeue.insert(obj)
             messages.success(request, "Спасибо! Ваш отзыв отправлен на модерацию.")
             return redirect("home")  # или на страницу «спасибо»
     else:
@@ -193,6 +303,46 @@ def review_create(request):
 
     return render(request, "reviews/create.html", {"form": form})
 
+@require_http_methods(["GET", "HEAD"])
+def media_file(request, path):
+    """Файлы MEDIA_ROOT: Range, долгий кэш миниатюр, sendfile (см. core/media.py)."""
+    return media.serve(request, path)
+
+@staff_member_required
+@require_GET
+def db_write_stats(request):
+    """Метрики очереди записи SQLite (текущий процесс) — для staff."""
+    return JsonResponse(writequeue.metrics())
+
+@staff_member_required
+@require_GET
+def perf_stats(request):
+    """Гистограммы замеров по view (core/perf.py) — для staff."""
+    return JsonResponse(perf.report(), json_dumps_params={"ensure_ascii": False, "default": str})
+
+def _date_param(request, name):
+    try:
+        return parse_date(request.GET.get(name) or "")
+    except ValueError:  # формат верный, даты нет (2026-02-30)
+        return None
+
+@staff_member_required
+@require_GET
+def lead_stats(request):
+    """Заявки по дням/услугам/языкам/UTM за период — только из сводок (core/leadstats.py)."""
+    date_to = _date_param(request, "to") or timezone.localdate()
+    date_from = _date_param(request, "from") or date_to - datetime.timedelta(days=29)
+    group = request.GET.get("group") if request.GET.get("group") in leadstats.GROUPINGS else "day"
+    return render(request, "staff/lead_stats.html", {
+        **admin.site.each_context(request),
+        "title": "Заявки: сводка",
+        "date_from": date_from,
+        "date_to": date_to,
+        "group": group,
+        "groupings": leadstats.GROUPINGS,
+        **leadstats.report(date_from, date_to, group),
+    })
+
 def notify_tg(text):
     token = settings.TELEGRAM_BOT_TOKEN
     chat_id = settings.TELEGRAM_CHAT_ID
@@ -0,0 +1,165 @@
+# core/warmup.py
+"""
+Прогрев воркера при старте: после выкладки первый запрос в каждый воркер
+грузит каталоги переводов, собирает резолверы i18n_patterns, открывает
+SQLite, заполняет пустые кэши и разбирает шаблоны. run() делает всё это
+заранее и возвращает время по шагам.
+
+Вызывается из wsgi.py/asgi.py (WARMUP=1 — всё, WARM_TEMPLATES=1 — только
+шаблоны) и командой manage.py warmup. С gunicorn --preload хук выполнится
+в мастере до fork — тогда соединение с БД закрываем (WARMUP_CLOSE_DB=1),
+иначе потомки унаследуют один и тот же файловый дескриптор SQLite.
+
+warm_templates() с кэширующим загрузчиком (settings_prod.py) оставляет
+скомпилированные шаблоны в памяти процесса; manage.py warm_templates
+заодно ловит синтаксические ошибки в шаблонах до выкладки.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver, reverse
+from django.utils import translation
+
+log = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = (".html", ".txt", ".xml")
+
+
+def _template_names(directory):
+    for root, _dirs, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, "/")
+
+
+def warm_templates(include_apps=False):
+    """Компилирует шаблоны; возвращает {"compiled", "errors", "seconds"}."""
+    started = time.perf_counter()
+    compiled, errors = 0, {}
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        dirs = engine.template_dirs if include_apps else engine.dirs
+        seen = set()
+        for directory in dirs:
+            for name in _template_names(directory):
+                if name in seen:  # перекрытый шаблон загрузчик всё равно возьмёт первый
+                    continue
+                seen.add(name)
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError as exc:
+                    errors[name] = str(exc)
+                else:
+                    compiled += 1
+    result = {"compiled": compiled, "errors": errors, "seconds": round(time.perf_counter() - started, 3)}
+    for name, error in errors.items():
+        log.warning("warm_templates: %s: %s", name, error)
+    return result
+
+
+# ---------- шаги ----------
+
+def _languages():
+    return [code for code, _ in settings.LANGUAGES]
+
+
+def _step_translations():
+    # activate() грузит и кэширует каталог .mo (свой + Django + приложений)
+    for lang in _languages():
+        with translation.override(lang):
+            translation.gettext("Home")
+    return f"{len(_languages())} языков"
+
+
+def _step_urls():
+    resolver = get_resolver()
+    # reverse_dict/populate считаются отдельно для каждого языка i18n_patterns
+    for lang in _languages():
+        with translation.override(lang):
+            resolver.reverse_dict  # noqa: B018
+            reverse("home")
+            resolver.resolve(reverse("home"))
+    return f"{len(resolver.reverse_dict)} имён"
+
+
+def _step_modeltranslation():
+    from modeltranslation.translator import translator
+
+    models = translator.get_registered_models()
+    for model in models:
+        translator.get_options_for_model(model)
+    return f"{len(models)} моделей"
+
+
+def _step_database():
+    names = []
+    for alias in connections:
+        conn = connections[alias]
+        conn.ensure_connection()  # на connection_created — PRAGMA профиля (core/sqlite_profile.py)
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        names.append(alias)
+    return ", ".join(names)
+
+
+def _step_caches():
+    from .context_processors import get_branches, get_rating, get_siteset
+
+    get_siteset()
+    branches = get_branches()
+    rating = get_rating()
+    return f"филиалов {len(branches)}, отзывов {rating['count']}"
+
+
+def _step_templates():
+    result = warm_templates()
+    return f"{result['compiled']} шаблонов" + (f", ошибок {len(result['errors'])}" if result["errors"] else "")
+
+
+STEPS = [
+    ("translations", _step_translations),
+    ("urls", _step_urls),
+    ("modeltranslation", _step_modeltranslation),
+    ("database", _step_database),
+    ("caches", _step_caches),
+    ("templates", _step_templates),
+]
+
+
+def run(steps=None):
+    """Выполняет шаги (по умолчанию все); [{"step", "ms", "detail"|"error"}].
+
+    Ошибка шага не валит старт воркера — пишется в лог и в результат.
+    """
+    report = []
+    for name, func in STEPS:
+        if steps and name not in steps:
+            continue
+        t0 = time.perf_counter()
+        row = {"step": name}
+        try:
+            row["detail"] = func()
+        except Exception as exc:
+            log.exception("warmup: шаг %s упал", name)
+            row["error"] = f"{exc.__class__.__name__}: {exc}"
+        row["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        report.append(row)
+    if os.getenv("WARMUP_CLOSE_DB") == "1":
+        connections.close_all()
+    log.info("warmup: %s", ", ".join(f"{r['step']} {r['ms']} ms" for r in report))
+    return report
+
+
+def run_from_env():
+    """Хук для wsgi.py/asgi.py."""
+    if os.getenv("WARMUP") == "1":
+        return run()
+    if os.getenv("WARM_TEMPLATES") == "1":
+        return run(["templates"])
+    return None
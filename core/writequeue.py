@@ -0,0 +1,257 @@
+# core/writequeue.py
+"""
+Единый писатель для append-only таблиц (Lead, Review) на SQLite.
+
+SQLite пускает одного писателя за раз: параллельные INSERT из потоков
+воркера толкаются за блокировку и ждут до OPTIONS["timeout"]. Здесь все
+вставки идут через одну нить, которая собирает их в небольшие группы
+и коммитит одной транзакцией (bulk_create на модель) — вместо N
+коммитов и N fsync на N запросов.
+
+Вызывающий код получает Future и ждёт коммита (sync — result(), async —
+await asyncio.wrap_future(), без занятого потока). После коммита
+рассылается post_save(created=True), как при обычном save().
+
+Метрики (metrics()): размер групп, время ожидания в очереди и время
+ожидания блокировки записи — длительность первого пишущего оператора
+транзакции (BEGIN IMMEDIATE или первый INSERT при deferred-транзакции).
+"""
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, OperationalError, connections, transaction
+from django.db.models.signals import post_save
+
+WRITE_QUEUE_BATCH = getattr(settings, "SQLITE_WRITE_QUEUE_BATCH", 50)
+WRITE_QUEUE_MAX_WAIT = getattr(settings, "SQLITE_WRITE_QUEUE_MAX_WAIT", 0.002)  # сек. добора группы
+WRITE_QUEUE_TIMEOUT = 30  # сколько вызывающий ждёт коммита
+
+_STOP = object()
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.batches = 0
+        self.rows = 0
+        self.failed_rows = 0
+        self.locked_errors = 0
+        self.max_batch = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.lock_wait_total = 0.0
+        self.lock_wait_max = 0.0
+        self.commit_total = 0.0
+
+    def record_batch(self, size, queue_waits, lock_wait, commit_time):
+        with self._lock:
+            self.batches += 1
+            self.rows += size
+            self.max_batch = max(self.max_batch, size)
+            self.queue_wait_total += sum(queue_waits)
+            self.queue_wait_max = max(self.queue_wait_max, max(queue_waits, default=0.0))
+            self.lock_wait_total += lock_wait
+            self.lock_wait_max = max(self.lock_wait_max, lock_wait)
+            self.commit_total += commit_time
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            batches = self.batches or 1
+            rows = self.rows or 1
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "failed_rows": self.failed_rows,
+                "locked_errors": self.locked_errors,
+                "avg_batch": round(self.rows / batches, 2),
+                "max_batch": self.max_batch,
+                "queue_wait_avg_ms": round(self.queue_wait_total / rows * 1000, 3),
+                "queue_wait_max_ms": round(self.queue_wait_max * 1000, 3),
+                "lock_wait_avg_ms": round(self.lock_wait_total / batches * 1000, 3),
+                "lock_wait_max_ms": round(self.lock_wait_max * 1000, 3),
+                "commit_avg_ms": round(self.commit_total / batches * 1000, 3),
+            }
+
+
+class _LockWaitProbe:
+    """execute_wrapper: меряет первый оператор транзакции — на нём SQLite берёт блокировку записи."""
+
+    def __init__(self):
+        self.first = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.first is not None:
+            return execute(sql, params, many, context)
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.first = time.perf_counter() - t0
+
+
+class WriteQueue:
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=WRITE_QUEUE_BATCH, max_wait=WRITE_QUEUE_MAX_WAIT):
+        self.using = using
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.stats = _Stats()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    # ---------- API ----------
+
+    def submit(self, obj) -> Future:
+        """Ставит несохранённый объект в очередь на INSERT."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((obj, future, time.perf_counter()))
+        return future
+
+    def save(self, obj, timeout=WRITE_QUEUE_TIMEOUT):
+        """Синхронно: дождаться коммита; ошибки записи пробрасываются как при save()."""
+        self.submit(obj).result(timeout)
+        return obj
+
+    def stop(self, timeout=5):
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    # ---------- нить-писатель ----------
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                self._write(self._collect(first))
+        finally:
+            connections[self.using].close()
+
+    def _write(self, batch):
+        connection = connections[self.using]
+        connection.close_if_unusable_or_obsolete()
+        started = time.perf_counter()
+        queue_waits = [started - enqueued for _, _, enqueued in batch]
+        probe = _LockWaitProbe()
+        try:
+            with connection.execute_wrapper(probe):
+                with transaction.atomic(using=self.using):
+                    self._insert_grouped(batch)
+        except IntegrityError:
+            # одна плохая строка не должна ронять всю группу — пишем по одной
+            self._write_one_by_one(batch, queue_waits, started)
+            return
+        except Exception as exc:
+            if isinstance(exc, OperationalError):
+                self.stats.locked_errors += 1
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            self.stats.failed_rows += len(batch)
+            return
+        self.stats.record_batch(len(batch), queue_waits, probe.first or 0.0, time.perf_counter() - started)
+        self._after_commit(batch)
+
+    def _insert_grouped(self, batch):
+        by_model = defaultdict(list)
+        for obj, _, _ in batch:
+            by_model[type(obj)].append(obj)
+        for model, objs in by_model.items():
+            model._base_manager.using(self.using).bulk_create(objs)
+
+    def _write_one_by_one(self, batch, queue_waits, started):
+        ok_waits = []
+        for (obj, future, _), wait in zip(batch, queue_waits):
+            try:
+                with transaction.atomic(using=self.using):
+                    obj.save(using=self.using)  # save() сам шлёт post_save
+            except Exception as exc:
+                self.stats.failed_rows += 1
+                future.set_exception(exc)
+            else:
+                future.set_result(obj)
+                ok_waits.append(wait)
+        if ok_waits:
+            self.stats.record_batch(len(ok_waits), ok_waits, 0.0, time.perf_counter() - started)
+
+    def _after_commit(self, batch):
+        for obj, future, _ in batch:
+            post_save.send(
+                sender=type(obj), instance=obj, created=True,
+                update_fields=None, raw=False, using=self.using,
+            )
+            future.set_result(obj)
+
+
+_write_queue = None
+_init_lock = threading.Lock()
+
+
+def get_queue() -> WriteQueue:
+    global _write_queue
+    if _write_queue is None:
+        with _init_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue()
+                atexit.register(_write_queue.stop)
+    return _write_queue
+
+
+def enabled() -> bool:
+    return getattr(settings, "SQLITE_WRITE_QUEUE", False)
+
+
+def insert(obj):
+    """Сохранить новый объект: через очередь, если она включена, иначе обычным save()."""
+    if enabled():
+        return get_queue().save(obj)
+    obj.save()
+    return obj
+
+
+async def ainsert(obj):
+    if enabled():
+        return await asyncio.wrap_future(get_queue().submit(obj))
+    await obj.asave()
+    return obj
+
+
+def metrics() -> dict:
+    if _write_queue is None:
+        return {"enabled": enabled(), "started": False}
+    return {"enabled": enabled(), "started": True, "pending": _write_queue._queue.qsize(), **_write_queue.stats.snapshot()}
@@ -0,0 +1,139 @@
+# scripts/bench_sqlite_profile.py
+"""
+Сравнение профилей SQLite (core/sqlite_profile.py): rps публичных страниц
+при SQLITE_PROFILE=basic (соединение и PRAGMA на каждый запрос) и tuned
+(постоянные соединения, mmap, cache_size).
+
+    python scripts/bench_sqlite_profile.py -t 4 -n 300
+
+Каждый профиль — отдельный подпроцесс (настройки читаются из env при
+импорте). Запросы идут прямо в WSGIHandler из пула потоков, как у
+gunicorn --threads: request_started/finished и close_old_connections
+срабатывают по-настоящему, в отличие от test Client. БД — временный
+файл с migrate и небольшим наполнением, рабочая db.sqlite3 не трогается.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+URLS = ["/", "/services/", "/products/", "/faq/", "/contacts/"]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _setup(db_path: str):
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "avtohim_site.settings")
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db_path
+    import django
+
+    django.setup()
+
+
+def seed(db_path: str):
+    _setup(db_path)
+    from django.core.management import call_command
+    from core.models import FAQ, Product, Review, Service
+
+    call_command("migrate", verbosity=0)
+    for i in range(20):
+        svc = Service.objects.create(title=f"Service {i}", slug=f"service-{i}", short_desc="bench")
+        FAQ.objects.create(service=svc, question=f"Q{i}?", answer="A")
+    for i in range(50):
+        Product.objects.create(title=f"Product {i}")
+        Review.objects.create(author=f"A{i}", rating=5, text="bench")
+
+
+def run(db_path: str, threads: int, total: int) -> dict:
+    _setup(db_path)
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def start_response(status, headers, exc_info=None):
+        return lambda data: None
+
+    def worker():
+        nonlocal errors
+        local, bad = [], 0
+        for i in counter:
+            environ = factory._base_environ(PATH_INFO=URLS[i % len(URLS)], REQUEST_METHOD="GET", HTTP_HOST="localhost")
+            t0 = time.perf_counter()
+            response = handler(environ, start_response)
+            b"".join(response)
+            response.close()  # request_finished → close_old_connections
+            local.append(time.perf_counter() - t0)
+            bad += response.status_code >= 400
+        with lock:
+            latencies.extend(local)
+            errors += bad
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", "--threads", type=int, default=4)
+    parser.add_argument("-n", "--requests", type=int, default=300)
+    parser.add_argument("--worker", nargs=2, metavar=("ACTION", "DB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        action, db_path = args.worker
+        if action == "seed":
+            seed(db_path)
+        else:
+            print(json.dumps(run(db_path, args.threads, args.requests)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite3")
+        me = [sys.executable, __file__, "-t", str(args.threads), "-n", str(args.requests)]
+        subprocess.run(me + ["--worker", "seed", db_path], check=True)
+        for profile in ("basic", "tuned"):
+            env = {**os.environ, "SQLITE_PROFILE": profile, "RATELIMIT_ENABLED": "0"}
+            env.pop("DB_CONN_MAX_AGE", None)
+            out = subprocess.run(
+                me + ["--worker", "run", db_path], env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"\n{'profile':>10}: {profile}")
+            for k, v in result.items():
+                print(f"{k:>10}: {v}")
+
+
+if __name__ == "__main__":
+    main()
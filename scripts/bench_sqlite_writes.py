@@ -0,0 +1,122 @@
+# scripts/bench_sqlite_writes.py
+"""
+Стресс-тест конкурентной записи в SQLite: N потоков пишут заявки
+напрямую (save() в каждом потоке) и через core.writequeue.
+
+    python scripts/bench_sqlite_writes.py -t 16 -n 200
+
+Работает на временной копии схемы (отдельный файл БД, migrate), рабочую
+db.sqlite3 не трогает. Печатает rps, p50/p95/max задержки, число ошибок
+«database is locked» и метрики очереди.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "avtohim_site.settings")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def setup(db_path: str, timeout: float):
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.DATABASES["default"]["OPTIONS"] = {"timeout": timeout}
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def run(mode: str, threads: int, per_thread: int) -> dict:
+    from django.db import OperationalError, connection
+    from core import writequeue
+    from core.models import Lead
+
+    latencies, errors = [], {"locked": 0, "other": 0}
+    lock = threading.Lock()
+    queue = writequeue.get_queue() if mode == "queue" else None
+
+    def worker(t: int):
+        local = []
+        for i in range(per_thread):
+            lead = Lead(name=f"Bench {t}-{i}", phone=f"+996{t:03d}{i:06d}", message=mode)
+            t0 = time.perf_counter()
+            try:
+                if queue:
+                    queue.save(lead)
+                else:
+                    lead.save()
+            except OperationalError:
+                with lock:
+                    errors["locked"] += 1
+            except Exception:
+                with lock:
+                    errors["other"] += 1
+            local.append(time.perf_counter() - t0)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    elapsed = time.perf_counter() - started
+
+    total = threads * per_thread
+    result = {
+        "mode": mode,
+        "writes": total,
+        "errors_locked": errors["locked"],
+        "errors_other": errors["other"],
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+    }
+    if queue:
+        result.update({f"q_{k}": v for k, v in queue.stats.snapshot().items()})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", "--threads", type=int, default=16)
+    parser.add_argument("-n", "--per-thread", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=5, help="sqlite busy timeout, сек.")
+    parser.add_argument("--mode", choices=["direct", "queue", "both"], default="both")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup(os.path.join(tmp, "bench.sqlite3"), args.timeout)
+        modes = ["direct", "queue"] if args.mode == "both" else [args.mode]
+        for mode in modes:
+            result = run(mode, args.threads, args.per_thread)
+            print()
+            for k, v in result.items():
+                print(f"{k:>20}: {v}")
+        from core import writequeue
+
+        writequeue.get_queue().stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# scripts/bench_static_media.py
+"""
+Отдача медиа: django.views.static.serve (было) против core/media.py (стало),
+плюс выигрыш Brotli перед gzip на статике из STATIC_ROOT.
+
+    python scripts/bench_static_media.py --size-mb 16 -t 4 -n 200
+
+Сценарии на одном файле в temp MEDIA_ROOT:
+- full   — файл целиком;
+- range  — случайный кусок 1 МБ (перемотка видео, докачка);
+- reval  — повторный запрос с If-None-Match (браузер с кэшем).
+Тело отдаётся как у gunicorn: если у ответа есть file_to_stream с fileno(),
+то os.sendfile() в /dev/null (смещение — позиция файла, длина —
+Content-Length), иначе чтение итератора. Считаем rps и МБ/с по телу.
+
+Для статики: размеры .gz и .br из STATIC_ROOT (нужны collectstatic и Brotli).
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _setup(media_root):
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "avtohim_site.settings")
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.MEDIA_ROOT = media_root
+    settings.MEDIA_SENDFILE = ""
+    settings.ALLOWED_HOSTS = ["*"]
+
+
+def _drain(response, devnull):
+    """Тело ответа «в сокет»: sendfile, если можно, иначе итератор."""
+    filelike = getattr(response, "file_to_stream", None)
+    length = response.get("Content-Length")
+    if filelike is not None and hasattr(filelike, "fileno") and length:
+        fd = filelike.fileno()
+        offset, left = os.lseek(fd, 0, os.SEEK_CUR), int(length)
+        while left:
+            sent = os.sendfile(devnull, fd, offset, left)
+            if not sent:
+                break
+            offset += sent
+            left -= sent
+        response.close()
+        return int(length)
+    total = sum(len(chunk) for chunk in response)
+    response.close()
+    return total
+
+
+def _views():
+    from django.conf import settings
+    from django.views.static import serve as django_serve
+
+    from core import media
+
+    return {
+        "django.static.serve": lambda request, path: django_serve(request, path, document_root=settings.MEDIA_ROOT),
+        "core.media.serve": media.serve,
+    }
+
+
+def bench(view, scenario, path, size, threads, total):
+    from django.test import RequestFactory
+
+    rf = RequestFactory()
+    etag = view(rf.get("/"), path).get("ETag")
+    chunk = 1024 * 1024
+    latencies, sent_bytes, statuses = [], [0], {}
+    lock = threading.Lock()
+    devnull = os.open(os.devnull, os.O_WRONLY)
+
+    def worker(n):
+        rng = random.Random(n)
+        local = []
+        for _ in range(n):
+            headers = {}
+            if scenario == "range":
+                start = rng.randrange(0, size - chunk)
+                headers["HTTP_RANGE"] = f"bytes={start}-{start + chunk - 1}"
+            elif scenario == "reval" and etag:
+                headers["HTTP_IF_NONE_MATCH"] = etag
+            t0 = time.perf_counter()
+            response = view(rf.get("/media/" + path, **headers), path)
+            nbytes = _drain(response, devnull)
+            local.append((time.perf_counter() - t0, nbytes, response.status_code))
+        with lock:
+            for latency, nbytes, status in local:
+                latencies.append(latency)
+                sent_bytes[0] += nbytes
+                statuses[status] = statuses.get(status, 0) + 1
+
+    per_thread = max(1, total // threads)
+    pool = [threading.Thread(target=worker, args=(per_thread,)) for _ in range(threads)]
+    started = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    elapsed = time.perf_counter() - started
+    os.close(devnull)
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "mb_s": round(sent_bytes[0] / elapsed / 1024 / 1024, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def static_compression():
+    from django.conf import settings
+
+    root = Path(settings.STATIC_ROOT)
+    rows = []
+    for ext in (".css", ".js", ".svg"):
+        for path in root.rglob(f"*{ext}"):
+            raw = path.stat().st_size
+            gz = path.with_name(path.name + ".gz")
+            br = path.with_name(path.name + ".br")
+            gz_size = gz.stat().st_size if gz.exists() else len(gzip.compress(path.read_bytes(), 9))
+            rows.append((str(path.relative_to(root)), raw, gz_size, br.stat().st_size if br.exists() else None))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=16)
+    parser.add_argument("-t", "--threads", type=int, default=4)
+    parser.add_argument("-n", "--requests", type=int, default=200, help="запросов на сценарий")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as media_root:
+        _setup(media_root)
+        size = args.size_mb * 1024 * 1024
+        path = "video/sample.mp4"
+        os.makedirs(os.path.join(media_root, "video"))
+        with open(os.path.join(media_root, path), "wb") as fh:
+            fh.write(os.urandom(size))
+
+        print(f"файл {args.size_mb} МБ, {args.threads} потоков, {args.requests} запросов на сценарий")
+        print(f"{'view':<22} {'сценарий':<8} {'rps':>8} {'МБ/с':>8} {'p95 ms':>8}  статусы")
+        for name, view in _views().items():
+            for scenario in ("full", "range", "reval"):
+                r = bench(view, scenario, path, size, args.threads, args.requests)
+                print(f"{name:<22} {scenario:<8} {r['rps']:>8} {r['mb_s']:>8} {r['p95_ms']:>8}  {r['statuses']}")
+
+    rows = static_compression()
+    if not rows:
+        print("\nSTATIC_ROOT пуст — для сравнения gzip/brotli запустите collectstatic")
+        return
+    print(f"\n{'static':<48} {'raw':>9} {'gzip':>9} {'brotli':>9}")
+    for name, raw, gz, br in sorted(rows, key=lambda r: -r[1])[:20]:
+        print(f"{name[:48]:<48} {raw:>9} {gz:>9} {br if br is not None else '—':>9}")
+    if all(r[3] is None for r in rows):
+        print("нет .br — установите Brotli (requirements.txt) и повторите collectstatic")
+
+
+if __name__ == "__main__":
+    main()
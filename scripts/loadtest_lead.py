@@ -0,0 +1,86 @@
+# scripts/loadtest_lead.py
+"""
+Нагрузочный тест приёма заявок: sync lead_create (WSGI) против
+lead_create_async (ASGI).
+
+Поднимите оба варианта и прогоните скрипт по каждому:
+
+    gunicorn avtohim_site.wsgi -w 1 --threads 8 -b 127.0.0.1:8000
+    python scripts/loadtest_lead.py --base http://127.0.0.1:8000 --path /lead/
+
+    uvicorn avtohim_site.asgi:application --port 8001
+    python scripts/loadtest_lead.py --base http://127.0.0.1:8001 --path /lead/async/
+
+Заявки реально пишутся в БД — гоняйте на копии базы и с RATELIMIT_ENABLED=0,
+иначе все запросы с одного IP упрутся в лимит.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def run(base: str, path: str, total: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        # csrftoken-кука выдаётся любой страницей с формой
+        await client.get("/")
+        token = client.cookies.get("csrftoken", "")
+        headers = {"X-CSRFToken": token, "Referer": base + "/", "User-Agent": "loadtest_lead"}
+
+        latencies, errors = [], 0
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(i: int):
+            nonlocal errors
+            data = {"name": f"Load {i}", "phone": f"+996700{i:06d}", "message": "loadtest", "lang": "ru"}
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.post(path, data=data, headers=headers)
+                    if resp.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "path": path,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/lead/")
+    parser.add_argument("-n", "--requests", type=int, default=500)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.base, args.path, args.requests, args.concurrency))
+    for k, v in result.items():
+        print(f"{k:>12}: {v}")
+
+
+if __name__ == "__main__":
+    main()